@@ -0,0 +1,143 @@
+"""
+Shared service instances for API routes
+
+Services are created once per process and injected into handlers with
+FastAPI's Depends(). None of them keep per-request state, so a single
+instance can serve concurrent requests and worker threads.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.core.config import settings
+from app.services.mcp import MCPContextManager
+from app.services.llm import LLMPipelineService
+from app.services.synthesizer import PipelineSynthesizer
+from app.services.sandbox import SandboxRunner
+from app.services.repair import RepairLoop
+from app.services.commit import CommitService
+
+
+@lru_cache(maxsize=None)
+def get_mcp_manager() -> MCPContextManager:
+    """
+    Get the shared MCP context manager
+
+    Returns:
+        MCPContextManager instance
+    """
+    return MCPContextManager()
+
+
+@lru_cache(maxsize=None)
+def get_llm_service() -> LLMPipelineService:
+    """
+    Get the shared LLM pipeline service
+
+    Shares the MCP context manager so both use one context cache.
+
+    Returns:
+        LLMPipelineService instance
+
+    Raises:
+        ValueError: If GEMINI_API_KEY is not configured
+    """
+    return LLMPipelineService(mcp_manager=get_mcp_manager())
+
+
+@lru_cache(maxsize=None)
+def get_synthesizer() -> PipelineSynthesizer:
+    """
+    Get the shared pipeline synthesizer
+
+    Returns:
+        PipelineSynthesizer instance
+    """
+    return PipelineSynthesizer()
+
+
+@lru_cache(maxsize=None)
+def get_sandbox_runner() -> SandboxRunner:
+    """
+    Get the shared sandbox runner
+
+    Returns:
+        SandboxRunner instance
+    """
+    return SandboxRunner()
+
+
+@lru_cache(maxsize=None)
+def get_sandbox_executor() -> ThreadPoolExecutor:
+    """
+    Get the executor that runs sandbox pipelines and repairs
+
+    Kept apart from the loop's default executor so long sandbox runs
+    cannot starve short blocking calls, and sized by SANDBOX_MAX_WORKERS
+    to bound how many pipelines execute at once.
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.SANDBOX_MAX_WORKERS,
+        thread_name_prefix="queryforge-sandbox"
+    )
+
+
+@lru_cache(maxsize=None)
+def get_repair_loop() -> RepairLoop:
+    """
+    Get the shared repair loop
+
+    Returns:
+        RepairLoop instance
+    """
+    return RepairLoop()
+
+
+@lru_cache(maxsize=None)
+def get_commit_service() -> CommitService:
+    """
+    Get the shared commit service
+
+    Returns:
+        CommitService instance
+    """
+    return CommitService()
+
+
+async def provide_mcp_manager() -> MCPContextManager:
+    """
+    Depends() provider for the shared MCP context manager
+
+    FastAPI runs plain ``def`` dependencies on the AnyIO thread pool; an
+    async provider returns the cached instance on the event loop instead.
+
+    Returns:
+        MCPContextManager instance
+    """
+    return get_mcp_manager()
+
+
+async def provide_commit_service() -> CommitService:
+    """
+    Depends() provider for the shared commit service
+
+    Returns:
+        CommitService instance
+    """
+    return get_commit_service()
+
+
+# Export functions
+__all__ = [
+    'provide_mcp_manager',
+    'provide_commit_service',
+    'get_mcp_manager',
+    'get_llm_service',
+    'get_synthesizer',
+    'get_sandbox_runner',
+    'get_sandbox_executor',
+    'get_repair_loop',
+    'get_commit_service'
+]
@@ -1,11 +1,15 @@
 """
 Pipeline API routes
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any, List
-import sqlite3
-import json
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import asyncio
+import base64
+import hashlib
 import logging
+import operator
+import orjson
 from datetime import datetime
 
 from app.models.schemas import (
@@ -16,35 +20,129 @@ from app.models.schemas import (
     PipelineLogsResponse, PipelineStep, ExecutionLog, RepairLog, ContextSummary
 )
 from app.services.mcp import MCPContextManager
-from app.services.llm import LLMPipelineService
-from app.services.synthesizer import PipelineSynthesizer
-from app.services.sandbox import SandboxRunner
-from app.services.repair import RepairLoop
 from app.services.commit import CommitService
-from app.core.database import get_db_path
+from app.services.cache import SemanticCache, TTLCache, context_fingerprint, context_identifiers
+from app.core.config import settings
+from app.core.database import pool
+from app.core.responses import ORJSONResponse, etag_matches
+from app.api.dependencies import (
+    get_llm_service,
+    get_synthesizer,
+    get_sandbox_runner,
+    get_sandbox_executor,
+    get_repair_loop,
+    provide_mcp_manager,
+    provide_commit_service
+)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
+# Generated pipelines shared across requests, keyed by prompt similarity
+pipeline_cache = SemanticCache()
+
+# Recent list pages for dashboard polling; cleared whenever pipelines change
+pipeline_list_cache = TTLCache(maxsize=128, ttl_seconds=settings.PIPELINE_LIST_CACHE_TTL_SECONDS)
+
+# Statements shared across handlers. Passing the same SQL text each time
+# lets the connection's prepared-statement cache skip re-parsing.
+SQL_PIPELINE_EXISTS = "SELECT 1 FROM Pipelines WHERE id = ? LIMIT 1"
+
+SQL_PIPELINE_BY_ID = "SELECT prompt_text, status FROM Pipelines WHERE id = ?"
+
+SQL_STEPS_BY_PID = """
+    SELECT step_number, code_type, script_content FROM Pipeline_Steps 
+    WHERE pipeline_id = ? 
+    ORDER BY step_number
+"""
+
+SQL_EXEC_LOGS_BY_PID = """
+    SELECT step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms
+    FROM Execution_Logs 
+    WHERE pipeline_id = ? 
+    ORDER BY run_time
+"""
+
+# No row: unknown pipeline; NULL id: pipeline has no failed execution
+SQL_LATEST_FAILED_EXEC = """
+    SELECT (
+        SELECT id FROM Execution_Logs 
+        WHERE pipeline_id = p.id AND is_successful = 0 
+        ORDER BY run_time DESC LIMIT 1
+    ) AS id
+    FROM Pipelines p 
+    WHERE p.id = ?
+"""
+
+SQL_REPAIR_LOGS_BY_PID = """
+    SELECT attempt_number, original_error, ai_fix_reason, repair_successful, repair_time
+    FROM Repair_Logs 
+    WHERE pipeline_id = ? 
+    ORDER BY attempt_number
+"""
+
+# Whole /logs payload in one statement (one worker-thread round trip and
+# one implicit read snapshot); child rows come back as JSON arrays, ordered
+# by the inner subqueries
+SQL_LOGS_SNAPSHOT = """
+    SELECT p.prompt_text, p.status,
+        (SELECT json_group_array(json_object(
+            'step_id', step_id, 'run_time', run_time, 'is_successful', is_successful,
+            'stdout', stdout, 'stderr', stderr, 'exit_code', exit_code,
+            'execution_time_ms', execution_time_ms
+         ))
+         FROM (SELECT * FROM Execution_Logs WHERE pipeline_id = p.id ORDER BY run_time)
+        ) AS execution_logs,
+        (SELECT json_group_array(json_object(
+            'attempt_number', attempt_number, 'original_error', original_error,
+            'ai_fix_reason', ai_fix_reason, 'repair_successful', repair_successful
+         ))
+         FROM (SELECT * FROM Repair_Logs WHERE pipeline_id = p.id ORDER BY attempt_number)
+        ) AS repair_logs,
+        (SELECT json_group_array(json_object(
+            'step_number', step_number, 'type', code_type, 'content', script_content
+         ))
+         FROM (SELECT * FROM Pipeline_Steps WHERE pipeline_id = p.id ORDER BY step_number)
+        ) AS final_pipeline
+    FROM Pipelines p 
+    WHERE p.id = ?
+"""
+
+# Everything that changes the /logs payload: status updates touch updated_at,
+# runs and repairs append log rows (repairs are also the only step edits)
+SQL_LOGS_VERSION = """
+    SELECT p.prompt_text, p.status, p.updated_at,
+        (SELECT COUNT(*) || ':' || IFNULL(MAX(run_time), '')
+         FROM Execution_Logs WHERE pipeline_id = p.id),
+        (SELECT COUNT(*) || ':' || IFNULL(MAX(repair_time), '')
+         FROM Repair_Logs WHERE pipeline_id = p.id)
+    FROM Pipelines p 
+    WHERE p.id = ?
+"""
+
 
 @router.post("/commit/{pipeline_id}", response_model=PipelineCommitResponse)
-async def commit_pipeline(pipeline_id: int, request: PipelineCommitRequest = PipelineCommitRequest()):
+async def commit_pipeline(
+    pipeline_id: int,
+    request: PipelineCommitRequest = PipelineCommitRequest(),
+    commit_service: CommitService = Depends(provide_commit_service),
+    mcp: MCPContextManager = Depends(provide_mcp_manager)
+):
     """
     Commit validated pipeline to production
     
     Args:
         pipeline_id: Pipeline ID to commit
         request: Commit configuration
+        commit_service: Shared commit service
+        mcp: Shared MCP context manager
         
     Returns:
         Commit result
     """
     try:
-        # Use commit service
-        commit_service = CommitService()
-        
         # Validate first
-        validation = commit_service.validate_for_commit(pipeline_id)
+        validation = await asyncio.to_thread(commit_service.validate_for_commit, pipeline_id)
         
         if not validation.is_valid:
             return PipelineCommitResponse(
@@ -55,7 +153,13 @@ async def commit_pipeline(pipeline_id: int, request: PipelineCommitRequest = Pip
             )
         
         # Commit pipeline
-        result = commit_service.commit_pipeline(pipeline_id, request.force_commit)
+        result = await asyncio.to_thread(
+            commit_service.commit_pipeline, pipeline_id, request.force_commit
+        )
+        pipeline_list_cache.clear()
+        if result.success:
+            # Committed operations may change the schema and data files
+            mcp.clear_cache()
         
         return PipelineCommitResponse(
             success=result.success,
@@ -75,52 +179,145 @@ async def commit_pipeline(pipeline_id: int, request: PipelineCommitRequest = Pip
         )
 
 
+LIST_COLUMNS = "id, user_id, prompt_text, status, created_at, commit_status"
+
+# Databases created before commit support lack Pipelines.commit_status
+LIST_COLUMNS_LEGACY = "id, user_id, prompt_text, status, created_at, 'not_committed' AS commit_status"
+
+
+def _build_list_queries(columns: str) -> Dict[bool, str]:
+    """
+    Build list_pipelines statements keyed by whether a cursor is given
+    
+    Args:
+        columns: Column list to select from Pipelines
+        
+    Returns:
+        Mapping of has_cursor -> SQL
+    """
+    return {
+        has_cursor: f"""
+            SELECT {columns} 
+            FROM Pipelines 
+            {"WHERE (created_at, id) < (?, ?)" if has_cursor else ""}
+            ORDER BY created_at DESC, id DESC 
+            LIMIT ?
+        """
+        for has_cursor in (False, True)
+    }
+
+
+# Selected once at startup by configure_schema_queries()
+list_pipelines_sql = _build_list_queries(LIST_COLUMNS)
+
+
+async def configure_schema_queries() -> None:
+    """
+    Pick query variants matching the database schema
+    
+    Introspects Pipelines once so list_pipelines never has to probe for
+    missing columns per request.
+    """
+    global list_pipelines_sql
+    
+    async with pool.connection() as conn:
+        rows = await conn.execute_fetchall("PRAGMA table_info(Pipelines)")
+    
+    if 'commit_status' in {row[1] for row in rows}:
+        list_pipelines_sql = _build_list_queries(LIST_COLUMNS)
+    else:
+        logger.warning("Database schema outdated: Pipelines.commit_status missing. Using basic columns.")
+        list_pipelines_sql = _build_list_queries(LIST_COLUMNS_LEGACY)
+
+
+def _encode_cursor(created_at: str, pipeline_id: int) -> str:
+    """
+    Encode a keyset pagination cursor
+    
+    Args:
+        created_at: created_at of the last row on the page
+        pipeline_id: id of the last row on the page
+        
+    Returns:
+        Opaque URL-safe cursor string
+    """
+    raw = f"{created_at}:{pipeline_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Decode a keyset pagination cursor
+    
+    Args:
+        cursor: Cursor produced by _encode_cursor
+        
+    Returns:
+        Tuple of (created_at, id)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, pipeline_id = raw.rsplit(":", 1)
+        return created_at, int(pipeline_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
 @router.get("/")
-async def list_pipelines():
+async def list_pipelines(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200)
+):
     """
-    List all pipelines
+    List pipelines, newest first, using keyset pagination
+    
+    Args:
+        cursor: next_cursor value from the previous page
+        limit: Maximum number of pipelines to return
+        
+    Returns:
+        Page of pipelines and the cursor for the next page (None on the last page)
     """
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Try to select with commit_status, fallback if column doesn't exist
-        try:
-            cursor.execute("""
-                SELECT id, user_id, prompt_text, status, created_at, commit_status 
-                FROM Pipelines 
-                ORDER BY created_at DESC 
-                LIMIT 50
-            """)
-        except sqlite3.OperationalError as e:
-            # Column might not exist in old database, use basic columns
-            logger.warning(f"Database schema outdated: {e}. Using basic columns.")
-            cursor.execute("""
-                SELECT id, user_id, prompt_text, status, created_at 
-                FROM Pipelines 
-                ORDER BY created_at DESC 
-                LIMIT 50
-            """)
-        
-        pipelines = cursor.fetchall()
-        conn.close()
-        
-        # Convert to dict and add missing columns if needed
-        pipeline_list = []
-        for p in pipelines:
-            p_dict = dict(p)
-            # Add commit_status if missing
-            if 'commit_status' not in p_dict:
-                p_dict['commit_status'] = 'not_committed'
-            pipeline_list.append(p_dict)
-        
-        return {
+        cache_key = (cursor, limit)
+        cached_page = pipeline_list_cache.get(cache_key)
+        if cached_page is not None:
+            return cached_page
+        
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = _decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            params = (cursor_created_at, cursor_id, limit + 1)
+        else:
+            params = (limit + 1,)
+        
+        async with pool.connection() as conn:
+            pipelines = await conn.execute_fetchall(list_pipelines_sql[bool(cursor)], params)
+        
+        # Fetched one extra row to learn whether another page exists
+        has_more = len(pipelines) > limit
+        pipeline_list = [dict(p) for p in pipelines[:limit]]
+        
+        next_cursor = None
+        if has_more:
+            last = pipeline_list[-1]
+            next_cursor = _encode_cursor(last['created_at'], last['id'])
+        
+        page = {
             "success": True,
-            "pipelines": pipeline_list
+            "pipelines": pipeline_list,
+            "next_cursor": next_cursor
         }
+        pipeline_list_cache.set(cache_key, page)
+        return page
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -129,28 +326,56 @@ async def list_pipelines():
 
 
 @router.post("/create", response_model=PipelineCreateResponse, status_code=status.HTTP_201_CREATED)
-async def create_pipeline(request: PipelineCreateRequest):
+async def create_pipeline(
+    request: PipelineCreateRequest,
+    mcp: MCPContextManager = Depends(provide_mcp_manager)
+):
     """
     Create a new pipeline from natural-language request
     
     Args:
         request: Pipeline creation request with user_id and prompt
+        mcp: Shared MCP context manager
         
     Returns:
         PipelineCreateResponse with generated pipeline
     """
     try:
         # Get MCP context
-        mcp = MCPContextManager()
-        context = mcp.get_full_context()
-        
-        # Generate pipeline using LLM
-        llm = LLMPipelineService()
-        result = await llm.generate_pipeline(
-            user_prompt=request.prompt,
-            user_id=request.user_id,
-            mcp_context=context
-        )
+        context = await mcp.get_full_context_async()
+        
+        # Resolved here rather than via Depends so a missing API key is
+        # reported as a creation failure
+        llm = get_llm_service()
+        
+        # Reuse a cached pipeline for near-duplicate prompts on the same context
+        context_hash = context_fingerprint(context)
+        identifiers = context_identifiers(context)
+        cached = pipeline_cache.lookup(request.prompt, context_hash, identifiers)
+        
+        if cached is not None:
+            pipeline_id = await llm.save_pipeline(
+                request.user_id, request.prompt, cached['pipeline'], context
+            )
+            result = {
+                'success': True,
+                'pipeline_id': pipeline_id,
+                'pipeline': cached['pipeline'],
+                'warnings': cached['warnings']
+            }
+        else:
+            # Generate pipeline using LLM
+            result = await llm.generate_pipeline(
+                user_prompt=request.prompt,
+                user_id=request.user_id,
+                mcp_context=context
+            )
+            
+            if result['success']:
+                pipeline_cache.store(request.prompt, context_hash, {
+                    'pipeline': result['pipeline'],
+                    'warnings': result.get('warnings', [])
+                }, identifiers)
         
         if not result['success']:
             return PipelineCreateResponse(
@@ -159,6 +384,8 @@ async def create_pipeline(request: PipelineCreateRequest):
                 error_type=result.get('error_type')
             )
         
+        pipeline_list_cache.clear()
+        
         # Prepare draft steps
         draft_steps = [
             PipelineStep(
@@ -184,7 +411,8 @@ async def create_pipeline(request: PipelineCreateRequest):
             draft_pipeline=draft_steps,
             created_at=datetime.now().isoformat(),
             context_used=context_summary,
-            warnings=result.get('warnings', [])
+            warnings=result.get('warnings', []),
+            cache_hit=cached is not None
         )
         
     except Exception as e:
@@ -194,125 +422,175 @@ async def create_pipeline(request: PipelineCreateRequest):
         )
 
 
-@router.post("/run/{pipeline_id}", response_model=PipelineRunResponse)
-async def run_pipeline(pipeline_id: int, request: PipelineRunRequest = PipelineRunRequest()):
+# Pulls the fields reported per step in PipelineRunResponse.execution_log
+_step_log_fields = operator.attrgetter("step_number", "step_type", "exit_code", "stdout", "stderr")
+
+
+async def _set_pipeline_status(pipeline_id: int, new_status: str) -> None:
     """
-    Execute pipeline in sandbox environment
+    Record a pipeline's run status on a pooled connection
+    
+    Args:
+        pipeline_id: Pipeline ID
+        new_status: Status to store
+    """
+    async with pool.connection() as conn:
+        await conn.execute("""
+            UPDATE Pipelines 
+            SET status = ?, updated_at = CURRENT_TIMESTAMP 
+            WHERE id = ?
+        """, (new_status, pipeline_id))
+    pipeline_list_cache.clear()
+
+
+async def _execute_pipeline_run(pipeline_id: int, pipeline_steps: List[Dict[str, Any]]) -> PipelineRunResponse:
+    """
+    Synthesize and execute a pipeline in the sandbox
     
     Args:
         pipeline_id: Pipeline ID to execute
-        request: Run configuration
+        pipeline_steps: Steps in synthesizer format
         
     Returns:
         Execution results
-    """
-    try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Check if pipeline exists
-        cursor.execute("SELECT * FROM Pipelines WHERE id = ?", (pipeline_id,))
-        pipeline = cursor.fetchone()
-        if not pipeline:
-            conn.close()
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Pipeline with id {pipeline_id} not found"
-            )
         
-        # Get pipeline steps
-        cursor.execute("""
-            SELECT * FROM Pipeline_Steps 
-            WHERE pipeline_id = ? 
-            ORDER BY step_number
-        """, (pipeline_id,))
-        steps = cursor.fetchall()
-        conn.close()
-        
-        # Transform database rows to synthesizer format
-        pipeline_steps = []
-        for step in steps:
-            step_dict = {
-                'step_number': step['step_number'],
-                'type': step['code_type'],  # Maps to 'type'
-                'content': step['script_content']  # Maps to 'content'
+    Raises:
+        RuntimeError: If script synthesis fails
+    """
+    # Synthesize scripts
+    result = await asyncio.to_thread(
+        get_synthesizer().synthesize_pipeline,
+        pipeline_id=pipeline_id,
+        pipeline=pipeline_steps
+    )
+    
+    # Check if synthesis was successful
+    if not result['success']:
+        raise RuntimeError(f"Pipeline synthesis failed: {result.get('error', 'Unknown error')}")
+    
+    output_dir = result['output_directory']
+    
+    # Execute in sandbox
+    execution_result = await asyncio.get_running_loop().run_in_executor(
+        get_sandbox_executor(), get_sandbox_runner().execute_pipeline, pipeline_id, output_dir
+    )
+    
+    # SandboxRunner also records the status but only logs a failed write;
+    # this write is the one pollers rely on
+    new_status = "success" if execution_result.overall_success else "failed"
+    await _set_pipeline_status(pipeline_id, new_status)
+    
+    return PipelineRunResponse(
+        success=execution_result.overall_success,
+        pipeline_id=pipeline_id,
+        status=new_status,
+        execution_log={
+            f"step_{number}": {
+                "type": step_type,
+                "exit_code": exit_code,
+                "stdout": stdout,
+                "stderr": stderr
             }
-            # Add description if it exists in the row
-            try:
-                if 'description' in step.keys():
-                    step_dict['description'] = step['description'] or ''
-            except:
-                pass
-            pipeline_steps.append(step_dict)
-        
-        # Synthesize scripts
-        synthesizer = PipelineSynthesizer()
-        result = synthesizer.synthesize_pipeline(
-            pipeline_id=pipeline_id,
-            pipeline=pipeline_steps
+            for number, step_type, exit_code, stdout, stderr
+            in map(_step_log_fields, execution_result.step_results)
+        },
+        overall_status=new_status,
+        error=None if execution_result.overall_success else (
+            execution_result.step_results[execution_result.failed_step - 1].stderr 
+            if execution_result.failed_step and len(execution_result.step_results) >= execution_result.failed_step
+            else "Pipeline execution failed"
         )
+    )
+
+
+async def _run_pipeline_in_background(pipeline_id: int, pipeline_steps: List[Dict[str, Any]]) -> None:
+    """
+    Background task wrapper for pipeline runs
+    
+    Marks the pipeline as failed if the run aborts before the sandbox
+    records a final status, so pollers never see 'running' forever.
+    
+    Args:
+        pipeline_id: Pipeline ID to execute
+        pipeline_steps: Steps in synthesizer format
+    """
+    try:
+        await _execute_pipeline_run(pipeline_id, pipeline_steps)
+    except Exception as e:
+        logger.exception("Background pipeline execution error: %s", e)
+        await _set_pipeline_status(pipeline_id, "failed")
+
+
+@router.post("/run/{pipeline_id}", response_model=PipelineRunResponse, status_code=status.HTTP_202_ACCEPTED)
+async def run_pipeline(
+    pipeline_id: int,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    request: PipelineRunRequest = PipelineRunRequest()
+):
+    """
+    Execute pipeline in sandbox environment
+    
+    The run is queued as a background task and the pipeline is marked
+    'running'; clients poll GET /{pipeline_id}/logs until the status
+    changes. Set wait_for_completion to block and receive the full
+    execution log instead.
+    
+    Args:
+        pipeline_id: Pipeline ID to execute
+        background_tasks: FastAPI background task queue
+        response: Outgoing response (status code set for blocking runs)
+        request: Run configuration
         
-        # Check if synthesis was successful
-        if not result['success']:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Pipeline synthesis failed: {result.get('error', 'Unknown error')}"
-            )
-        
-        output_dir = result['output_directory']
-        
-        # Execute in sandbox
-        runner = SandboxRunner()
-        execution_result = runner.execute_pipeline(pipeline_id, output_dir)
+    Returns:
+        Run acceptance or, when waiting, execution results
+    """
+    try:
+        async with pool.connection() as conn:
+            # Get pipeline steps; only an empty result needs the existence check
+            steps = await conn.execute_fetchall(SQL_STEPS_BY_PID, (pipeline_id,))
+            
+            if not steps:
+                cursor = await conn.execute(SQL_PIPELINE_EXISTS, (pipeline_id,))
+                if not await cursor.fetchone():
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Pipeline with id {pipeline_id} not found"
+                    )
+            
+            if not request.wait_for_completion:
+                await conn.execute("""
+                    UPDATE Pipelines 
+                    SET status = 'running', updated_at = CURRENT_TIMESTAMP 
+                    WHERE id = ?
+                """, (pipeline_id,))
+        
+        # Transform database rows to synthesizer format; columns are fixed by
+        # SQL_STEPS_BY_PID (step_number, code_type, script_content) and
+        # Pipeline_Steps has no description column
+        pipeline_steps = [
+            {'step_number': step[0], 'type': step[1], 'content': step[2]}
+            for step in steps
+        ]
         
-        # Update pipeline status
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        # Map internal status to database-allowed values
-        if execution_result.overall_success:
-            new_status = "success"  # Changed from "sandbox_success"
-        else:
-            new_status = "failed"  # Changed from "sandbox_failed"
+        if request.wait_for_completion:
+            response.status_code = status.HTTP_200_OK
+            return await _execute_pipeline_run(pipeline_id, pipeline_steps)
         
-        cursor.execute("""
-            UPDATE Pipelines 
-            SET status = ?, updated_at = CURRENT_TIMESTAMP 
-            WHERE id = ?
-        """, (new_status, pipeline_id))
-        conn.commit()
-        conn.close()
+        pipeline_list_cache.clear()
+        background_tasks.add_task(_run_pipeline_in_background, pipeline_id, pipeline_steps)
         
         return PipelineRunResponse(
-            success=execution_result.overall_success,
+            success=True,
             pipeline_id=pipeline_id,
-            status=new_status,
-            execution_log={
-                f"step_{r.step_number}": {
-                    "type": r.step_type,
-                    "exit_code": r.exit_code,
-                    "stdout": r.stdout,
-                    "stderr": r.stderr
-                }
-                for r in execution_result.step_results
-            },
-            overall_status=new_status,
-            error=None if execution_result.overall_success else (
-                execution_result.step_results[execution_result.failed_step - 1].stderr 
-                if execution_result.failed_step and len(execution_result.step_results) >= execution_result.failed_step
-                else "Pipeline execution failed"
-            )
+            status="running",
+            overall_status="running"
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Pipeline execution error: {str(e)}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Pipeline execution error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Pipeline execution failed: {str(e)}"
@@ -320,7 +598,10 @@ async def run_pipeline(pipeline_id: int, request: PipelineRunRequest = PipelineR
 
 
 @router.post("/repair/{pipeline_id}", response_model=PipelineRepairResponse)
-async def repair_pipeline(pipeline_id: int, request: PipelineRepairRequest = PipelineRepairRequest()):
+async def repair_pipeline(
+    pipeline_id: int,
+    request: PipelineRepairRequest = PipelineRepairRequest()
+):
     """
     Trigger automatic repair and retry
     
@@ -332,55 +613,39 @@ async def repair_pipeline(pipeline_id: int, request: PipelineRepairRequest = Pip
         Repair status
     """
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Check if pipeline exists
-        cursor.execute("SELECT * FROM Pipelines WHERE id = ?", (pipeline_id,))
-        pipeline = cursor.fetchone()
-        if not pipeline:
-            conn.close()
+        async with pool.connection() as conn:
+            # Check pipeline exists and find its latest failed execution
+            cursor = await conn.execute(SQL_LATEST_FAILED_EXEC, (pipeline_id,))
+            failed_execution = await cursor.fetchone()
+        
+        if not failed_execution:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Pipeline with id {pipeline_id} not found"
             )
         
-        # Check for failed execution
-        cursor.execute("""
-            SELECT * FROM Execution_Logs 
-            WHERE pipeline_id = ? AND is_successful = 0 
-            ORDER BY run_time DESC LIMIT 1
-        """, (pipeline_id,))
-        failed_execution = cursor.fetchone()
-        
-        if not failed_execution:
-            conn.close()
+        if failed_execution['id'] is None:
             return PipelineRepairResponse(
                 success=False,
                 pipeline_id=pipeline_id,
                 error="No failed execution found to repair"
             )
         
-        conn.close()
-        
-        # Trigger repair loop
-        repair_loop = RepairLoop(max_attempts=request.max_attempts)
-        result = repair_loop.repair_and_retry(pipeline_id, failed_execution['id'])
+        # Trigger repair loop; resolved here since it needs the Gemini client
+        # Repairs re-run the sandbox, so they share its executor
+        result = await asyncio.get_running_loop().run_in_executor(
+            get_sandbox_executor(),
+            get_repair_loop().repair_and_retry,
+            pipeline_id,
+            failed_execution['id'],
+            request.max_attempts
+        )
+        pipeline_list_cache.clear()
         
         # Get repair attempts from database
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT * FROM Repair_Logs 
-            WHERE pipeline_id = ? 
-            ORDER BY attempt_number
-        """, (pipeline_id,))
-        repair_logs = cursor.fetchall()
-        conn.close()
+        async with pool.connection() as conn:
+            cursor = await conn.execute(SQL_REPAIR_LOGS_BY_PID, (pipeline_id,))
+            repair_logs = await cursor.fetchall()
         
         repair_attempts = [
             {
@@ -410,101 +675,176 @@ async def repair_pipeline(pipeline_id: int, request: PipelineRepairRequest = Pip
         )
 
 
+# Row batch size when streaming logs (one worker-thread hop per batch)
+LOG_STREAM_BATCH_SIZE = 100
+
+# (record type, query, boolean columns) streamed by get_pipeline_logs
+LOG_STREAM_QUERIES = (
+    ("execution_log", SQL_EXEC_LOGS_BY_PID, ("is_successful",)),
+    ("repair_log", SQL_REPAIR_LOGS_BY_PID, ("repair_successful",)),
+    ("step", """
+        SELECT step_number, code_type AS type, script_content AS content
+        FROM Pipeline_Steps 
+        WHERE pipeline_id = ? 
+        ORDER BY step_number
+    """, ()),
+)
+
+
+async def _stream_pipeline_logs(pipeline_id: int) -> AsyncIterator[bytes]:
+    """
+    Yield pipeline logs as NDJSON records
+    
+    Each line carries a "record" key: a leading "meta" record with the
+    prompt and status, then one "execution_log", "repair_log" or "step"
+    record per row. Everything is read from one snapshot on a dedicated
+    connection, LOG_STREAM_BATCH_SIZE rows at a time, so memory stays
+    flat and slow clients never hold a pooled connection.
+    
+    Args:
+        pipeline_id: Pipeline ID
+        
+    Yields:
+        JSON-encoded records, one per line, a batch per chunk
+    """
+    conn = await pool.connect()
+    try:
+        # One read transaction keeps the meta row and all result sets consistent
+        await conn.execute("BEGIN")
+        cursor = await conn.execute(SQL_PIPELINE_BY_ID, (pipeline_id,))
+        pipeline = await cursor.fetchone()
+        await cursor.close()
+        if pipeline is None:
+            # Deleted after get_pipeline_logs checked it
+            return
+        
+        yield orjson.dumps({
+            "record": "meta",
+            "pipeline_id": pipeline_id,
+            "original_prompt": pipeline['prompt_text'],
+            "overall_status": pipeline['status']
+        }) + b"\n"
+        
+        for record_type, query, bool_columns in LOG_STREAM_QUERIES:
+            cursor = await conn.execute(query, (pipeline_id,))
+            try:
+                while True:
+                    rows = await cursor.fetchmany(LOG_STREAM_BATCH_SIZE)
+                    if not rows:
+                        break
+                    chunk = []
+                    for row in rows:
+                        record = {"record": record_type, **dict(row)}
+                        for column in bool_columns:
+                            record[column] = bool(record[column])
+                        chunk.append(orjson.dumps(record))
+                    yield b"\n".join(chunk) + b"\n"
+            finally:
+                await cursor.close()
+    finally:
+        # Closing ends the read transaction
+        await conn.close()
+
+
+def _logs_etag(version: Any) -> str:
+    """
+    Build the ETag for a pipeline's logs
+    
+    Args:
+        version: Row from SQL_LOGS_VERSION
+        
+    Returns:
+        Quoted ETag value
+    """
+    digest = hashlib.sha1(orjson.dumps(tuple(version))).hexdigest()
+    return f'"{digest}"'
+
+
 @router.get("/{pipeline_id}/logs", response_model=PipelineLogsResponse)
-async def get_pipeline_logs(pipeline_id: int, include_snapshots: bool = False):
+async def get_pipeline_logs(
+    pipeline_id: int,
+    request: Request,
+    response: Response,
+    include_snapshots: bool = False,
+    stream: bool = False
+):
     """
     Retrieve complete execution and repair logs
     
+    Non-streamed responses carry an ETag; a matching If-None-Match
+    returns 304 without reading the logs.
+    
     Args:
         pipeline_id: Pipeline ID
+        request: Incoming request (for If-None-Match)
+        response: Outgoing response (for the ETag header)
         include_snapshots: Include schema snapshots in response
+        stream: Stream records as NDJSON instead of one JSON document
         
     Returns:
         Complete logs
     """
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Get pipeline info
-        cursor.execute("SELECT * FROM Pipelines WHERE id = ?", (pipeline_id,))
-        pipeline = cursor.fetchone()
+        if stream:
+            async with pool.connection() as conn:
+                cursor = await conn.execute(SQL_PIPELINE_EXISTS, (pipeline_id,))
+                exists = await cursor.fetchone()
+            
+            if not exists:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Pipeline with id {pipeline_id} not found"
+                )
+            
+            return StreamingResponse(
+                _stream_pipeline_logs(pipeline_id),
+                media_type="application/x-ndjson"
+            )
         
-        if not pipeline:
-            conn.close()
+        async with pool.connection() as conn:
+            # Log version; also the existence check
+            cursor = await conn.execute(SQL_LOGS_VERSION, (pipeline_id,))
+            version = await cursor.fetchone()
+            
+            if not version:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Pipeline with id {pipeline_id} not found"
+                )
+            
+            etag = _logs_etag(version)
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={"ETag": etag}
+                )
+            
+            # Pipeline info, execution logs, repair logs and final steps
+            cursor = await conn.execute(SQL_LOGS_SNAPSHOT, (pipeline_id,))
+            snapshot = await cursor.fetchone()
+        
+        # A write between the two reads can only make the ETag older than
+        # the body, which costs the client one extra full fetch
+        if not snapshot:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Pipeline with id {pipeline_id} not found"
             )
         
-        # Get execution logs
-        cursor.execute("""
-            SELECT * FROM Execution_Logs 
-            WHERE pipeline_id = ? 
-            ORDER BY run_time
-        """, (pipeline_id,))
-        exec_logs = cursor.fetchall()
-        
-        execution_logs = [
-            ExecutionLog(
-                step_id=log['step_id'],
-                run_time=log['run_time'],
-                is_successful=bool(log['is_successful']),
-                stdout=log['stdout'],
-                stderr=log['stderr'],
-                exit_code=log['exit_code'],
-                execution_time_ms=log['execution_time_ms']
-            )
-            for log in exec_logs
-        ]
-        
-        # Get repair logs
-        cursor.execute("""
-            SELECT * FROM Repair_Logs 
-            WHERE pipeline_id = ? 
-            ORDER BY attempt_number
-        """, (pipeline_id,))
-        rep_logs = cursor.fetchall()
-        
-        repair_logs = [
-            RepairLog(
-                attempt_number=log['attempt_number'],
-                original_error=log['original_error'],
-                ai_fix_reason=log['ai_fix_reason'],
-                repair_successful=bool(log['repair_successful'])
-            )
-            for log in rep_logs
-        ]
-        
-        # Get final pipeline steps
-        cursor.execute("""
-            SELECT * FROM Pipeline_Steps 
-            WHERE pipeline_id = ? 
-            ORDER BY step_number
-        """, (pipeline_id,))
-        steps = cursor.fetchall()
-        
-        final_pipeline = [
-            PipelineStep(
-                step_number=step['step_number'],
-                type=step['code_type'],
-                content=step['script_content']
-            )
-            for step in steps
-        ]
-        
-        conn.close()
+        execution_logs = [ExecutionLog(**log) for log in orjson.loads(snapshot['execution_logs'])]
+        repair_logs = [RepairLog(**log) for log in orjson.loads(snapshot['repair_logs'])]
+        final_pipeline = [PipelineStep(**step) for step in orjson.loads(snapshot['final_pipeline'])]
         
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
         return PipelineLogsResponse(
             success=True,
             pipeline_id=pipeline_id,
-            original_prompt=pipeline['prompt_text'],
+            original_prompt=snapshot['prompt_text'],
             execution_logs=execution_logs,
             repair_logs=repair_logs,
             final_pipeline=final_pipeline,
-            overall_status=pipeline['status']
+            overall_status=snapshot['status']
         )
         
     except HTTPException:
@@ -1,9 +1,11 @@
 """
 Web UI routes for QueryForge
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-import os
+from fastapi.staticfiles import StaticFiles
+from functools import lru_cache
+import gzip
 from pathlib import Path
 
 router = APIRouter()
@@ -12,110 +14,112 @@ router = APIRouter()
 # web.py is at app/api/routes/web.py, so parent.parent.parent gets us to app/
 TEMPLATE_DIR = Path(__file__).parent.parent.parent / "templates"
 
+HOME_TEMPLATE = "home.html"
 
-def read_template(filename: str) -> str:
-    """Read HTML template file"""
-    filepath = TEMPLATE_DIR / filename
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return f.read()
+# Static file server over the templates; used for its conditional request
+# (ETag / Last-Modified -> 304) handling of the home page
+_template_files = StaticFiles(directory=TEMPLATE_DIR, check_dir=False)
 
 
 @router.get("/", response_class=HTMLResponse)
-async def home_page():
-    """Serve home page"""
-    return read_template("home.html")
+async def home_page(request: Request):
+    """Serve home page straight from disk (static, no rendering needed)"""
+    response = await _template_files.get_response(HOME_TEMPLATE, request.scope)
+    # Revalidate on every load so template edits show up, at the cost of a 304
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
-@router.get("/pipeline/{pipeline_id}/view", response_class=HTMLResponse)
-async def pipeline_detail_page(pipeline_id: int):
-    """Serve pipeline detail page"""
-    # For now, return a simple page that uses the API
-    return f"""
+# Pipeline detail page; the page only needs its id, so the markup is split
+# once at import time around the id placeholder instead of re-rendered per request
+_PIPELINE_ID_PLACEHOLDER = "__PIPELINE_ID__"
+
+_PIPELINE_PAGE_TEMPLATE = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Pipeline #{pipeline_id} - QueryForge</title>
+        <title>Pipeline #__PIPELINE_ID__ - QueryForge</title>
         <style>
-            * {{
+            * {
                 margin: 0;
                 padding: 0;
                 box-sizing: border-box;
-            }}
+            }
             
-            body {{
+            body {
                 font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 min-height: 100vh;
                 padding: 20px;
-            }}
+            }
             
-            .container {{
+            .container {
                 max-width: 1200px;
                 margin: 0 auto;
                 background: white;
                 border-radius: 10px;
                 box-shadow: 0 10px 40px rgba(0,0,0,0.1);
                 padding: 40px;
-            }}
+            }
             
-            h1 {{
+            h1 {
                 color: #333;
                 margin-bottom: 20px;
-            }}
+            }
             
-            .back-link {{
+            .back-link {
                 display: inline-block;
                 color: #667eea;
                 text-decoration: none;
                 margin-bottom: 20px;
                 font-weight: 600;
-            }}
+            }
             
-            .back-link:hover {{
+            .back-link:hover {
                 text-decoration: underline;
-            }}
+            }
             
-            .info-section {{
+            .info-section {
                 background: #f8f9fa;
                 padding: 20px;
                 border-radius: 5px;
                 margin-bottom: 20px;
-            }}
+            }
             
-            .info-section strong {{
+            .info-section strong {
                 color: #333;
-            }}
+            }
             
-            .steps-section {{
+            .steps-section {
                 margin-top: 30px;
-            }}
+            }
             
-            .step {{
+            .step {
                 background: #f8f9fa;
                 padding: 15px;
                 border-radius: 5px;
                 margin-bottom: 15px;
                 border-left: 4px solid #667eea;
-            }}
+            }
             
-            .step-header {{
+            .step-header {
                 font-weight: 600;
                 color: #333;
                 margin-bottom: 10px;
-            }}
+            }
             
-            .step-content {{
+            .step-content {
                 font-family: 'Courier New', monospace;
                 background: white;
                 padding: 10px;
                 border-radius: 3px;
                 overflow-x: auto;
                 white-space: pre-wrap;
-            }}
+            }
             
-            .btn {{
+            .btn {
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 color: white;
                 padding: 10px 20px;
@@ -126,59 +130,59 @@ async def pipeline_detail_page(pipeline_id: int):
                 margin-right: 10px;
                 text-decoration: none;
                 display: inline-block;
-            }}
+            }
             
-            .btn:hover {{
+            .btn:hover {
                 transform: translateY(-2px);
-            }}
+            }
             
-            .btn-secondary {{
+            .btn-secondary {
                 background: #6c757d;
-            }}
+            }
             
-            .btn-success {{
+            .btn-success {
                 background: #28a745;
-            }}
+            }
             
-            .btn-danger {{
+            .btn-danger {
                 background: #dc3545;
-            }}
+            }
             
-            .status-badge {{
+            .status-badge {
                 display: inline-block;
                 padding: 6px 15px;
                 border-radius: 12px;
                 font-size: 0.9em;
                 font-weight: 600;
-            }}
+            }
             
-            .status-pending {{
+            .status-pending {
                 background: #e0e0e0;
                 color: #666;
-            }}
+            }
             
-            .status-sandbox_success, .status-success {{
+            .status-sandbox_success, .status-success {
                 background: #d4edda;
                 color: #155724;
-            }}
+            }
             
-            .status-sandbox_failed, .status-failed {{
+            .status-sandbox_failed, .status-failed {
                 background: #f8d7da;
                 color: #721c24;
-            }}
+            }
             
-            .status-committed {{
+            .status-committed {
                 background: #d1ecf1;
                 color: #0c5460;
-            }}
+            }
             
-            .loading {{
+            .loading {
                 text-align: center;
                 padding: 40px;
                 color: #666;
-            }}
+            }
             
-            .spinner {{
+            .spinner {
                 display: inline-block;
                 width: 40px;
                 height: 40px;
@@ -186,18 +190,18 @@ async def pipeline_detail_page(pipeline_id: int):
                 border-radius: 50%;
                 border-top-color: #667eea;
                 animation: spin 1s ease-in-out infinite;
-            }}
+            }
             
-            @keyframes spin {{
-                to {{ transform: rotate(360deg); }}
-            }}
+            @keyframes spin {
+                to { transform: rotate(360deg); }
+            }
         </style>
     </head>
     <body>
         <div class="container">
             <a href="/web/" class="back-link">← Back to Home</a>
             
-            <h1>Pipeline #{pipeline_id}</h1>
+            <h1>Pipeline #__PIPELINE_ID__</h1>
             
             <div id="content">
                 <div class="loading">
@@ -208,21 +212,21 @@ async def pipeline_detail_page(pipeline_id: int):
         </div>
         
         <script>
-            const pipelineId = {pipeline_id};
+            const pipelineId = __PIPELINE_ID__;
             
-            async function loadPipeline() {{
-                try {{
-                    const response = await fetch(`/pipeline/${{pipelineId}}/logs`);
+            async function loadPipeline() {
+                try {
+                    const response = await fetch(`/pipeline/${pipelineId}/logs`);
                     const data = await response.json();
                     
-                    if (data.success) {{
+                    if (data.success) {
                         const content = document.getElementById('content');
                         content.innerHTML = `
                             <div class="info-section">
-                                <p><strong>Prompt:</strong> ${{data.original_prompt}}</p>
-                                <p><strong>Status:</strong> <span class="status-badge status-${{data.overall_status}}">${{data.overall_status}}</span></p>
-                                <p><strong>Execution Logs:</strong> ${{data.execution_logs.length}}</p>
-                                <p><strong>Repair Attempts:</strong> ${{data.repair_logs.length}}</p>
+                                <p><strong>Prompt:</strong> ${data.original_prompt}</p>
+                                <p><strong>Status:</strong> <span class="status-badge status-${data.overall_status}">${data.overall_status}</span></p>
+                                <p><strong>Execution Logs:</strong> ${data.execution_logs.length}</p>
+                                <p><strong>Repair Attempts:</strong> ${data.repair_logs.length}</p>
                             </div>
                             
                             <div style="margin-top: 20px;">
@@ -234,103 +238,123 @@ async def pipeline_detail_page(pipeline_id: int):
                             
                             <div class="steps-section">
                                 <h2>Pipeline Steps</h2>
-                                ${{data.final_pipeline.map((step, idx) => `
+                                ${data.final_pipeline.map((step, idx) => `
                                     <div class="step">
-                                        <div class="step-header">Step ${{step.step_number}}: [${{step.type}}]</div>
-                                        <div class="step-content">${{step.content}}</div>
+                                        <div class="step-header">Step ${step.step_number}: [${step.type}]</div>
+                                        <div class="step-content">${step.content}</div>
                                     </div>
-                                `).join('')}}
+                                `).join('')}
                             </div>
                         `;
-                    }} else {{
+                    } else {
                         document.getElementById('content').innerHTML = `
                             <div class="info-section" style="background: #f8d7da; border: 2px solid #f5c6cb;">
-                                <strong>Error:</strong> ${{data.error || 'Failed to load pipeline'}}
+                                <strong>Error:</strong> ${data.error || 'Failed to load pipeline'}
                             </div>
                         `;
-                    }}
-                }} catch (error) {{
+                    }
+                } catch (error) {
                     document.getElementById('content').innerHTML = `
                         <div class="info-section" style="background: #f8d7da; border: 2px solid #f5c6cb;">
-                            <strong>Error:</strong> ${{error.message}}
+                            <strong>Error:</strong> ${error.message}
                         </div>
                     `;
-                }}
-            }}
+                }
+            }
             
-            async function runPipeline() {{
+            async function runPipeline() {
                 if (!confirm('Run this pipeline in sandbox environment?')) return;
                 
-                try {{
-                    const response = await fetch(`/pipeline/run/${{pipelineId}}`, {{
+                try {
+                    const response = await fetch(`/pipeline/run/${pipelineId}`, {
                         method: 'POST',
-                        headers: {{ 'Content-Type': 'application/json' }},
-                        body: JSON.stringify({{ run_mode: 'sandbox' }})
-                    }});
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ run_mode: 'sandbox' })
+                    });
                     
-                    const data = await response.json();
+                    let data = await response.json();
                     
-                    if (data.success) {{
+                    // Runs execute in the background; poll logs until finished
+                    if (data.success && data.status === 'running') {
+                        data = await waitForRun();
+                    }
+                    
+                    if (data.success) {
                         alert('✓ Pipeline executed successfully!');
                         location.reload();
-                    }} else {{
+                    } else {
                         alert('✗ Execution failed: ' + (data.error || 'Unknown error'));
-                    }}
-                }} catch (error) {{
+                    }
+                } catch (error) {
                     alert('✗ Error: ' + error.message);
-                }}
-            }}
-            
-            async function repairPipeline() {{
+                }
+            }
+            
+            async function waitForRun() {
+                while (true) {
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                    const response = await fetch(`/pipeline/${pipelineId}/logs`);
+                    const logs = await response.json();
+                    
+                    if (logs.overall_status !== 'running') {
+                        return {
+                            success: logs.overall_status === 'success',
+                            error: 'Pipeline status: ' + logs.overall_status
+                        };
+                    }
+                }
+            }
+            
+            async function repairPipeline() {
                 if (!confirm('Attempt automatic repair of this pipeline?')) return;
                 
-                try {{
-                    const response = await fetch(`/pipeline/repair/${{pipelineId}}`, {{
+                try {
+                    const response = await fetch(`/pipeline/repair/${pipelineId}`, {
                         method: 'POST',
-                        headers: {{ 'Content-Type': 'application/json' }},
-                        body: JSON.stringify({{ max_attempts: 3, auto_retry: true }})
-                    }});
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ max_attempts: 3, auto_retry: true })
+                    });
                     
                     const data = await response.json();
                     
-                    if (data.success) {{
-                        alert(`✓ Repair completed! Status: ${{data.current_status}}`);
+                    if (data.success) {
+                        alert(`✓ Repair completed! Status: ${data.current_status}`);
                         location.reload();
-                    }} else {{
+                    } else {
                         alert('✗ Repair failed: ' + (data.error || 'Unknown error'));
-                    }}
-                }} catch (error) {{
+                    }
+                } catch (error) {
                     alert('✗ Error: ' + error.message);
-                }}
-            }}
+                }
+            }
             
-            async function commitPipeline() {{
+            async function commitPipeline() {
                 if (!confirm('Commit this pipeline to production? This will apply all changes to the real database and filesystem.')) return;
                 
-                try {{
-                    const response = await fetch(`/pipeline/commit/${{pipelineId}}`, {{
+                try {
+                    const response = await fetch(`/pipeline/commit/${pipelineId}`, {
                         method: 'POST',
-                        headers: {{ 'Content-Type': 'application/json' }},
-                        body: JSON.stringify({{ force_commit: false, create_backup: true }})
-                    }});
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ force_commit: false, create_backup: true })
+                    });
                     
                     const data = await response.json();
                     
-                    if (data.success) {{
-                        alert(`✓ Pipeline committed successfully! Snapshot ID: ${{data.snapshot_id}}`);
+                    if (data.success) {
+                        alert(`✓ Pipeline committed successfully! Snapshot ID: ${data.snapshot_id}`);
                         location.reload();
-                    }} else {{
+                    } else {
                         alert('✗ Commit failed: ' + (data.error || 'Unknown error'));
-                    }}
-                }} catch (error) {{
+                    }
+                } catch (error) {
                     alert('✗ Error: ' + error.message);
-                }}
-            }}
+                }
+            }
             
-            function viewLogs() {{
+            function viewLogs() {
                 // Open logs in new tab (could be enhanced with a modal)
-                window.open(`/pipeline/${{pipelineId}}/logs`, '_blank');
-            }}
+                window.open(`/pipeline/${pipelineId}/logs`, '_blank');
+            }
             
             // Load pipeline on page load
             loadPipeline();
@@ -338,3 +362,70 @@ async def pipeline_detail_page(pipeline_id: int):
     </body>
     </html>
     """
+
+# Encoded once so requests only join bytes
+_PIPELINE_PAGE_PARTS = [
+    part.encode("utf-8") for part in _PIPELINE_PAGE_TEMPLATE.split(_PIPELINE_ID_PLACEHOLDER)
+]
+
+
+@lru_cache(maxsize=256)
+def _render_pipeline_page(pipeline_id: int) -> bytes:
+    """Render and encode the detail page for one pipeline"""
+    return str(pipeline_id).encode("ascii").join(_PIPELINE_PAGE_PARTS)
+
+
+@lru_cache(maxsize=256)
+def _render_pipeline_page_gzip(pipeline_id: int) -> bytes:
+    """Render the detail page for one pipeline, gzip-compressed"""
+    return gzip.compress(_render_pipeline_page(pipeline_id), compresslevel=9, mtime=0)
+
+
+@lru_cache(maxsize=64)
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Check whether an Accept-Encoding header allows gzip
+
+    An explicit gzip (or x-gzip) entry decides; otherwise a "*" entry
+    does. Entries with q=0 refuse the coding, and entries with a
+    malformed q value are ignored.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+
+    Returns:
+        True if a gzip response is acceptable
+    """
+    wildcard_q = None
+    for entry in accept_encoding.split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is None:
+            continue
+        if coding in ("gzip", "x-gzip"):
+            return q > 0
+        if coding == "*":
+            wildcard_q = q
+    return wildcard_q is not None and wildcard_q > 0
+
+
+@router.get("/pipeline/{pipeline_id}/view", response_class=HTMLResponse)
+async def pipeline_detail_page(pipeline_id: int, request: Request):
+    """Serve pipeline detail page, pre-compressed when the client accepts gzip"""
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        return HTMLResponse(
+            content=_render_pipeline_page_gzip(pipeline_id),
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+    return HTMLResponse(
+        content=_render_pipeline_page(pipeline_id),
+        headers={"Vary": "Accept-Encoding"}
+    )
@@ -2,9 +2,9 @@
 Configuration management for QueryForge application
 """
 import os
-from typing import List
-from pydantic_settings import BaseSettings
-from pydantic import Field
+from typing import FrozenSet, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, field_validator
 
 
 class Settings(BaseSettings):
@@ -18,6 +18,11 @@ class Settings(BaseSettings):
         description="SQLite database file path"
     )
     
+    DATABASE_POOL_SIZE: int = Field(
+        default=4,
+        description="Number of pooled async SQLite connections kept open"
+    )
+    
     # Gemini API configuration
     GEMINI_API_KEY: str = Field(
         default="",
@@ -41,7 +46,17 @@ class Settings(BaseSettings):
     
     GEMINI_RETRY_DELAY_SECONDS: float = Field(
         default=0.5,
-        description="Delay between retry attempts in seconds"
+        description="Base delay between retry attempts in seconds, doubled per attempt"
+    )
+    
+    GEMINI_RETRY_MAX_DELAY_SECONDS: float = Field(
+        default=8.0,
+        description="Upper bound for the exponential backoff between retries"
+    )
+    
+    GEMINI_MAX_CONCURRENCY: int = Field(
+        default=10,
+        description="Maximum concurrent Gemini requests in a batch generation"
     )
     
     GEMINI_MAX_OUTPUT_TOKENS: int = Field(
@@ -49,6 +64,42 @@ class Settings(BaseSettings):
         description="Maximum tokens allowed in Gemini responses"
     )
     
+    # Pipeline generation cache
+    SEMANTIC_CACHE_THRESHOLD: float = Field(
+        default=0.92,
+        description="Minimum prompt similarity (0-1) to reuse a cached pipeline"
+    )
+    
+    SEMANTIC_CACHE_TTL_SECONDS: int = Field(
+        default=3600,
+        description="Lifetime of cached generated pipelines in seconds"
+    )
+    
+    SEMANTIC_CACHE_MAX_ENTRIES: int = Field(
+        default=256,
+        description="Maximum cached pipelines kept per MCP context"
+    )
+    
+    SEMANTIC_CACHE_MAX_CONTEXTS: int = Field(
+        default=64,
+        description="Maximum MCP contexts with cached pipelines"
+    )
+    
+    LLM_CACHE_TTL_SECONDS: int = Field(
+        default=3600,
+        description="Lifetime of cached Gemini responses for identical prompts in seconds"
+    )
+    
+    LLM_CACHE_MAX_ENTRIES: int = Field(
+        default=256,
+        description="Maximum cached Gemini responses (0 disables the cache)"
+    )
+    
+    PIPELINE_LIST_CACHE_TTL_SECONDS: float = Field(
+        default=5.0,
+        description="Lifetime of cached pipeline list pages in seconds"
+    )
+    
     # Directory paths
     DATA_DIRECTORY: str = Field(
         default="./data",
@@ -86,8 +137,23 @@ class Settings(BaseSettings):
         description="Timeout in seconds for each pipeline step execution"
     )
     
+    COMMIT_DB_SNAPSHOTS: bool = Field(
+        default=False,
+        description="Copy the database file with SQLite's backup API before each commit"
+    )
+    
+    SANDBOX_MAX_WORKERS: int = Field(
+        default=4,
+        description="Worker threads for sandbox pipeline runs and repairs"
+    )
+    
+    WORKER_THREADS: int = Field(
+        default=min(64, (os.cpu_count() or 1) * 4),
+        description="AnyIO thread limit for sync dependencies and file responses"
+    )
+    
     # Allowed bash commands (whitelist)
-    ALLOWED_BASH_COMMANDS: List[str] = Field(
+    ALLOWED_BASH_COMMANDS: FrozenSet[str] = Field(
         default=[
             # File operations
             "cat", "cp", "mv", "rm", "touch", "mkdir", "ls", "find",
@@ -105,6 +171,12 @@ class Settings(BaseSettings):
         description="Whitelisted shell commands for sandbox execution"
     )
     
+    @field_validator("ALLOWED_BASH_COMMANDS", mode="after")
+    @classmethod
+    def _freeze_allowed_commands(cls, value):
+        """Store the whitelist as a frozenset for O(1) membership checks"""
+        return frozenset(value)
+    
     # Application settings
     APP_NAME: str = Field(
         default="QueryForge",
@@ -121,11 +193,33 @@ class Settings(BaseSettings):
         description="Debug mode flag"
     )
     
-    class Config:
-        """Pydantic configuration"""
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True
+    # Server settings (used by `python -m app.main`)
+    SERVER_HOST: str = Field(
+        default="127.0.0.1",
+        description="Interface uvicorn binds to"
+    )
+    
+    SERVER_PORT: int = Field(
+        default=8000,
+        description="Port uvicorn listens on"
+    )
+    
+    SERVER_WORKERS: int = Field(
+        default=1,
+        description="uvicorn worker processes; caches are per process"
+    )
+    
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = Field(
+        default=None,
+        description="Maximum concurrent connections per worker before returning 503"
+    )
+    
+    # Pydantic configuration
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True
+    )
 
 
 # Global settings instance
@@ -142,6 +236,21 @@ def get_settings() -> Settings:
     return settings
 
 
+def ensure_directories(*directories: str) -> None:
+    """
+    Create directories that do not exist yet
+    
+    Checks with isdir first so existing directories cost a stat rather
+    than a mkdir attempt.
+    
+    Args:
+        directories: Directory paths to create
+    """
+    for directory in directories:
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+
+
 def validate_configuration() -> bool:
     """
     Validate that all required configuration parameters are set
@@ -159,8 +268,7 @@ def validate_configuration() -> bool:
         )
     
     # Validate directories exist or can be created
-    for directory in [settings.DATA_DIRECTORY, settings.SANDBOX_DIRECTORY]:
-        os.makedirs(directory, exist_ok=True)
+    ensure_directories(settings.DATA_DIRECTORY, settings.SANDBOX_DIRECTORY)
     
     # Validate numeric settings
     if settings.MAX_REPAIR_ATTEMPTS < 1 or settings.MAX_REPAIR_ATTEMPTS > 10:
@@ -1,10 +1,14 @@
 """
 Database connection and schema management
 """
+import asyncio
+import os
 import sqlite3
+import zlib
 import aiosqlite
-from typing import AsyncGenerator
-from contextlib import asynccontextmanager
+import orjson
+from typing import Any, Optional, Union
+from functools import lru_cache
 from app.core.config import settings
 import logging
 
@@ -30,6 +34,7 @@ CREATE TABLE IF NOT EXISTS Pipelines (
 
 CREATE INDEX IF NOT EXISTS idx_pipelines_user_id ON Pipelines(user_id);
 CREATE INDEX IF NOT EXISTS idx_pipelines_status ON Pipelines(status);
+CREATE INDEX IF NOT EXISTS idx_pipelines_created ON Pipelines(created_at DESC, id DESC);
 
 -- Pipeline_Steps table: Individual executable steps within a pipeline
 CREATE TABLE IF NOT EXISTS Pipeline_Steps (
@@ -50,8 +55,8 @@ CREATE INDEX IF NOT EXISTS idx_steps_pipeline ON Pipeline_Steps(pipeline_id);
 CREATE TABLE IF NOT EXISTS Schema_Snapshots (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     pipeline_id INTEGER NOT NULL,
-    db_structure JSON NOT NULL,
-    file_list JSON NOT NULL,
+    db_structure BLOB NOT NULL,
+    file_list BLOB NOT NULL,
     snapshot_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (pipeline_id) REFERENCES Pipelines(id) ON DELETE CASCADE
 );
@@ -73,6 +78,8 @@ CREATE TABLE IF NOT EXISTS Execution_Logs (
 
 CREATE INDEX IF NOT EXISTS idx_execution_pipeline ON Execution_Logs(pipeline_id);
 CREATE INDEX IF NOT EXISTS idx_execution_step ON Execution_Logs(step_id);
+-- Latest-run lookups (repair probe, log listing) by pipeline ordered by time
+CREATE INDEX IF NOT EXISTS idx_execution_pipeline_time ON Execution_Logs(pipeline_id, run_time DESC, is_successful);
 
 -- Repair_Logs table: Tracks automatic repair attempts
 CREATE TABLE IF NOT EXISTS Repair_Logs (
@@ -90,6 +97,9 @@ CREATE TABLE IF NOT EXISTS Repair_Logs (
 );
 
 CREATE INDEX IF NOT EXISTS idx_repair_pipeline ON Repair_Logs(pipeline_id);
+-- Partial index: commit validation counts failed repairs per pipeline
+CREATE INDEX IF NOT EXISTS idx_repair_pipeline_failed ON Repair_Logs(pipeline_id) WHERE repair_successful = 0;
+-- (pipeline_id, attempt_number) ordering is served by the UNIQUE constraint's index
 
 -- Filesystem_Changes table: Tracks filesystem modifications during commit
 CREATE TABLE IF NOT EXISTS Filesystem_Changes (
@@ -111,51 +121,127 @@ CREATE INDEX IF NOT EXISTS idx_filesystem_changes_pipeline ON Filesystem_Changes
 """
 
 
-def get_db_path() -> str:
+# Stored in PRAGMA user_version once SCHEMA_SQL has been applied; bump it
+# whenever SCHEMA_SQL changes so existing databases pick up the new DDL
+SCHEMA_VERSION = 2
+
+# Per-connection tuning: WAL lets readers and the writer proceed
+# concurrently and needs one fsync per commit at NORMAL sync. The services'
+# sqlite3 connections get only the tuning part, since they run pipeline SQL
+# that was validated without foreign key enforcement.
+TUNING_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+)
+
+CONNECTION_PRAGMAS = ("PRAGMA foreign_keys = ON",) + TUNING_PRAGMAS
+
+# Run before closing long-lived or write-heavy connections: re-ANALYZEs
+# only the tables whose statistics the connection's queries found stale,
+# and is a no-op otherwise
+OPTIMIZE_PRAGMA = "PRAGMA optimize"
+
+# Prepared statements kept per connection (sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# zlib level for Schema_Snapshots payloads; low levels already shrink
+# repetitive schema/file JSON several times at little CPU cost
+SNAPSHOT_COMPRESSION_LEVEL = 3
+
+
+@lru_cache(maxsize=8)
+def _db_path_from_url(db_url: str) -> str:
     """
-    Get database file path from configuration
+    Parse a database URL into a file path (memoized per URL)
     
+    Args:
+        db_url: SQLite URL or plain path
+        
     Returns:
         str: Database file path
     """
     # Extract path from SQLite URL (sqlite:///./queryforge.db -> ./queryforge.db)
-    db_url = settings.DATABASE_URL
     if db_url.startswith("sqlite:///"):
         return db_url.replace("sqlite:///", "")
     return db_url
 
 
-def init_database() -> None:
+def get_db_path() -> str:
     """
-    Initialize database schema synchronously
-    Creates all tables and indexes if they don't exist
+    Get database file path from configuration
+    
+    The URL is parsed once and reused; a changed DATABASE_URL setting is
+    still honoured because the cache is keyed on the URL itself.
+    
+    Returns:
+        str: Database file path
     """
-    db_path = get_db_path()
-    logger.info(f"Initializing database at: {db_path}")
+    return _db_path_from_url(settings.DATABASE_URL)
+
+
+def connect_sync(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open a tuned synchronous sqlite3 connection
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Enable foreign key constraints
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        # Execute schema creation
-        cursor.executescript(SCHEMA_SQL)
-        
-        conn.commit()
-        logger.info("Database schema initialized successfully")
+    Used by the services that run on worker threads; applies WAL,
+    NORMAL sync and the cache settings from TUNING_PRAGMAS. The WAL
+    checkpoint is left to SQLite's automatic (passive) checkpointing.
+    
+    Args:
+        db_path: SQLite database path (defaults to get_db_path())
         
-        # Verify tables were created
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        logger.info(f"Created tables: {[t[0] for t in tables]}")
+    Returns:
+        sqlite3.Connection: Configured connection
+    """
+    conn = sqlite3.connect(db_path or get_db_path(), cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in TUNING_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def encode_snapshot(value: Any) -> bytes:
+    """
+    Serialize a Schema_Snapshots payload
+    
+    Args:
+        value: JSON-compatible database or filesystem context
         
-        conn.close()
+    Returns:
+        bytes: zlib-compressed orjson document
+    """
+    return zlib.compress(orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), SNAPSHOT_COMPRESSION_LEVEL)
+
+
+def decode_snapshot(value: Union[bytes, str]) -> Any:
+    """
+    Deserialize a Schema_Snapshots payload
+    
+    Rows written before compression was introduced hold plain JSON text
+    and are still accepted.
+    
+    Args:
+        value: Column value as read from SQLite
         
-    except Exception as e:
-        logger.error(f"Error initializing database: {e}")
-        raise
+    Returns:
+        Decoded context
+    """
+    if isinstance(value, bytes):
+        value = zlib.decompress(value)
+    return orjson.loads(value)
+
+
+def init_database() -> None:
+    """
+    Initialize database schema synchronously
+    Creates all tables and indexes if they don't exist
+    
+    Runs init_database_async to completion, so there is a single DDL path.
+    For scripts and tests only; never call it from a running event loop.
+    """
+    asyncio.run(init_database_async())
 
 
 async def init_database_async() -> None:
@@ -168,53 +254,266 @@ async def init_database_async() -> None:
     
     try:
         async with aiosqlite.connect(db_path) as db:
-            # Enable foreign key constraints
-            await db.execute("PRAGMA foreign_keys = ON")
+            # Enable foreign key constraints and switch the file to WAL
+            for pragma in CONNECTION_PRAGMAS:
+                await db.execute(pragma)
+            
+            cursor = await db.execute("PRAGMA journal_mode")
+            journal_mode = (await cursor.fetchone())[0]
+            
+            # Skip the DDL when the schema is already current
+            cursor = await db.execute("PRAGMA user_version")
+            if (await cursor.fetchone())[0] == SCHEMA_VERSION:
+                logger.info(
+                    f"Database schema is up to date (version {SCHEMA_VERSION}, journal_mode={journal_mode})"
+                )
+                return
             
             # Execute schema creation
             await db.executescript(SCHEMA_SQL)
+            await db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             
             await db.commit()
-            logger.info("Database schema initialized successfully (async)")
+            logger.info(f"Database schema initialized successfully (async, journal_mode={journal_mode})")
             
     except Exception as e:
         logger.error(f"Error initializing database (async): {e}")
         raise
 
 
-@asynccontextmanager
-async def get_db() -> AsyncGenerator[aiosqlite.Connection, None]:
+def get_db() -> "PooledConnection":
     """
     Async context manager for database connections
     
-    Yields:
-        aiosqlite.Connection: Async database connection
+    Borrows a connection from the shared pool instead of opening a new
+    one; it is committed on success and rolled back on error.
+    
+    Returns:
+        PooledConnection: Context manager yielding an aiosqlite.Connection
         
     Usage:
         async with get_db() as db:
             await db.execute("SELECT * FROM Pipelines")
     """
-    db_path = get_db_path()
-    
-    async with aiosqlite.connect(db_path) as db:
-        # Enable foreign key constraints
-        await db.execute("PRAGMA foreign_keys = ON")
-        # Enable row factory for dict-like access
-        db.row_factory = aiosqlite.Row
-        
+    return pool.connection()
+
+
+class PooledConnection:
+    """
+    Async context manager that borrows one connection from a pool
+
+    Written as a plain class rather than with @asynccontextmanager so that
+    entering and leaving does not go through a generator trampoline.
+    """
+
+    __slots__ = ("_pool", "_conn")
+
+    def __init__(self, pool: "ConnectionPool"):
+        self._pool = pool
+        self._conn: Optional[aiosqlite.Connection] = None
+
+    async def __aenter__(self) -> aiosqlite.Connection:
+        self._conn = await self._pool.acquire()
+        return self._conn
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        conn, self._conn = self._conn, None
+        try:
+            if exc_type is None:
+                await conn.commit()
+            else:
+                await conn.rollback()
+        finally:
+            await self._pool.release(conn)
+        return False
+
+
+class ConnectionPool:
+    """
+    Small pool of long-lived aiosqlite connections
+
+    Connections are opened lazily up to ``size`` and handed back to the
+    pool after each use, so request handlers avoid a connect() per call
+    and SQLite's page cache stays warm between requests.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, size: Optional[int] = None):
+        """
+        Initialize connection pool
+
+        Args:
+            db_path: SQLite database path (defaults to get_db_path())
+            size: Maximum number of open connections
+        """
+        self.db_path = db_path
+        self.size = size or settings.DATABASE_POOL_SIZE
+        self._idle: Optional[asyncio.Queue] = None
+        self._connections: list = []
+        # Open connections plus ones being opened; reserved before the
+        # connect() await so concurrent acquires cannot exceed size
+        self._open_count = 0
+
+    async def _create_connection(self) -> aiosqlite.Connection:
+        """
+        Open and configure a new pooled connection
+
+        Returns:
+            aiosqlite.Connection: Configured connection
+        """
+        conn = await aiosqlite.connect(
+            self.db_path or get_db_path(),
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = aiosqlite.Row
+        for pragma in CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        return conn
+
+    async def connect(self) -> aiosqlite.Connection:
+        """
+        Open a connection to the pool's database outside the pool
+
+        For long-lived readers such as response streams, which would
+        otherwise keep a pooled connection away from other requests.
+        The caller must close it.
+
+        Returns:
+            aiosqlite.Connection: Configured connection
+        """
+        return await self._create_connection()
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Whether open() has been called and close() has not
+        """
+        return self._idle is not None
+
+    def serves(self, db_path: str) -> bool:
+        """
+        Check whether the pool is open on the given database file
+
+        Args:
+            db_path: SQLite database path
+
+        Returns:
+            True if connections from this pool point at db_path
+        """
+        return self.is_open and os.path.abspath(db_path) == os.path.abspath(self.db_path or get_db_path())
+
+    async def open(self) -> None:
+        """
+        Prepare the pool for use (connections are created on demand)
+        """
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+
+    async def acquire(self) -> aiosqlite.Connection:
+        """
+        Take an idle connection or open a new one while under capacity
+
+        Callers must hand the connection back with release(); prefer
+        connection(), which does so automatically.
+
+        Returns:
+            aiosqlite.Connection: Pooled database connection
+        """
+        await self.open()
+        if self._idle.empty() and self._open_count < self.size:
+            self._open_count += 1
+            try:
+                conn = await self._create_connection()
+            except BaseException:
+                self._open_count -= 1
+                raise
+            self._connections.append(conn)
+            return conn
+        return await self._idle.get()
+
+    async def release(self, conn: aiosqlite.Connection) -> None:
+        """
+        Return a connection taken with acquire() to the pool
+
+        If the pool was closed while the connection was borrowed, the
+        connection is closed instead.
+
+        Args:
+            conn: Connection to return
+        """
+        if self._idle is not None:
+            self._idle.put_nowait(conn)
+            return
+
+        if conn in self._connections:
+            self._connections.remove(conn)
+            self._open_count -= 1
         try:
-            yield db
+            await conn.close()
         except Exception as e:
-            logger.error(f"Database error: {e}")
-            await db.rollback()
-            raise
-        else:
-            await db.commit()
+            logger.warning(f"Error closing pooled connection: {e}")
+
+    def connection(self) -> PooledConnection:
+        """
+        Borrow a connection from the pool
+
+        Commits on success and rolls back on error before the connection
+        is returned to the pool.
+
+        Returns:
+            PooledConnection: Context manager yielding the connection
+
+        Usage:
+            async with pool.connection() as conn:
+                cursor = await conn.execute("SELECT id FROM Pipelines")
+        """
+        return PooledConnection(self)
+
+    async def close(self) -> None:
+        """
+        Close the pool's idle connections
+
+        Each connection runs PRAGMA optimize first so planner statistics
+        are refreshed at shutdown. Connections still borrowed are closed
+        by release() when they come back.
+        """
+        idle = []
+        if self._idle is not None:
+            while not self._idle.empty():
+                idle.append(self._idle.get_nowait())
+        self._idle = None
+
+        for conn in idle:
+            try:
+                await conn.execute(OPTIMIZE_PRAGMA)
+            except Exception as e:
+                logger.warning(f"PRAGMA optimize failed on pooled connection: {e}")
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.warning(f"Error closing pooled connection: {e}")
+            self._connections.remove(conn)
+            self._open_count -= 1
+
+
+# Shared pool used by the API layer; opened and closed in the app lifespan
+pool = ConnectionPool()
+
+
+REQUIRED_TABLES = ('Pipelines', 'Pipeline_Steps', 'Schema_Snapshots',
+                   'Execution_Logs', 'Repair_Logs', 'Filesystem_Changes')
+
+REQUIRED_INDEXES = ('idx_pipelines_user_id', 'idx_pipelines_status', 'idx_pipelines_created',
+                    'idx_steps_pipeline', 'idx_execution_pipeline', 'idx_execution_step',
+                    'idx_execution_pipeline_time', 'idx_repair_pipeline',
+                    'idx_repair_pipeline_failed', 'idx_filesystem_changes_pipeline')
 
 
 def verify_schema() -> bool:
     """
-    Verify database schema integrity
+    Verify database schema integrity synchronously
+    
+    Runs verify_schema_async on a short-lived connection. For scripts and
+    tests only; never call it from a running event loop.
     
     Returns:
         bool: True if schema is valid
@@ -222,25 +521,43 @@ def verify_schema() -> bool:
     Raises:
         ValueError: If schema is invalid
     """
-    db_path = get_db_path()
+    async def _verify() -> bool:
+        async with aiosqlite.connect(get_db_path()) as db:
+            return await verify_schema_async(db)
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+    return asyncio.run(_verify())
+
+
+async def verify_schema_async(db: aiosqlite.Connection) -> bool:
+    """
+    Verify database schema integrity on an open async connection
+    
+    Args:
+        db: Connection to check, typically borrowed from the pool
         
-        # Check for required tables
-        required_tables = ['Pipelines', 'Pipeline_Steps', 'Schema_Snapshots', 
-                          'Execution_Logs', 'Repair_Logs', 'Filesystem_Changes']
+    Returns:
+        bool: True if schema is valid
         
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        existing_tables = [row[0] for row in cursor.fetchall()]
+    Raises:
+        ValueError: If schema is invalid
+    """
+    try:
+        # Tables and indexes in a single sqlite_master scan
+        rows = await db.execute_fetchall(
+            "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'index')"
+        )
+        existing_tables = {row[0] for row in rows if row[1] == 'table'}
+        existing_indexes = {row[0] for row in rows if row[1] == 'index'}
         
-        missing_tables = set(required_tables) - set(existing_tables)
+        missing_tables = set(REQUIRED_TABLES) - existing_tables
         if missing_tables:
             raise ValueError(f"Missing required tables: {missing_tables}")
         
+        missing_indexes = set(REQUIRED_INDEXES) - existing_indexes
+        if missing_indexes:
+            raise ValueError(f"Missing required indexes: {missing_indexes}")
+        
         logger.info("Database schema verification successful")
-        conn.close()
         return True
         
     except Exception as e:
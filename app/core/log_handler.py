@@ -0,0 +1,78 @@
+"""
+JSON line logging for the QueryForge application
+
+Each record is written as one orjson-encoded line with the raw epoch
+timestamp, leaving time formatting to whatever consumes the logs.
+"""
+import logging
+import sys
+from typing import IO, Optional
+
+import orjson
+
+_exception_formatter = logging.Formatter()
+
+
+class JSONLogHandler(logging.Handler):
+    """
+    Logging handler that writes records as JSON lines
+
+    Fields are ``ts`` (record.created), ``lvl``, ``name`` and ``msg``, plus
+    ``exc`` when the record carries exception info.
+    """
+
+    def __init__(self, stream: Optional[IO] = None):
+        """
+        Initialize handler
+
+        Args:
+            stream: Text stream to write to; defaults to sys.stderr
+        """
+        super().__init__()
+        self.stream = stream if stream is not None else sys.stderr
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            entry = {
+                "ts": record.created,
+                "lvl": record.levelname,
+                "name": record.name,
+                "msg": record.getMessage()
+            }
+            if record.exc_info:
+                entry["exc"] = _exception_formatter.formatException(record.exc_info)
+            line = orjson.dumps(entry) + b"\n"
+
+            buffer = getattr(self.stream, "buffer", None)
+            if buffer is not None:
+                self.stream.flush()
+                buffer.write(line)
+                buffer.flush()
+            else:
+                self.stream.write(line.decode("utf-8"))
+                self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    Install the JSON handler on the root logger
+
+    Like logging.basicConfig, does nothing to the handlers if the root
+    logger is already configured.
+
+    Args:
+        level: Root logger level
+    """
+    root = logging.getLogger()
+    root.setLevel(level)
+    if not root.handlers:
+        root.addHandler(JSONLogHandler())
+
+
+# Export functions
+__all__ = [
+    'JSONLogHandler',
+    'configure_logging'
+]
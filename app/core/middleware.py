@@ -0,0 +1,179 @@
+"""
+Pure ASGI middleware for the QueryForge application
+
+Written against the raw ASGI interface instead of BaseHTTPMiddleware or
+exception handlers so that requests which succeed pay only for one extra
+coroutine call.
+"""
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+_JSON_HEADERS = [(b"content-type", b"application/json")]
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Static leading part of each error body; details and timestamp are appended
+_VALIDATION_ERROR_PREFIX = orjson.dumps({
+    "error": "Validation error",
+    "error_code": "VALIDATION_ERROR"
+})[:-1]
+_INTERNAL_ERROR_PREFIX = orjson.dumps({
+    "error": "Internal server error",
+    "error_code": "INTERNAL_ERROR"
+})[:-1]
+_INTERNAL_ERROR_DETAILS = orjson.dumps("An unexpected error occurred")
+
+# Origin-independent part of every preflight answer
+_PREFLIGHT_HEADERS = [
+    (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    (b"access-control-max-age", b"86400"),
+]
+
+
+def _error_body(prefix: bytes, details: bytes) -> bytes:
+    """
+    Complete a pre-serialized error body
+
+    Args:
+        prefix: Serialized static fields without the closing brace
+        details: Serialized details value
+
+    Returns:
+        JSON body bytes
+    """
+    timestamp = time.strftime(_TIMESTAMP_FORMAT, time.gmtime())
+    return b"".join((
+        prefix,
+        b',"details":', details,
+        b',"timestamp":"', timestamp.encode("ascii"), b'"}'
+    ))
+
+
+class ErrorASGIMiddleware:
+    """
+    Turn unhandled exceptions into JSON error responses
+
+    ValueError becomes a 400 VALIDATION_ERROR and any other exception a 500
+    INTERNAL_ERROR; exception details are only exposed in debug mode.
+    Exceptions raised after the response has started are re-raised since
+    a new response can no longer be sent.
+    """
+
+    def __init__(self, app: ASGIApp, debug: bool = False):
+        """
+        Initialize middleware
+
+        Args:
+            app: Wrapped ASGI application
+            debug: Include exception text in 500 responses
+        """
+        self.app = app
+        self.debug = debug
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            if response_started:
+                raise
+
+            if isinstance(exc, ValueError):
+                status_code = 400
+                body = _error_body(_VALIDATION_ERROR_PREFIX, orjson.dumps(str(exc)))
+            else:
+                logger.exception("Unhandled exception: %s", exc)
+                status_code = 500
+                details = orjson.dumps(str(exc)) if self.debug else _INTERNAL_ERROR_DETAILS
+                body = _error_body(_INTERNAL_ERROR_PREFIX, details)
+
+            await send({
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": _JSON_HEADERS + [(b"content-length", str(len(body)).encode("ascii"))]
+            })
+            await send({"type": "http.response.body", "body": body})
+
+
+class DevCORSMiddleware:
+    """
+    Permissive CORS for local development
+
+    Allows any origin, method and header with credentials, echoing the
+    request Origin; preflight requests get an immediate 204 built from
+    pre-encoded headers and never reach the application.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize middleware
+
+        Args:
+            app: Wrapped ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+                break
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers: List[Tuple[bytes, bytes]] = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+        if scope["method"] == "OPTIONS":
+            request_headers = dict(scope["headers"])
+            if b"access-control-request-method" in request_headers:
+                preflight_headers = cors_headers + _PREFLIGHT_HEADERS
+                requested_headers = request_headers.get(b"access-control-request-headers")
+                if requested_headers:
+                    preflight_headers.append((b"access-control-allow-headers", requested_headers))
+                await send({"type": "http.response.start", "status": 204, "headers": preflight_headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Export classes
+__all__ = [
+    'ErrorASGIMiddleware',
+    'DevCORSMiddleware'
+]
@@ -0,0 +1,160 @@
+"""
+Response classes shared by the API routers
+"""
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.exceptions import HTTPException
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+
+    Defined here rather than imported from FastAPI, whose ORJSONResponse
+    is deprecated in recent releases.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        """
+        Serialize response content
+
+        Args:
+            content: JSON-compatible content
+
+        Returns:
+            UTF-8 encoded JSON bytes
+        """
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def http_exception_handler(request: Request, exc: HTTPException) -> Response:
+    """
+    Render HTTPException with orjson
+
+    Same body and headers as FastAPI's default handler, which always uses
+    the stdlib-json JSONResponse regardless of default_response_class.
+
+    Args:
+        request: Incoming request
+        exc: Raised HTTP exception
+
+    Returns:
+        Error response
+    """
+    headers = getattr(exc, "headers", None)
+    if not is_body_allowed_for_status_code(exc.status_code):
+        return Response(status_code=exc.status_code, headers=headers)
+    return ORJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+
+async def validation_exception_handler(request: Request, exc: RequestValidationError) -> Response:
+    """
+    Render request validation errors with orjson
+
+    Args:
+        request: Incoming request
+        exc: Validation error raised while parsing the request
+
+    Returns:
+        422 response listing the validation errors
+    """
+    return ORJSONResponse({"detail": jsonable_encoder(exc.errors())}, status_code=422)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag
+
+    Args:
+        if_none_match: Raw header value
+        etag: Current ETag
+
+    Returns:
+        True if the client copy is current
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates or "*" in candidates
+
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class StaticJSONEndpoint:
+    """
+    Raw ASGI endpoint serving one fixed JSON body
+
+    Status line, headers, body and ETag are built once; a request only
+    compares If-None-Match and makes two send() calls. Registered with
+    add_route, which hands ASGI callables the scope directly instead of
+    wrapping them in FastAPI's request/response machinery.
+    """
+
+    def __init__(self, body: bytes):
+        """
+        Initialize endpoint
+
+        Args:
+            body: Serialized JSON body
+        """
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        etag_header = (b"etag", self.etag.encode("ascii"))
+        # Tuples, copied into a fresh list per response: middleware may
+        # append to message["headers"] in place (MutableHeaders)
+        self._ok_headers = (
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            etag_header
+        )
+        self._not_modified_headers = (etag_header,)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Send) -> None:
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        if etag_matches(if_none_match, self.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": list(self._not_modified_headers)})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({"type": "http.response.start", "status": 200, "headers": list(self._ok_headers)})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class StaticRedirectEndpoint:
+    """
+    Raw ASGI endpoint answering every request with the same redirect
+    """
+
+    def __init__(self, location: str, status_code: int = 307):
+        """
+        Initialize endpoint
+
+        Args:
+            location: Redirect target
+            status_code: Redirect status code
+        """
+        self.status_code = status_code
+        # Copied per response, see StaticJSONEndpoint
+        self._headers = (
+            (b"location", location.encode("latin-1")),
+            (b"content-length", b"0")
+        )
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": list(self._headers)})
+        await send({"type": "http.response.body", "body": b""})
@@ -1,26 +1,119 @@
 """
 FastAPI application entry point for QueryForge
 """
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import anyio.to_thread
 import logging
-import traceback
-
-from app.core.config import settings
-from app.core.database import init_database_async, verify_schema
+import os
+import shutil
+import orjson
+from typing import Any, Awaitable
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.core.config import settings, ensure_directories
+from app.core.log_handler import configure_logging
+from app.core.database import init_database_async, verify_schema_async, pool
+from app.core.responses import (
+    ORJSONResponse,
+    StaticJSONEndpoint,
+    StaticRedirectEndpoint,
+    http_exception_handler,
+    validation_exception_handler
+)
+from app.core.middleware import ErrorASGIMiddleware, DevCORSMiddleware
 from app.api.routes import pipeline, web
+from app.api.dependencies import get_mcp_manager, get_llm_service, get_sandbox_executor
 
 # Configure logging
-logging.basicConfig(
-    level=logging.DEBUG if settings.DEBUG else logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging(logging.DEBUG if settings.DEBUG else logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _clean_sandbox(sandbox_directory: str) -> bool:
+    """
+    Remove everything inside the sandbox directory but keep the directory
+    
+    Entries are classified from the cached scandir type information, and
+    multiple subtrees are removed in parallel since rmtree is I/O bound.
+    
+    Args:
+        sandbox_directory: Sandbox root path
+        
+    Returns:
+        True if the directory existed and was cleaned
+    """
+    try:
+        scanner = os.scandir(sandbox_directory)
+    except FileNotFoundError:
+        return False
+    
+    subtrees = []
+    with scanner:
+        for entry in scanner:
+            if entry.is_dir(follow_symlinks=False):
+                subtrees.append(entry.path)
+            else:
+                os.unlink(entry.path)
+    
+    if len(subtrees) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(subtrees), os.cpu_count() or 1)) as cleaner:
+            list(cleaner.map(shutil.rmtree, subtrees))
+    elif subtrees:
+        shutil.rmtree(subtrees[0])
+    return True
+
+
+async def _run_concurrently(*aws: Awaitable[Any]) -> None:
+    """
+    Await several coroutines concurrently, failing fast
+    
+    The first exception cancels the remaining tasks and is re-raised once
+    they have finished (asyncio.TaskGroup needs Python 3.11).
+    
+    Args:
+        aws: Coroutines or awaitables to run
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _verify_database_schema() -> None:
+    """
+    Verify the database schema on a pooled connection
+    """
+    async with pool.connection() as db:
+        await verify_schema_async(db)
+
+
+async def _prepare_database() -> None:
+    """
+    Initialize the database, open the pool and run the schema checks
+    
+    Verification and query selection read the schema independently, so
+    they run concurrently once the schema exists.
+    """
+    await init_database_async()
+    logger.info("Database initialized successfully")
+    
+    await pool.open()
+    logger.info("Database connection pool ready")
+    
+    await _run_concurrently(
+        _verify_database_schema(),
+        pipeline.configure_schema_queries()
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -31,19 +124,29 @@ async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     
     try:
-        # Initialize database
-        await init_database_async()
-        logger.info("Database initialized successfully")
+        # Starlette's run_in_threadpool (sync dependencies, StaticFiles)
+        # goes through AnyIO's limiter rather than asyncio's executors
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.WORKER_THREADS
         
-        # Verify schema
-        verify_schema()
-        logger.info("Database schema verified")
+        # Database setup and directory creation overlap; the first failure
+        # cancels whatever is still running
+        await _run_concurrently(
+            _prepare_database(),
+            asyncio.to_thread(
+                ensure_directories, settings.DATA_DIRECTORY, settings.SANDBOX_DIRECTORY
+            )
+        )
+        logger.info("Startup checks complete")
         
-        # Create necessary directories
-        import os
-        os.makedirs(settings.DATA_DIRECTORY, exist_ok=True)
-        os.makedirs(settings.SANDBOX_DIRECTORY, exist_ok=True)
-        logger.info("Required directories created/verified")
+        # Build shared services once so the first request does not pay for it
+        get_mcp_manager()
+        try:
+            get_llm_service()
+        except ValueError as e:
+            logger.warning(f"LLM service unavailable: {e}")
+        
+        # Build the OpenAPI schema now instead of on the first /docs request
+        app.openapi()
         
         logger.info(f"{settings.APP_NAME} startup complete")
         
@@ -56,17 +159,15 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info(f"Shutting down {settings.APP_NAME}")
     
+    await pool.close()
+    
+    # Stop accepting sandbox runs before the sandbox is emptied
+    get_sandbox_executor().shutdown(wait=False)
+    get_sandbox_executor.cache_clear()
+    
     # Cleanup sandbox directory
-    import shutil
     try:
-        if os.path.exists(settings.SANDBOX_DIRECTORY):
-            # Clear sandbox but keep directory
-            for item in os.listdir(settings.SANDBOX_DIRECTORY):
-                item_path = os.path.join(settings.SANDBOX_DIRECTORY, item)
-                if os.path.isfile(item_path):
-                    os.unlink(item_path)
-                elif os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
+        if await asyncio.to_thread(_clean_sandbox, settings.SANDBOX_DIRECTORY):
             logger.info("Sandbox directory cleaned")
     except Exception as e:
         logger.warning(f"Error cleaning sandbox: {e}")
@@ -79,82 +180,61 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Automated Data Pipeline Generation System",
+    default_response_class=ORJSONResponse,
+    swagger_ui_parameters={"defaultModelsExpandDepth": -1},
     lifespan=lifespan
 )
 
-# Configure CORS middleware for development
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"] if settings.DEBUG else [],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Render 4xx error bodies with orjson like every other JSON response
+app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+app.add_exception_handler(RequestValidationError, validation_exception_handler)
 
+# Convert unhandled exceptions into JSON error responses
+app.add_middleware(ErrorASGIMiddleware, debug=settings.DEBUG)
 
-# Global exception handlers
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    """
-    Global exception handler for unhandled exceptions
-    """
-    logger.error(f"Unhandled exception: {exc}")
-    logger.error(traceback.format_exc())
-    
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
-            "error": "Internal server error",
-            "error_code": "INTERNAL_ERROR",
-            "details": str(exc) if settings.DEBUG else "An unexpected error occurred",
-            "timestamp": logging.Formatter().formatTime(logging.makeLogRecord({}), datefmt="%Y-%m-%dT%H:%M:%SZ")
-        }
-    )
+# Configure CORS middleware for development; production is same-origin, so
+# the middleware is left out entirely rather than added with no origins
+if settings.DEBUG:
+    app.add_middleware(DevCORSMiddleware)
 
 
-@app.exception_handler(ValueError)
-async def value_error_handler(request: Request, exc: ValueError):
-    """
-    Handle validation errors
-    """
-    return JSONResponse(
-        status_code=status.HTTP_400_BAD_REQUEST,
-        content={
-            "error": "Validation error",
-            "error_code": "VALIDATION_ERROR",
-            "details": str(exc),
-            "timestamp": logging.Formatter().formatTime(logging.makeLogRecord({}), datefmt="%Y-%m-%dT%H:%M:%SZ")
-        }
-    )
+# Health payload depends only on settings, so the whole response is built
+# once and served by a raw ASGI endpoint (conditional on its ETag)
+health_check = StaticJSONEndpoint(orjson.dumps({
+    "status": "healthy",
+    "application": settings.APP_NAME,
+    "version": settings.APP_VERSION,
+    "database": "connected",
+    "data_directory": settings.DATA_DIRECTORY,
+    "sandbox_directory": settings.SANDBOX_DIRECTORY
+}))
+app.add_route("/health", health_check, methods=["GET"], include_in_schema=False)
 
+# Redirect root to web UI; a fixed 307 with pre-encoded headers
+root_redirect = StaticRedirectEndpoint("/web/")
+app.add_route("/", root_redirect, methods=["GET"], include_in_schema=False)
 
-# Health check endpoint
-@app.get("/health", tags=["Health"])
-async def health_check():
-    """
-    Health check endpoint
-    
-    Returns application status and configuration summary
-    """
-    return {
-        "status": "healthy",
-        "application": settings.APP_NAME,
-        "version": settings.APP_VERSION,
-        "database": "connected",
-        "data_directory": settings.DATA_DIRECTORY,
-        "sandbox_directory": settings.SANDBOX_DIRECTORY
-    }
-
-
-@app.get("/", tags=["Root"], include_in_schema=False)
-async def root_redirect():
-    """
-    Redirect root to web UI
-    """
-    from fastapi.responses import RedirectResponse
-    return RedirectResponse(url="/web/")
 
+# Mount the web UI router as-is; it is hidden from OpenAPI, so there is
+# nothing to gain from copying its routes into the app
+app.mount("/web", web.router)
 
 # Include API routers
-app.include_router(web.router, prefix="/web", tags=["Web UI"], include_in_schema=False)
 app.include_router(pipeline.router, prefix="/pipeline", tags=["Pipeline"])
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    # uvloop and httptools ship with uvicorn[standard]; requesting them
+    # explicitly fails loudly instead of silently falling back to asyncio
+    uvicorn.run(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=settings.SERVER_WORKERS,
+        loop="uvloop",
+        http="httptools",
+        interface="asgi3",
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY
+    )
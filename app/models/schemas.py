@@ -2,7 +2,7 @@
 Pydantic models for QueryForge API
 """
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
@@ -13,25 +13,28 @@ class PipelineCreateRequest(BaseModel):
     user_id: int = Field(..., description="User identifier", ge=1)
     prompt: str = Field(..., description="Natural language task description", min_length=1)
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "user_id": 1,
-                "prompt": "Import inventory.json into products table"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "user_id": 1,
+            "prompt": "Import inventory.json into products table"
         }
+    })
 
 
 class PipelineRunRequest(BaseModel):
     """Request model for running a pipeline"""
     run_mode: str = Field(default="sandbox", description="Execution mode: sandbox or production")
+    wait_for_completion: bool = Field(
+        default=False,
+        description="Block until the run finishes instead of running in the background"
+    )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "run_mode": "sandbox"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "run_mode": "sandbox",
+            "wait_for_completion": False
         }
+    })
 
 
 class PipelineRepairRequest(BaseModel):
@@ -39,13 +42,12 @@ class PipelineRepairRequest(BaseModel):
     max_attempts: int = Field(default=3, description="Maximum repair attempts", ge=1, le=5)
     auto_retry: bool = Field(default=True, description="Automatically retry after repair")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "max_attempts": 3,
-                "auto_retry": True
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "max_attempts": 3,
+            "auto_retry": True
         }
+    })
 
 
 class PipelineCommitRequest(BaseModel):
@@ -53,13 +55,12 @@ class PipelineCommitRequest(BaseModel):
     force_commit: bool = Field(default=False, description="Bypass high-risk warnings")
     create_backup: bool = Field(default=True, description="Create pre-commit backup")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "force_commit": False,
-                "create_backup": True
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "force_commit": False,
+            "create_backup": True
         }
+    })
 
 
 # Response Models
@@ -70,6 +71,15 @@ class PipelineStep(BaseModel):
     type: str = Field(..., description="Step type: bash or sql")
     content: str = Field(..., description="Executable script content")
     description: Optional[str] = Field(None, description="Step description")
+    
+    model_config = ConfigDict(frozen=True)
+
+
+class ContextSummary(BaseModel):
+    """Summary of MCP context used"""
+    tables_referenced: List[str] = Field(default_factory=list)
+    files_referenced: List[str] = Field(default_factory=list)
+    total_steps: int = 0
 
 
 class PipelineCreateResponse(BaseModel):
@@ -84,24 +94,24 @@ class PipelineCreateResponse(BaseModel):
     error: Optional[str] = Field(None, description="Error message if failed")
     error_type: Optional[str] = Field(None, description="Error type classification")
     validation_errors: Optional[List[Any]] = Field(None, description="Validation error details")
+    cache_hit: bool = Field(False, description="Pipeline was served from the semantic cache")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "pipeline_id": 42,
-                "status": "generated",
-                "draft_pipeline": [
-                    {
-                        "step_number": 1,
-                        "type": "bash",
-                        "content": "awk -F',' '$3!=\"\" {print}' data/sales.csv > /tmp/cleaned.csv",
-                        "description": "Filter rows with non-empty amounts"
-                    }
-                ],
-                "created_at": "2025-11-24T10:30:00Z"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "success": True,
+            "pipeline_id": 42,
+            "status": "generated",
+            "draft_pipeline": [
+                {
+                    "step_number": 1,
+                    "type": "bash",
+                    "content": "awk -F',' '$3!=\"\" {print}' data/sales.csv > /tmp/cleaned.csv",
+                    "description": "Filter rows with non-empty amounts"
+                }
+            ],
+            "created_at": "2025-11-24T10:30:00Z"
         }
+    })
 
 
 class SynthesisResult(BaseModel):
@@ -118,6 +128,8 @@ class ExecutionStepLog(BaseModel):
     exit_code: int
     stdout: Optional[str] = None
     stderr: Optional[str] = None
+    
+    model_config = ConfigDict(frozen=True)
 
 
 class PipelineRunResponse(BaseModel):
@@ -137,6 +149,8 @@ class RepairLog(BaseModel):
     original_error: str
     ai_fix_reason: str
     repair_successful: bool
+    
+    model_config = ConfigDict(frozen=True)
 
 
 class PipelineRepairResponse(BaseModel):
@@ -149,13 +163,6 @@ class PipelineRepairResponse(BaseModel):
     error: Optional[str] = None
 
 
-class ContextSummary(BaseModel):
-    """Summary of MCP context used"""
-    tables_referenced: List[str] = Field(default_factory=list)
-    files_referenced: List[str] = Field(default_factory=list)
-    total_steps: int = 0
-
-
 class PipelineCommitResponse(BaseModel):
     """Response model for pipeline commit"""
     success: bool
@@ -167,21 +174,20 @@ class PipelineCommitResponse(BaseModel):
     rollback_available: bool = False
     error: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "pipeline_id": 42,
-                "commit_status": "committed",
-                "snapshot_id": 15,
-                "operations_performed": {
-                    "sql_operations": 2,
-                    "file_operations": 1
-                },
-                "commit_time": "2025-11-27T10:32:00Z",
-                "rollback_available": True
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "success": True,
+            "pipeline_id": 42,
+            "commit_status": "committed",
+            "snapshot_id": 15,
+            "operations_performed": {
+                "sql_operations": 2,
+                "file_operations": 1
+            },
+            "commit_time": "2025-11-27T10:32:00Z",
+            "rollback_available": True
         }
+    })
 
 
 class ExecutionLog(BaseModel):
@@ -193,6 +199,8 @@ class ExecutionLog(BaseModel):
     stderr: Optional[str] = None
     exit_code: Optional[int] = None
     execution_time_ms: Optional[int] = None
+    
+    model_config = ConfigDict(frozen=True)
 
 
 class PipelineLogsResponse(BaseModel):
@@ -0,0 +1,408 @@
+"""
+Cache Module
+In-process caches: a TTL cache for hot read endpoints, an exact-match
+cache of LLM responses and a semantic cache that reuses generated
+pipelines for near-duplicate prompts
+"""
+import re
+import json
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+# Quoted strings, negated contractions, dotted names (file names, paths,
+# decimals), comparison operators and words
+_LITERAL_PATTERN = re.compile(
+    r"'[^']*'|\"[^\"]*\"|`[^`]*`|\w+n't\b|[\w/.-]*\w\.\w+|==|!=|<>|<=|>=|[=<>]|\w+"
+)
+_NEGATION_WORDS = frozenset({"not", "no", "never", "without", "except"})
+_OPERATOR_ALIASES = {"==": "=", "<>": "!="}
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries expire after a fixed lifetime
+    """
+
+    def __init__(self, maxsize: int = 128, ttl_seconds: float = 5.0):
+        """
+        Initialize TTL cache
+
+        Args:
+            maxsize: Maximum number of entries
+            ttl_seconds: Entry lifetime in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        Return a live cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry when full
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop all cached entries
+        """
+        self._entries.clear()
+
+
+class LLMCache:
+    """
+    Exact-match cache of LLM responses
+
+    Keys cover the model, the output token limit and the full prompt, so a
+    hit is only served for a request that would be sent to the API
+    unchanged. Only successful responses are stored. Clients call it from
+    worker threads, so access is serialized with a lock.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        """
+        Initialize LLM response cache
+
+        Args:
+            max_entries: Maximum cached responses (0 disables caching)
+            ttl_seconds: Entry lifetime in seconds
+        """
+        self.max_entries = max_entries if max_entries is not None else settings.LLM_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LLM_CACHE_TTL_SECONDS
+        self._cache = TTLCache(maxsize=self.max_entries, ttl_seconds=self.ttl_seconds)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(model_name: str, max_output_tokens: int, prompt: str) -> str:
+        """
+        Build the cache key for a request
+
+        Args:
+            model_name: Model the prompt is sent to
+            max_output_tokens: Output token limit of the request
+            prompt: Complete prompt
+
+        Returns:
+            Hex SHA-256 digest of the request parameters
+        """
+        payload = json.dumps(
+            {"model": model_name, "max_output_tokens": max_output_tokens, "prompt": prompt},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return a cached response
+
+        Args:
+            key: Key from cache_key()
+
+        Returns:
+            Response text, or None on miss
+        """
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Cache a response
+
+        Args:
+            key: Key from cache_key()
+            response: Response text
+        """
+        if self.max_entries > 0:
+            with self._lock:
+                self._cache.set(key, response)
+
+    def clear(self) -> None:
+        """
+        Drop all cached responses
+        """
+        with self._lock:
+            self._cache.clear()
+
+
+def context_fingerprint(mcp_context: Dict[str, Any]) -> str:
+    """
+    Hash the parts of an MCP context that influence generation
+
+    The volatile ``metadata`` block and scan timestamps are excluded so
+    that identical schemas and files always produce the same hash.
+
+    Args:
+        mcp_context: Context from MCPContextManager
+
+    Returns:
+        Hex SHA-256 digest of the context
+    """
+    stable = {key: value for key, value in mcp_context.items() if key != "metadata"}
+    if isinstance(stable.get("filesystem"), dict):
+        stable["filesystem"] = {
+            key: value for key, value in stable["filesystem"].items() if key != "scan_timestamp"
+        }
+    payload = json.dumps(stable, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def embed_text(text: str) -> Dict[str, float]:
+    """
+    Build a normalized sparse term vector for a prompt
+
+    Uses word tokens plus character trigrams so that rewordings and small
+    spelling differences still land close together.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Mapping of feature -> weight with unit L2 norm
+    """
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    features = Counter(tokens)
+    for token in tokens:
+        padded = f"#{token}#"
+        features.update(f"3:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+
+    norm = math.sqrt(sum(weight * weight for weight in features.values()))
+    if not norm:
+        return {}
+    return {feature: weight / norm for feature, weight in features.items()}
+
+
+def context_identifiers(mcp_context: Dict[str, Any]) -> frozenset:
+    """
+    Collect the table, column and file names of an MCP context
+
+    Args:
+        mcp_context: Context from MCPContextManager
+
+    Returns:
+        Lowercased names
+    """
+    names = set()
+    for table in mcp_context.get("database", {}).get("tables", []):
+        names.add(str(table.get("name", "")).lower())
+        names.update(str(column.get("name", "")).lower() for column in table.get("columns", []))
+    for file in mcp_context.get("filesystem", {}).get("files", []):
+        path = str(file.get("path", "")).lower()
+        names.add(path)
+        names.add(path.rsplit("/", 1)[-1])
+    names.discard("")
+    return frozenset(names)
+
+
+def prompt_literals(text: str, identifiers: Iterable[str] = ()) -> Tuple[str, ...]:
+    """
+    Extract the literals a generated pipeline must reproduce exactly
+
+    These are quoted strings, file names, anything containing a digit,
+    comparison operators, negations and words naming a known table, column
+    or file, in order of appearance.
+    Two prompts can only share a cached pipeline if these are equal.
+
+    Args:
+        text: Prompt text
+        identifiers: Lowercased schema and file names from the context
+
+    Returns:
+        Tuple of literals
+    """
+    names = identifiers if isinstance(identifiers, (set, frozenset)) else set(identifiers)
+    literals = []
+    for match in _LITERAL_PATTERN.finditer(text):
+        token = match.group()
+        if token[0] in "'\"`":
+            literals.append(token[1:-1])
+            continue
+        lowered = token.lower()
+        if lowered.endswith("n't"):
+            literals.append("not")
+        elif lowered[0] in "=!<>":
+            literals.append(_OPERATOR_ALIASES.get(lowered, lowered))
+        elif (
+            lowered in _NEGATION_WORDS or lowered in names
+            or "." in token or any(char.isdigit() for char in token)
+        ):
+            literals.append(lowered)
+    return tuple(literals)
+
+
+def cosine_similarity(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """
+    Cosine similarity of two normalized sparse vectors
+
+    Args:
+        a: First vector
+        b: Second vector
+
+    Returns:
+        Similarity in [0, 1]
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(feature, 0.0) for feature, weight in a.items())
+
+
+class SemanticCache:
+    """
+    In-process cache of generated pipelines keyed by prompt similarity
+
+    Entries are bucketed by MCP context fingerprint so a cached pipeline is
+    only ever served for the schema and files it was generated against.
+    Similarity only matters between prompts whose literals (numbers,
+    quoted strings, file and schema names, operators and negations) are
+    identical, since a pipeline for "age > 30" is wrong for "age > 40" or
+    "age < 30" however close the wording is.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_contexts: Optional[int] = None
+    ):
+        """
+        Initialize semantic cache
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Entry lifetime in seconds
+            max_entries: Maximum entries kept per context bucket
+            max_contexts: Maximum context buckets kept
+        """
+        self.threshold = threshold if threshold is not None else settings.SEMANTIC_CACHE_THRESHOLD
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.SEMANTIC_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.max_contexts = max_contexts if max_contexts is not None else settings.SEMANTIC_CACHE_MAX_CONTEXTS
+        self._buckets: Dict[str, List[Tuple[Dict[str, float], Tuple[str, ...], Any, float]]] = {}
+
+    def lookup(self, prompt: str, context_hash: str, identifiers: Iterable[str] = ()) -> Optional[Any]:
+        """
+        Find the cached payload for the most similar prompt
+
+        Args:
+            prompt: User prompt
+            context_hash: Fingerprint from context_fingerprint()
+            identifiers: Names from context_identifiers()
+
+        Returns:
+            Cached payload, or None on miss
+        """
+        bucket = self._buckets.get(context_hash)
+        if not bucket:
+            return None
+
+        now = time.monotonic()
+        bucket[:] = [entry for entry in bucket if now - entry[3] < self.ttl_seconds]
+        if not bucket:
+            del self._buckets[context_hash]
+            return None
+
+        literals = prompt_literals(prompt, identifiers)
+        query = embed_text(prompt)
+        best_score = 0.0
+        best_payload = None
+        for vector, entry_literals, payload, _ in bucket:
+            if entry_literals != literals:
+                continue
+            score = cosine_similarity(query, vector)
+            if score > best_score:
+                best_score, best_payload = score, payload
+
+        if best_score >= self.threshold:
+            logger.info(f"Semantic cache hit (similarity {best_score:.3f})")
+            return best_payload
+        return None
+
+    def store(self, prompt: str, context_hash: str, payload: Any, identifiers: Iterable[str] = ()) -> None:
+        """
+        Cache a payload for a prompt
+
+        Args:
+            prompt: User prompt
+            context_hash: Fingerprint from context_fingerprint()
+            payload: Value returned by later lookups
+            identifiers: Names from context_identifiers()
+        """
+        bucket = self._buckets.pop(context_hash, None)
+        if bucket is None:
+            bucket = []
+            if len(self._buckets) >= self.max_contexts:
+                self._evict_contexts()
+        # Reinsert so dict order tracks the least recently stored context
+        self._buckets[context_hash] = bucket
+        bucket.append((embed_text(prompt), prompt_literals(prompt, identifiers), payload, time.monotonic()))
+        if len(bucket) > self.max_entries:
+            del bucket[:len(bucket) - self.max_entries]
+
+    def _evict_contexts(self) -> None:
+        """
+        Drop expired buckets, then the least recently stored ones until a new bucket fits
+        """
+        now = time.monotonic()
+        for context_hash in [
+            key for key, bucket in self._buckets.items()
+            if all(now - entry[3] >= self.ttl_seconds for entry in bucket)
+        ]:
+            del self._buckets[context_hash]
+        while len(self._buckets) >= self.max_contexts:
+            del self._buckets[next(iter(self._buckets))]
+
+    def clear(self) -> None:
+        """
+        Drop all cached entries
+        """
+        self._buckets.clear()
+
+
+# Export classes
+__all__ = [
+    'TTLCache',
+    'LLMCache',
+    'SemanticCache',
+    'context_fingerprint',
+    'context_identifiers',
+    'prompt_literals',
+    'embed_text',
+    'cosine_similarity'
+]
@@ -4,23 +4,234 @@ Handles safe production deployment of validated pipelines with transactional int
 """
 
 import os
+import re
 import sqlite3
 import hashlib
 import subprocess
 import shutil
-import json
+import signal
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
 from app.core.config import settings
-from app.core.database import get_db_path
+from app.core.database import get_db_path, connect_sync, encode_snapshot, decode_snapshot, OPTIMIZE_PRAGMA
 from app.services.mcp import MCPContextManager
 
 
+# Pipeline step as fetched by the commit workflow (sqlite3.Row) or built by
+# callers; both support key access to id, code_type and script_content
+StepRecord = Union[sqlite3.Row, Dict[str, Any]]
+
+# Risk keywords found in one case-insensitive pass per script instead of an
+# uppercased copy plus one substring scan per keyword
+RISK_KEYWORD_PATTERN = re.compile(r"DROP TABLE|DROP DATABASE|TRUNCATE|DELETE|WHERE", re.IGNORECASE)
+
+# 'rm ' also covers 'rm -...'
+FILE_DELETION_PATTERN = re.compile(r"rm ", re.IGNORECASE)
+
+# Whole lines holding transaction control (the committer manages the
+# transaction itself) or comments about transactions
+TRANSACTION_CONTROL_PATTERN = re.compile(
+    r"^[^\S\n]*(?:BEGIN TRANSACTION|COMMIT|ROLLBACK|--[^\n]*TRANSACTION)[^\n]*\n?",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Linux ioctl that makes the destination share the source's extents (a
+# reflink) on copy-on-write filesystems such as btrfs and XFS
+FICLONE = 0x40049409
+
+# Read size when hashing files without hashlib.file_digest
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# SQL used by the commit workflow. Kept as module constants so every call
+# sends the identical string and hits the connection's statement cache.
+# Pipeline status, latest execution result and failed repair count in one
+# statement; latest_successful is NULL when the pipeline has never run
+SQL_VALIDATION_SUMMARY = """
+    SELECT p.status,
+        (SELECT is_successful FROM Execution_Logs
+         WHERE pipeline_id = p.id
+         ORDER BY run_time DESC LIMIT 1) AS latest_successful,
+        (SELECT COUNT(*) FROM Repair_Logs
+         WHERE pipeline_id = p.id AND repair_successful = 0) AS pending_repairs
+    FROM Pipelines p
+    WHERE p.id = ?
+"""
+
+SQL_STEP_CONTENTS = """
+    SELECT code_type, script_content FROM Pipeline_Steps 
+    WHERE pipeline_id = ? ORDER BY step_number
+"""
+
+SQL_INSERT_SNAPSHOT = """
+    INSERT INTO Schema_Snapshots (pipeline_id, db_structure, file_list, snapshot_time)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+"""
+
+SQL_GET_SNAPSHOT = "SELECT * FROM Schema_Snapshots WHERE id = ?"
+
+SQL_INSERT_SQL_LOG_OK = """
+    INSERT INTO Execution_Logs 
+    (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
+    VALUES (?, ?, CURRENT_TIMESTAMP, 1, 'SQL executed successfully', '', 0, ?)
+"""
+
+SQL_INSERT_LOG_ERROR = """
+    INSERT INTO Execution_Logs 
+    (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
+    VALUES (?, ?, CURRENT_TIMESTAMP, 0, '', ?, 1, 0)
+"""
+
+SQL_INSERT_BASH_LOG = """
+    INSERT INTO Execution_Logs 
+    (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
+    VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?)
+"""
+
+SQL_INSERT_BASH_TIMEOUT_LOG = """
+    INSERT INTO Execution_Logs 
+    (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
+    VALUES (?, ?, CURRENT_TIMESTAMP, 0, '', 'Execution timeout', 124, 10000)
+"""
+
+SQL_UPDATE_COMMIT_STATUS = """
+    UPDATE Pipelines 
+    SET commit_status = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+SQL_GET_STEPS = """
+    SELECT id, step_number, code_type, script_content 
+    FROM Pipeline_Steps 
+    WHERE pipeline_id = ? 
+    ORDER BY step_number
+"""
+
+SQL_MARK_COMMITTED = """
+    UPDATE Pipelines 
+    SET commit_status = ?, commit_time = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+SQL_GET_COMMIT_STATUS = "SELECT commit_status FROM Pipelines WHERE id = ?"
+
+SQL_COUNT_REVERSIBLE_CHANGES = """
+    SELECT COUNT(*) FROM Filesystem_Changes 
+    WHERE pipeline_id = ? AND rolled_back = 0
+"""
+
+SQL_MARK_ROLLED_BACK = """
+    UPDATE Pipelines 
+    SET commit_status = ?, rollback_time = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+
+def split_sql_statements(script: str) -> List[str]:
+    """
+    Split a SQL script into individual statements
+    
+    Semicolons are only treated as terminators once sqlite3.complete_statement
+    (SQLite's own tokenizer) agrees that the text so far forms a complete
+    statement, so semicolons inside string literals, comments and trigger
+    bodies do not split a statement.
+    
+    Args:
+        script: SQL script
+        
+    Returns:
+        Statements in script order, each ending with its semicolon except
+        for an unterminated final statement
+    """
+    statements = []
+    buffer = []
+    pieces = script.split(';')
+    
+    for piece in pieces[:-1]:
+        buffer.append(piece)
+        buffer.append(';')
+        candidate = ''.join(buffer)
+        if sqlite3.complete_statement(candidate):
+            statement = candidate.strip()
+            if statement != ';':
+                statements.append(statement)
+            buffer = []
+    
+    tail = (''.join(buffer) + pieces[-1]).strip()
+    if tail:
+        statements.append(tail)
+    
+    return statements
+
+
+def run_bash_bounded(script: str, cwd: str, timeout: float) -> subprocess.CompletedProcess:
+    """
+    Run a bash script with a wall-clock limit that covers its children
+    
+    The script runs in its own session. On timeout the whole process group
+    is killed (just bash on platforms without process groups), so commands the script started cannot keep changing files
+    after the step has been reported as timed out (subprocess.run only
+    kills bash itself).
+    
+    Args:
+        script: Script passed to bash -c
+        cwd: Working directory
+        timeout: Seconds before the process group is killed
+        
+    Returns:
+        CompletedProcess with stdout and stderr as bytes
+        
+    Raises:
+        subprocess.TimeoutExpired: If the script did not finish in time
+    """
+    with subprocess.Popen(
+        ['bash', '-c', script],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        start_new_session=True
+    ) as process:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            process.communicate()
+            raise
+        return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    """
+    Kill a process started in its own session, with its children
+    
+    Falls back to killing only the process where process groups are not
+    available (Windows) or the group has already gone away.
+    
+    Args:
+        process: Process started with start_new_session=True
+    """
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except ProcessLookupError:
+            pass
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
 class CommitStatus(Enum):
     """Commit status enumeration"""
     NOT_COMMITTED = "not_committed"
@@ -38,7 +249,7 @@ class OperationType(Enum):
     MOVE = "move"
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationReport:
     """Pre-commit validation report"""
     is_valid: bool
@@ -57,13 +268,14 @@ class ValidationReport:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class CommitResult:
     """Result of commit operation"""
     success: bool
     pipeline_id: int
     commit_status: str
     snapshot_id: Optional[int] = None
+    db_snapshot_path: Optional[str] = None
     operations_performed: Optional[Dict[str, Any]] = None
     commit_time: Optional[str] = None
     rollback_available: bool = False
@@ -78,6 +290,8 @@ class CommitResult:
         }
         if self.snapshot_id:
             result["snapshot_id"] = self.snapshot_id
+        if self.db_snapshot_path:
+            result["db_snapshot_path"] = self.db_snapshot_path
         if self.operations_performed:
             result["operations_performed"] = self.operations_performed
         if self.commit_time:
@@ -87,7 +301,7 @@ class CommitResult:
         return result
 
 
-@dataclass
+@dataclass(slots=True)
 class RollbackResult:
     """Result of rollback operation"""
     success: bool
@@ -112,12 +326,20 @@ class ValidationEngine:
     def __init__(self):
         self.db_path = get_db_path()
     
-    def validate_for_commit(self, pipeline_id: int) -> ValidationReport:
+    def validate_for_commit(
+        self,
+        pipeline_id: int,
+        conn: Optional[sqlite3.Connection] = None,
+        steps: Optional[List[sqlite3.Row]] = None
+    ) -> ValidationReport:
         """
         Perform comprehensive pre-commit validation
         
         Args:
             pipeline_id: Pipeline to validate
+            conn: Open connection to reuse (a new one is opened if None)
+            steps: Pipeline steps already fetched by the caller (read
+                from the database if None)
             
         Returns:
             ValidationReport with validation results
@@ -126,13 +348,15 @@ class ValidationEngine:
         warnings = []
         risk_score = 0
         
-        conn = sqlite3.connect(self.db_path)
+        owns_conn = conn is None
+        if owns_conn:
+            conn = connect_sync(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         try:
-            # Check 1: Pipeline exists
-            cursor.execute("SELECT * FROM Pipelines WHERE id = ?", (pipeline_id,))
+            # Check 1: Pipeline exists (checks 2-4 read the same row)
+            cursor.execute(SQL_VALIDATION_SUMMARY, (pipeline_id,))
             pipeline = cursor.fetchone()
             if not pipeline:
                 errors.append(f"Pipeline {pipeline_id} not found")
@@ -144,30 +368,18 @@ class ValidationEngine:
                 errors.append(f"Pipeline status is '{status}'. Must be 'sandbox_success' or 'repaired_success' before commit.")
             
             # Check 3: Latest execution must be successful
-            cursor.execute("""
-                SELECT is_successful FROM Execution_Logs 
-                WHERE pipeline_id = ? 
-                ORDER BY run_time DESC LIMIT 1
-            """, (pipeline_id,))
-            latest_exec = cursor.fetchone()
-            if not latest_exec or not latest_exec['is_successful']:
+            if not pipeline['latest_successful']:
                 errors.append("Latest execution was not successful")
             
             # Check 4: No pending repair attempts
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM Repair_Logs 
-                WHERE pipeline_id = ? AND repair_successful = 0
-            """, (pipeline_id,))
-            pending_repairs = cursor.fetchone()['count']
+            pending_repairs = pipeline['pending_repairs']
             if pending_repairs > 0:
                 warnings.append(f"{pending_repairs} unsuccessful repair attempts exist")
             
             # Check 5: Get pipeline steps for risk assessment
-            cursor.execute("""
-                SELECT code_type, script_content FROM Pipeline_Steps 
-                WHERE pipeline_id = ? ORDER BY step_number
-            """, (pipeline_id,))
-            steps = cursor.fetchall()
+            if steps is None:
+                cursor.execute(SQL_STEP_CONTENTS, (pipeline_id,))
+                steps = cursor.fetchall()
             
             sql_operations = 0
             destructive_operations = 0
@@ -176,22 +388,21 @@ class ValidationEngine:
             for step in steps:
                 if step['code_type'] == 'sql':
                     sql_operations += 1
-                    content_upper = step['script_content'].upper()
+                    keywords = {match.upper() for match in RISK_KEYWORD_PATTERN.findall(step['script_content'])}
                     
                     # Check for destructive operations
-                    if 'DROP TABLE' in content_upper or 'DROP DATABASE' in content_upper:
+                    if 'DROP TABLE' in keywords or 'DROP DATABASE' in keywords:
                         destructive_operations += 1
                         warnings.append("Pipeline contains DROP TABLE operation")
-                    if 'TRUNCATE' in content_upper:
+                    if 'TRUNCATE' in keywords:
                         destructive_operations += 1
                         warnings.append("Pipeline contains TRUNCATE operation")
-                    if 'DELETE' in content_upper and 'WHERE' not in content_upper:
+                    if 'DELETE' in keywords and 'WHERE' not in keywords:
                         destructive_operations += 1
                         warnings.append("Pipeline contains DELETE without WHERE clause")
                 
                 elif step['code_type'] == 'bash':
-                    content_lower = step['script_content'].lower()
-                    if 'rm ' in content_lower or 'rm -' in content_lower:
+                    if FILE_DELETION_PATTERN.search(step['script_content']):
                         file_deletions += 1
                         warnings.append("Pipeline contains file deletion operation")
             
@@ -211,7 +422,8 @@ class ValidationEngine:
                 warnings.append(f"High risk score: {risk_score}")
             
         finally:
-            conn.close()
+            if owns_conn:
+                conn.close()
         
         is_valid = len(errors) == 0
         
@@ -224,31 +436,39 @@ class SnapshotManager:
     def __init__(self):
         self.db_path = get_db_path()
         self.mcp = MCPContextManager()
+        self.snapshot_directory = Path(settings.DATA_DIRECTORY) / ".snapshots"
     
-    def create_snapshot(self, pipeline_id: int) -> int:
+    def create_snapshot(
+        self,
+        pipeline_id: int,
+        conn: Optional[sqlite3.Connection] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> int:
         """
         Create a snapshot of current database and filesystem state
         
         Args:
             pipeline_id: Pipeline ID for snapshot
+            conn: Open connection to reuse (a new one is opened if None)
+            context: Already built MCP context (fetched from MCP if None)
             
         Returns:
             Snapshot ID
         """
-        # Get current context from MCP
-        context = self.mcp.get_full_context()
+        # Get current context from MCP (served from its TTL cache when valid)
+        if context is None:
+            context = self.mcp.get_full_context()
         
-        db_structure = json.dumps(context.get('database', {}))
-        file_list = json.dumps(context.get('filesystem', {}))
+        db_structure = encode_snapshot(context.get('database', {}))
+        file_list = encode_snapshot(context.get('filesystem', {}))
         
-        conn = sqlite3.connect(self.db_path)
+        owns_conn = conn is None
+        if owns_conn:
+            conn = connect_sync(self.db_path)
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
-                INSERT INTO Schema_Snapshots (pipeline_id, db_structure, file_list, snapshot_time)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-            """, (pipeline_id, db_structure, file_list))
+            cursor.execute(SQL_INSERT_SNAPSHOT, (pipeline_id, db_structure, file_list))
             
             snapshot_id = cursor.lastrowid
             conn.commit()
@@ -256,26 +476,57 @@ class SnapshotManager:
             return snapshot_id
             
         finally:
-            conn.close()
+            if owns_conn:
+                conn.close()
+    
+    def snapshot_db_file(self, pipeline_id: int, conn: Optional[sqlite3.Connection] = None) -> str:
+        """
+        Copy the database to a standalone file with SQLite's online backup API
+        
+        Unlike create_snapshot this is a physical copy that can replace the
+        database file if a commit has to be undone by hand.
+        
+        Args:
+            pipeline_id: Pipeline ID for snapshot
+            conn: Open connection to back up from (a new one is opened if None)
+            
+        Returns:
+            Path of the snapshot database file
+        """
+        self.snapshot_directory.mkdir(parents=True, exist_ok=True)
+        # Nanosecond suffix: second-resolution names collided on quick retries
+        snapshot_path = self.snapshot_directory / f"pipeline_{pipeline_id}_{time.time_ns()}.db"
+        
+        owns_conn = conn is None
+        if owns_conn:
+            conn = connect_sync(self.db_path)
+        dest = sqlite3.connect(snapshot_path)
+        
+        try:
+            conn.backup(dest)
+            return str(snapshot_path)
+            
+        finally:
+            dest.close()
+            if owns_conn:
+                conn.close()
     
     def get_snapshot(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
         """Retrieve a snapshot by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_sync(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
-                SELECT * FROM Schema_Snapshots WHERE id = ?
-            """, (snapshot_id,))
+            cursor.execute(SQL_GET_SNAPSHOT, (snapshot_id,))
             
             row = cursor.fetchone()
             if row:
                 return {
                     "id": row['id'],
                     "pipeline_id": row['pipeline_id'],
-                    "db_structure": json.loads(row['db_structure']),
-                    "file_list": json.loads(row['file_list']),
+                    "db_structure": decode_snapshot(row['db_structure']),
+                    "file_list": decode_snapshot(row['file_list']),
                     "snapshot_time": row['snapshot_time']
                 }
             return None
@@ -290,13 +541,20 @@ class DatabaseCommitter:
     def __init__(self):
         self.db_path = get_db_path()
     
-    def commit_sql_operations(self, pipeline_id: int, sql_steps: List[Dict[str, Any]]) -> Tuple[bool, Optional[str]]:
+    def commit_sql_operations(
+        self,
+        pipeline_id: int,
+        sql_steps: List[StepRecord],
+        conn: Optional[sqlite3.Connection] = None
+    ) -> Tuple[bool, Optional[str]]:
         """
         Execute SQL steps in a single transaction
         
         Args:
             pipeline_id: Pipeline ID
             sql_steps: List of SQL steps to execute
+            conn: Open connection to reuse (a new one is opened if None);
+                must not have a transaction in progress
             
         Returns:
             Tuple of (success, error_message)
@@ -304,34 +562,24 @@ class DatabaseCommitter:
         if not sql_steps:
             return True, None
         
-        conn = sqlite3.connect(self.db_path)
+        owns_conn = conn is None
+        if owns_conn:
+            conn = connect_sync(self.db_path)
         cursor = conn.cursor()
         
         try:
             # Begin transaction
             cursor.execute("BEGIN TRANSACTION")
             
+            # Success logs are written in one batch just before the commit
+            log_rows: List[Tuple[int, int, int]] = []
+            
             for step in sql_steps:
                 step_id = step['id']
                 sql_content = step['script_content']
                 
                 # Remove transaction commands from SQL content (we handle transactions here)
-                # Remove BEGIN TRANSACTION, COMMIT, ROLLBACK statements
-                lines = sql_content.split('\n')
-                cleaned_lines = []
-                for line in lines:
-                    line_upper = line.strip().upper()
-                    # Skip transaction control statements
-                    if line_upper.startswith('BEGIN TRANSACTION') or \
-                       line_upper.startswith('COMMIT') or \
-                       line_upper.startswith('ROLLBACK'):
-                        continue
-                    # Skip comment lines that mention transaction
-                    if line.strip().startswith('--') and 'transaction' in line_upper:
-                        continue
-                    cleaned_lines.append(line)
-                
-                sql_content_cleaned = '\n'.join(cleaned_lines).strip()
+                sql_content_cleaned = TRANSACTION_CONTROL_PATTERN.sub('', sql_content).strip()
                 
                 # Skip if only transaction commands were present
                 if not sql_content_cleaned:
@@ -340,33 +588,21 @@ class DatabaseCommitter:
                 start_time = time.time()
                 
                 try:
-                    # Split SQL into individual statements and execute each
-                    statements = [s.strip() for s in sql_content_cleaned.split(';') if s.strip()]
-                    for statement in statements:
-                        if statement:
-                            cursor.execute(statement)
+                    # Execute each statement inside the surrounding transaction
+                    for statement in split_sql_statements(sql_content_cleaned):
+                        cursor.execute(statement)
                     execution_time_ms = int((time.time() - start_time) * 1000)
-                    
-                    # Log successful execution
-                    cursor.execute("""
-                        INSERT INTO Execution_Logs 
-                        (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
-                        VALUES (?, ?, CURRENT_TIMESTAMP, 1, 'SQL executed successfully', '', 0, ?)
-                    """, (pipeline_id, step_id, execution_time_ms))
+                    log_rows.append((pipeline_id, step_id, execution_time_ms))
                     
                 except sqlite3.Error as e:
-                    # Log failed execution
-                    cursor.execute("""
-                        INSERT INTO Execution_Logs 
-                        (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
-                        VALUES (?, ?, CURRENT_TIMESTAMP, 0, '', ?, 1, 0)
-                    """, (pipeline_id, step_id, str(e)))
-                    
-                    # Rollback transaction
+                    # Rollback transaction, then log the failed execution
                     conn.rollback()
+                    cursor.execute(SQL_INSERT_LOG_ERROR, (pipeline_id, step_id, str(e)))
+                    conn.commit()
                     return False, f"SQL execution failed: {str(e)}"
             
-            # Commit transaction
+            # Log successful executions and commit transaction
+            cursor.executemany(SQL_INSERT_SQL_LOG_OK, log_rows)
             conn.commit()
             return True, None
             
@@ -375,7 +611,8 @@ class DatabaseCommitter:
             return False, f"Transaction error: {str(e)}"
             
         finally:
-            conn.close()
+            if owns_conn:
+                conn.close()
 
 
 class FilesystemCommitter:
@@ -390,14 +627,21 @@ class FilesystemCommitter:
     def _calculate_file_hash(self, file_path: str) -> Optional[str]:
         """Calculate SHA256 hash of file"""
         try:
-            if not os.path.exists(file_path):
-                return None
-            
-            sha256_hash = hashlib.sha256()
             with open(file_path, "rb") as f:
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-            return sha256_hash.hexdigest()
+                # file_digest feeds large buffers to OpenSSL with the GIL released
+                if hasattr(hashlib, "file_digest"):
+                    return hashlib.file_digest(f, "sha256").hexdigest()
+                
+                # Python < 3.11: same approach with a reused buffer
+                digest = hashlib.sha256()
+                buffer = bytearray(HASH_CHUNK_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    digest.update(view[:size])
+                return digest.hexdigest()
         except Exception:
             return None
     
@@ -407,23 +651,57 @@ class FilesystemCommitter:
             if not os.path.exists(file_path):
                 return None
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Nanosecond suffix so two backups in the same second don't collide
             filename = os.path.basename(file_path)
-            backup_filename = f"{filename}_{timestamp}.bak"
+            backup_filename = f"{filename}_{time.time_ns()}.bak"
             backup_path = self.backup_directory / backup_filename
             
-            shutil.copy2(file_path, backup_path)
+            if not self._clone_file(file_path, backup_path):
+                shutil.copy2(file_path, backup_path)
             return str(backup_path)
         except Exception:
             return None
     
-    def commit_file_operations(self, pipeline_id: int, bash_steps: List[Dict[str, Any]]) -> Tuple[bool, Optional[str]]:
+    def _clone_file(self, file_path: str, backup_path: Path) -> bool:
+        """
+        Reflink a file so the backup costs no data copy
+        
+        A hardlink is not used as a cheaper fallback: bash steps may modify
+        the original in place, which would change the backup as well.
+        
+        Args:
+            file_path: File to back up
+            backup_path: Backup destination
+            
+        Returns:
+            True if the clone was made, False if the platform or
+            filesystem does not support it (nothing is left behind)
+        """
+        if fcntl is None:
+            return False
+        
+        try:
+            with open(file_path, "rb") as src, open(backup_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(file_path, backup_path)
+            return True
+        except OSError:
+            backup_path.unlink(missing_ok=True)
+            return False
+    
+    def commit_file_operations(
+        self,
+        pipeline_id: int,
+        bash_steps: List[StepRecord],
+        conn: Optional[sqlite3.Connection] = None
+    ) -> Tuple[bool, Optional[str]]:
         """
         Execute bash steps on production filesystem
         
         Args:
             pipeline_id: Pipeline ID
             bash_steps: List of bash steps to execute
+            conn: Open connection to reuse (a new one is opened if None)
             
         Returns:
             Tuple of (success, error_message)
@@ -431,80 +709,68 @@ class FilesystemCommitter:
         if not bash_steps:
             return True, None
         
-        conn = sqlite3.connect(self.db_path)
+        owns_conn = conn is None
+        if owns_conn:
+            conn = connect_sync(self.db_path)
         cursor = conn.cursor()
         
+        # Logs are written in one batch when the loop ends or a step fails
+        log_rows: List[Tuple[Any, ...]] = []
+        
         try:
             for step in bash_steps:
                 step_id = step['id']
                 bash_content = step['script_content']
                 
-                # Create temporary script file
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                script_path = self.data_directory / f"commit_script_{timestamp}.sh"
-                
-                with open(script_path, 'w') as f:
-                    f.write("#!/bin/bash\n")
-                    f.write("set -e\n")  # Exit on error
-                    f.write(bash_content)
-                
-                # Make executable
-                os.chmod(script_path, 0o755)
-                
                 start_time = time.time()
                 
                 try:
-                    # Execute bash script
-                    result = subprocess.run(
-                        ['bash', str(script_path)],
-                        capture_output=True,
-                        text=True,
-                        timeout=10,
-                        cwd=str(self.data_directory)
+                    # Pass the script inline (set -e: exit on error) rather than
+                    # through a temporary file; stdin is closed so commands that
+                    # read it cannot block
+                    result = run_bash_bounded(
+                        "set -e\n" + bash_content,
+                        cwd=str(self.data_directory),
+                        timeout=10
                     )
                     
                     execution_time_ms = int((time.time() - start_time) * 1000)
                     
+                    # Output is captured as bytes and decoded once; invalid
+                    # UTF-8 is replaced instead of failing the step
+                    stdout = result.stdout.decode("utf-8", "replace")
+                    stderr = result.stderr.decode("utf-8", "replace")
+                    
                     # Log execution
-                    cursor.execute("""
-                        INSERT INTO Execution_Logs 
-                        (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
-                        VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?)
-                    """, (pipeline_id, step_id, result.returncode == 0, 
-                          result.stdout, result.stderr, result.returncode, execution_time_ms))
+                    log_rows.append((
+                        pipeline_id, step_id, result.returncode == 0,
+                        stdout, stderr, result.returncode, execution_time_ms
+                    ))
                     
                     if result.returncode != 0:
+                        cursor.executemany(SQL_INSERT_BASH_LOG, log_rows)
                         conn.commit()
-                        return False, f"Bash execution failed: {result.stderr}"
+                        return False, f"Bash execution failed: {stderr}"
                     
                 except subprocess.TimeoutExpired:
-                    cursor.execute("""
-                        INSERT INTO Execution_Logs 
-                        (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
-                        VALUES (?, ?, CURRENT_TIMESTAMP, 0, '', 'Execution timeout', 124, 10000)
-                    """, (pipeline_id, step_id))
+                    cursor.executemany(SQL_INSERT_BASH_LOG, log_rows)
+                    cursor.execute(SQL_INSERT_BASH_TIMEOUT_LOG, (pipeline_id, step_id))
                     conn.commit()
                     return False, "Bash execution timeout"
                 
                 except Exception as e:
-                    cursor.execute("""
-                        INSERT INTO Execution_Logs 
-                        (pipeline_id, step_id, run_time, is_successful, stdout, stderr, exit_code, execution_time_ms)
-                        VALUES (?, ?, CURRENT_TIMESTAMP, 0, '', ?, 1, 0)
-                    """, (pipeline_id, step_id, str(e)))
+                    cursor.executemany(SQL_INSERT_BASH_LOG, log_rows)
+                    cursor.execute(SQL_INSERT_LOG_ERROR, (pipeline_id, step_id, str(e)))
                     conn.commit()
                     return False, f"Bash execution error: {str(e)}"
-                
-                finally:
-                    # Clean up script file
-                    if script_path.exists():
-                        script_path.unlink()
             
+            cursor.executemany(SQL_INSERT_BASH_LOG, log_rows)
             conn.commit()
             return True, None
             
         finally:
-            conn.close()
+            if owns_conn:
+                conn.close()
 
 
 class CommitService:
@@ -540,8 +806,46 @@ class CommitService:
         Returns:
             CommitResult
         """
+        # One connection serves the whole workflow so SQLite's page cache
+        # stays warm from validation through the final status update
+        conn = connect_sync(self.db_path)
+        conn.row_factory = sqlite3.Row
+        
+        try:
+            result = self._commit_pipeline(conn, pipeline_id, force_commit)
+            # Commits can add many log rows; refresh stale statistics so
+            # later validations keep their index plans
+            conn.execute(OPTIMIZE_PRAGMA)
+            return result
+        finally:
+            conn.close()
+    
+    def _commit_pipeline(
+        self,
+        conn: sqlite3.Connection,
+        pipeline_id: int,
+        force_commit: bool
+    ) -> CommitResult:
+        """
+        Run the commit workflow on an open connection
+        
+        Args:
+            conn: Connection shared by every commit stage
+            pipeline_id: Pipeline to commit
+            force_commit: Skip high-risk validation
+            
+        Returns:
+            CommitResult
+        """
+        cursor = conn.cursor()
+        
+        # Steps are read once and shared by validation and both commit
+        # phases; sqlite3.Row gives key access without a dict per row
+        cursor.execute(SQL_GET_STEPS, (pipeline_id,))
+        steps = cursor.fetchall()
+        
         # Validate
-        validation = self.validate_for_commit(pipeline_id)
+        validation = self.validator.validate_for_commit(pipeline_id, conn=conn, steps=steps)
         
         if not validation.is_valid:
             return CommitResult(
@@ -560,31 +864,34 @@ class CommitService:
                 error=f"High-risk pipeline (score: {validation.risk_score}). Set force_commit=true to proceed."
             )
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        # Nothing to apply: skip the status round trip and the snapshot
+        if not steps:
+            commit_time = datetime.now().isoformat()
+            cursor.execute(SQL_MARK_COMMITTED, (CommitStatus.COMMITTED.value, commit_time, pipeline_id))
+            conn.commit()
+            return CommitResult(
+                success=True,
+                pipeline_id=pipeline_id,
+                commit_status=CommitStatus.COMMITTED.value,
+                operations_performed={"sql_operations": 0, "file_operations": 0, "total_steps": 0},
+                commit_time=commit_time,
+                rollback_available=True
+            )
         
         try:
             # Update pipeline status
-            cursor.execute("""
-                UPDATE Pipelines 
-                SET commit_status = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (CommitStatus.COMMIT_IN_PROGRESS.value, pipeline_id))
+            cursor.execute(SQL_UPDATE_COMMIT_STATUS, (CommitStatus.COMMIT_IN_PROGRESS.value, pipeline_id))
             conn.commit()
             
             # Create pre-commit snapshot
-            snapshot_id = self.snapshot_manager.create_snapshot(pipeline_id)
+            snapshot_id = self.snapshot_manager.create_snapshot(pipeline_id, conn=conn)
             
-            # Get pipeline steps
-            cursor.execute("""
-                SELECT id, step_number, code_type, script_content 
-                FROM Pipeline_Steps 
-                WHERE pipeline_id = ? 
-                ORDER BY step_number
-            """, (pipeline_id,))
-            
-            steps = [dict(row) for row in cursor.fetchall()]
+            # The steps below change the state the cached context describes;
+            # the next snapshot must not reuse it
+            self.snapshot_manager.mcp.clear_cache()
+            db_snapshot_path = None
+            if settings.COMMIT_DB_SNAPSHOTS:
+                db_snapshot_path = self.snapshot_manager.snapshot_db_file(pipeline_id, conn=conn)
             
             # Separate SQL and bash steps
             sql_steps = [s for s in steps if s['code_type'] == 'sql']
@@ -598,49 +905,39 @@ class CommitService:
             
             # Commit SQL operations
             if sql_steps:
-                success, error = self.db_committer.commit_sql_operations(pipeline_id, sql_steps)
+                success, error = self.db_committer.commit_sql_operations(pipeline_id, sql_steps, conn=conn)
                 if not success:
-                    cursor.execute("""
-                        UPDATE Pipelines 
-                        SET commit_status = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    """, (CommitStatus.COMMIT_FAILED.value, pipeline_id))
+                    cursor.execute(SQL_UPDATE_COMMIT_STATUS, (CommitStatus.COMMIT_FAILED.value, pipeline_id))
                     conn.commit()
                     return CommitResult(
                         success=False,
                         pipeline_id=pipeline_id,
                         commit_status=CommitStatus.COMMIT_FAILED.value,
                         snapshot_id=snapshot_id,
+                        db_snapshot_path=db_snapshot_path,
                         error=error,
                         rollback_available=True
                     )
             
-            # Commit file operations
+            # Commit file operations, only once the SQL phase has committed
             if bash_steps:
-                success, error = self.fs_committer.commit_file_operations(pipeline_id, bash_steps)
+                success, error = self.fs_committer.commit_file_operations(pipeline_id, bash_steps, conn=conn)
                 if not success:
-                    cursor.execute("""
-                        UPDATE Pipelines 
-                        SET commit_status = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    """, (CommitStatus.COMMIT_FAILED.value, pipeline_id))
+                    cursor.execute(SQL_UPDATE_COMMIT_STATUS, (CommitStatus.COMMIT_FAILED.value, pipeline_id))
                     conn.commit()
                     return CommitResult(
                         success=False,
                         pipeline_id=pipeline_id,
                         commit_status=CommitStatus.COMMIT_FAILED.value,
                         snapshot_id=snapshot_id,
+                        db_snapshot_path=db_snapshot_path,
                         error=error,
                         rollback_available=False
                     )
             
             # Update pipeline as committed
             commit_time = datetime.now().isoformat()
-            cursor.execute("""
-                UPDATE Pipelines 
-                SET commit_status = ?, commit_time = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (CommitStatus.COMMITTED.value, commit_time, pipeline_id))
+            cursor.execute(SQL_MARK_COMMITTED, (CommitStatus.COMMITTED.value, commit_time, pipeline_id))
             conn.commit()
             
             return CommitResult(
@@ -648,17 +945,14 @@ class CommitService:
                 pipeline_id=pipeline_id,
                 commit_status=CommitStatus.COMMITTED.value,
                 snapshot_id=snapshot_id,
+                db_snapshot_path=db_snapshot_path,
                 operations_performed=operations_performed,
                 commit_time=commit_time,
                 rollback_available=True
             )
             
         except Exception as e:
-            cursor.execute("""
-                UPDATE Pipelines 
-                SET commit_status = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (CommitStatus.COMMIT_FAILED.value, pipeline_id))
+            cursor.execute(SQL_UPDATE_COMMIT_STATUS, (CommitStatus.COMMIT_FAILED.value, pipeline_id))
             conn.commit()
             
             return CommitResult(
@@ -667,9 +961,6 @@ class CommitService:
                 commit_status=CommitStatus.COMMIT_FAILED.value,
                 error=f"Commit error: {str(e)}"
             )
-            
-        finally:
-            conn.close()
     
     def rollback_commit(self, pipeline_id: int) -> RollbackResult:
         """
@@ -681,14 +972,12 @@ class CommitService:
         Returns:
             RollbackResult
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_sync(self.db_path)
         cursor = conn.cursor()
         
         try:
             # Check if pipeline is committed
-            cursor.execute("""
-                SELECT commit_status FROM Pipelines WHERE id = ?
-            """, (pipeline_id,))
+            cursor.execute(SQL_GET_COMMIT_STATUS, (pipeline_id,))
             
             row = cursor.fetchone()
             if not row:
@@ -701,19 +990,12 @@ class CommitService:
             # Note: Database rollback not supported after commit
             # Only filesystem changes can be rolled back
             
-            cursor.execute("""
-                SELECT COUNT(*) FROM Filesystem_Changes 
-                WHERE pipeline_id = ? AND rolled_back = 0
-            """, (pipeline_id,))
+            cursor.execute(SQL_COUNT_REVERSIBLE_CHANGES, (pipeline_id,))
             
             reversible_ops = cursor.fetchone()[0]
             
             # Update pipeline status
-            cursor.execute("""
-                UPDATE Pipelines 
-                SET commit_status = ?, rollback_time = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (CommitStatus.ROLLED_BACK.value, pipeline_id))
+            cursor.execute(SQL_MARK_ROLLED_BACK, (CommitStatus.ROLLED_BACK.value, pipeline_id))
             
             conn.commit()
             
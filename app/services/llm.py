@@ -2,21 +2,120 @@
 LLM Pipeline Generator
 Handles pipeline generation using Google Gemini API
 """
+import asyncio
+import io
 import json
+import random
 import re
 import time
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from functools import lru_cache
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 
 import google.genai as genai
 
 from app.core.config import settings
+from app.core.database import get_db, encode_snapshot
 from app.services.mcp import MCPContextManager
+from app.services.cache import LLMCache, TTLCache, context_fingerprint
 
 logger = logging.getLogger(__name__)
 
 
+# Markdown code fence openers/closers around model JSON output
+_CODE_FENCE_PATTERN = re.compile(r'```(?:json)?\s*')
+_JSON_DECODER = json.JSONDecoder()
+
+# Error messages of model-blocked responses (safety/blocklist/no content)
+_BLOCKED_PATTERN = re.compile(
+    r"safety|blocked|blocklist|prohibited|sensitive_information|recitation",
+    re.IGNORECASE
+)
+
+# Error type name fragments of network/transient errors
+_RETRYABLE_ERRORS = (
+    'ConnectionError',
+    'Timeout',
+    'ServiceUnavailable',
+    'InternalServerError',
+    'RateLimitError'
+)
+
+# Error type name fragments of authentication/permission errors
+_NON_RETRYABLE_ERRORS = (
+    'AuthenticationError',
+    'PermissionDenied',
+    'InvalidArgument'
+)
+
+# Retry decision by exact error type name; other names fall back to
+# matching the fragments above
+_ERROR_TYPE_RETRY: Dict[str, bool] = {
+    **{name: True for name in _RETRYABLE_ERRORS},
+    **{name: False for name in _NON_RETRYABLE_ERRORS}
+}
+
+
+@lru_cache(maxsize=128)
+def _classify_error_type(error_type: str) -> Optional[bool]:
+    """
+    Decide whether an error type is worth retrying
+    
+    Args:
+        error_type: Exception class name
+        
+    Returns:
+        True if retryable, False if not, None if the type is unknown
+    """
+    decision = _ERROR_TYPE_RETRY.get(error_type)
+    if decision is not None:
+        return decision
+    if any(err in error_type for err in _NON_RETRYABLE_ERRORS):
+        return False
+    if any(err in error_type for err in _RETRYABLE_ERRORS):
+        return True
+    return None
+
+
+# Identical prompts (same request against the same context) are answered
+# from here instead of the API; shared by every client in the process
+response_cache = LLMCache()
+
+
+def _parse_retry_after(error: Exception) -> Optional[float]:
+    """
+    Read the Retry-After interval from an API error, if it carries one
+    
+    Args:
+        error: Exception raised by the Gemini client
+        
+    Returns:
+        Seconds to wait, or None if the error has no usable header
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
 class GeminiClient:
     """
     Google Gemini API client with retry logic and timeout handling
@@ -39,7 +138,7 @@ class GeminiClient:
             model_name: Model to use (uses settings if None)
             timeout_seconds: Request timeout (uses settings if None)
             max_retries: Maximum retry attempts (uses settings if None)
-            retry_delay_seconds: Delay between retries (uses settings if None)
+            retry_delay_seconds: Base backoff delay between retries (uses settings if None)
             max_output_tokens: Maximum tokens to allow in responses
         """
         self.api_key = api_key or settings.GEMINI_API_KEY
@@ -55,20 +154,22 @@ class GeminiClient:
         
         # Initialize Gemini API client
         self.client = genai.Client(api_key=self.api_key)
+        self.response_cache = response_cache
         
         logger.info(f"Gemini client initialized with model: {self.model_name}")
     
-    def generate_content(
-        self,
-        prompt: str,
-        retry_count: int = 0
-    ) -> Dict[str, Any]:
+    def generate_content(self, prompt: str, use_cache: bool = True) -> Dict[str, Any]:
         """
         Generate content using Gemini API with retry logic
         
+        Failed attempts are retried with exponential backoff and jitter,
+        or after the server's Retry-After interval when one is given.
+        Responses are served from the response cache but never added to
+        it here; callers store them with cache_response() once validated.
+        
         Args:
             prompt: Complete prompt to send to API
-            retry_count: Current retry attempt (internal use)
+            use_cache: Serve a previously cached response if available
             
         Returns:
             Dictionary with success status and response/error
@@ -78,76 +179,237 @@ class GeminiClient:
                 "success": bool,
                 "response": str (if success),
                 "error": str (if failure),
-                "error_type": str (if failure)
+                "error_type": str (if failure),
+                "cached": bool (True if served from the response cache)
             }
         """
-        try:
-            start_time = time.time()
-            
-            logger.info(f"Sending request to Gemini API (attempt {retry_count + 1}/{self.max_retries + 1})")
-            
-            # Generate content using new API
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config={
-                    'temperature': 0.1,  # Low temperature for consistent output
-                    'top_p': 0.95,
-                    'top_k': 40,
-                    'max_output_tokens': self.max_output_tokens,
-                }
-            )
-            
-            elapsed_time = time.time() - start_time
-            
-            # Extract response text from new API format
-            if hasattr(response, 'text'):
-                response_text = response.text.strip()
-            elif hasattr(response, 'candidates') and response.candidates:
-                # Fallback to old format if needed
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    text_parts = [
-                        getattr(part, "text", "")
-                        for part in candidate.content.parts
-                        if hasattr(part, "text")
-                    ]
-                    response_text = "".join(text_parts).strip()
-                else:
-                    raise ValueError("Gemini returned no content parts")
-            else:
-                raise ValueError("Gemini returned no content")
-            
-            if not response_text:
-                raise ValueError("Empty response text from Gemini API")
+        cached_result = self._cached_result(prompt) if use_cache else None
+        if cached_result is not None:
+            return cached_result
+        
+        for retry_count in range(self.max_retries + 1):
+            try:
+                start_time = time.time()
+                
+                logger.info(f"Sending request to Gemini API (attempt {retry_count + 1}/{self.max_retries + 1})")
+                
+                response = self.client.models.generate_content(
+                    model=self.model_name,
+                    contents=prompt,
+                    config=self._generation_config()
+                )
+                
+                return self._success_result(response, time.time() - start_time)
+                
+            except Exception as e:
+                error = e
+                error_type = type(e).__name__
+                logger.error(f"Gemini API error ({error_type}): {e}")
+                
+                if not self._should_retry(error_type, retry_count, str(e)):
+                    break
+                
+                delay = self._retry_delay(retry_count, e)
+                logger.info(f"Retrying after {delay:.2f}s delay...")
+                time.sleep(delay)
+        
+        return self._failure_result(error)
+    
+    async def agenerate_content(self, prompt: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Async variant of generate_content using the genai async client
+        
+        Args:
+            prompt: Complete prompt to send to API
+            use_cache: Serve a previously cached response if available
             
-            logger.info(f"Gemini API response received in {elapsed_time:.2f}s")
+        Returns:
+            Dictionary with success status and response/error, as for
+            generate_content
+        """
+        cached_result = self._cached_result(prompt) if use_cache else None
+        if cached_result is not None:
+            return cached_result
+        
+        for retry_count in range(self.max_retries + 1):
+            try:
+                start_time = time.time()
+                
+                logger.info(f"Sending async request to Gemini API (attempt {retry_count + 1}/{self.max_retries + 1})")
+                
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=prompt,
+                    config=self._generation_config()
+                )
+                
+                return self._success_result(response, time.time() - start_time)
+                
+            except Exception as e:
+                error = e
+                error_type = type(e).__name__
+                logger.error(f"Gemini API error ({error_type}): {e}")
+                
+                if not self._should_retry(error_type, retry_count, str(e)):
+                    break
+                
+                delay = self._retry_delay(retry_count, e)
+                logger.info(f"Retrying after {delay:.2f}s delay...")
+                await asyncio.sleep(delay)
+        
+        return self._failure_result(error)
+    
+    async def agenerate_batch(
+        self,
+        prompts: List[str],
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate content for several prompts concurrently
+        
+        Args:
+            prompts: Complete prompts to send to API
+            max_concurrency: Maximum requests in flight (uses settings if None)
             
-            return {
-                "success": True,
-                "response": response_text,
-                "elapsed_time": elapsed_time
-            }
+        Returns:
+            One generate_content-style result per prompt, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.GEMINI_MAX_CONCURRENCY)
+        
+        async def generate_one(prompt: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.agenerate_content(prompt)
+        
+        return await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
+    
+    def _generation_config(self) -> Dict[str, Any]:
+        """
+        Build the generation config sent with every request
+        
+        Returns:
+            Generation config dictionary
+        """
+        return {
+            'temperature': 0.1,  # Low temperature for consistent output
+            'top_p': 0.95,
+            'top_k': 40,
+            'max_output_tokens': self.max_output_tokens,
+        }
+    
+    def cache_response(self, prompt: str, response_text: str) -> None:
+        """
+        Cache a response that the caller has parsed and validated
+        
+        Args:
+            prompt: Complete prompt the response answers
+            response_text: Response text returned by generate_content
+        """
+        cache_key = LLMCache.cache_key(self.model_name, self.max_output_tokens, prompt)
+        self.response_cache.set(cache_key, response_text)
+    
+    def _cached_result(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a previous response for the same request
+        
+        Args:
+            prompt: Complete prompt to send to API
             
-        except Exception as e:
-            error_type = type(e).__name__
-            error_message = str(e)
+        Returns:
+            Success result marked as cached, or None on a miss
+        """
+        cache_key = LLMCache.cache_key(self.model_name, self.max_output_tokens, prompt)
+        cached_response = self.response_cache.get(cache_key)
+        if cached_response is None:
+            return None
+        
+        logger.info("Gemini response served from cache")
+        return {
+            "success": True,
+            "response": cached_response,
+            "elapsed_time": 0.0,
+            "cached": True
+        }
+    
+    def _success_result(self, response: Any, elapsed_time: float) -> Dict[str, Any]:
+        """
+        Extract the text of an API response
+        
+        Args:
+            response: Response object returned by the API
+            elapsed_time: Request duration in seconds
             
-            logger.error(f"Gemini API error ({error_type}): {error_message}")
+        Returns:
+            Success result dictionary
             
-            # Determine if we should retry
-            should_retry = self._should_retry(error_type, retry_count, error_message)
+        Raises:
+            ValueError: If the response carries no text
+        """
+        # Extract response text from new API format
+        if hasattr(response, 'text'):
+            response_text = response.text.strip()
+        elif hasattr(response, 'candidates') and response.candidates:
+            # Fallback to old format if needed
+            candidate = response.candidates[0]
+            if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
+                text_parts = [
+                    getattr(part, "text", "")
+                    for part in candidate.content.parts
+                    if hasattr(part, "text")
+                ]
+                response_text = "".join(text_parts).strip()
+            else:
+                raise ValueError("Gemini returned no content parts")
+        else:
+            raise ValueError("Gemini returned no content")
+        
+        if not response_text:
+            raise ValueError("Empty response text from Gemini API")
+        
+        logger.info(f"Gemini API response received in {elapsed_time:.2f}s")
+        
+        return {
+            "success": True,
+            "response": response_text,
+            "elapsed_time": elapsed_time
+        }
+    
+    def _failure_result(self, error: Exception) -> Dict[str, Any]:
+        """
+        Build the result for a request that failed for good
+        
+        Args:
+            error: Exception raised by the last attempt
             
-            if should_retry:
-                logger.info(f"Retrying after {self.retry_delay_seconds}s delay...")
-                time.sleep(self.retry_delay_seconds)
-                return self.generate_content(prompt, retry_count + 1)
+        Returns:
+            Failure result dictionary
+        """
+        return {
+            "success": False,
+            "error": str(error),
+            "error_type": type(error).__name__
+        }
+    
+    def _retry_delay(self, retry_count: int, error: Exception) -> float:
+        """
+        Compute how long to wait before the next attempt
+        
+        Args:
+            retry_count: Zero-based number of the failed attempt
+            error: Exception raised by the failed attempt
             
-            return {
-                "success": False,
-                "error": error_message,
-                "error_type": error_type
-            }
+        Returns:
+            Delay in seconds; the server's Retry-After (bounded by the
+            request timeout) if present, otherwise jittered exponential backoff
+        """
+        retry_after = _parse_retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, float(self.timeout_seconds))
+        
+        backoff = min(
+            settings.GEMINI_RETRY_MAX_DELAY_SECONDS,
+            self.retry_delay_seconds * (2 ** retry_count)
+        )
+        return backoff * random.uniform(0.5, 1.5)
     
     def _should_retry(self, error_type: str, retry_count: int, error_message: str = "") -> bool:
         """
@@ -167,45 +429,18 @@ class GeminiClient:
             return False
         
         # Don't retry on model-blocked responses (safety/blocklist/no content)
-        blocked_markers = [
-            "safety",
-            "blocked",
-            "blocklist",
-            "prohibited",
-            "sensitive_information",
-            "recitation"
-        ]
-        if any(marker in error_message.lower() for marker in blocked_markers):
+        if _BLOCKED_PATTERN.search(error_message):
             logger.info(f"Non-retryable model response error: {error_message}")
             return False
         
-        # Retry on network/transient errors
-        retryable_errors = [
-            'ConnectionError',
-            'Timeout',
-            'ServiceUnavailable',
-            'InternalServerError',
-            'RateLimitError'
-        ]
-        
-        # Don't retry on authentication/permission errors
-        non_retryable_errors = [
-            'AuthenticationError',
-            'PermissionDenied',
-            'InvalidArgument'
-        ]
-        
-        if any(err in error_type for err in non_retryable_errors):
-            logger.info(f"Non-retryable error type: {error_type}")
-            return False
-        
-        if any(err in error_type for err in retryable_errors):
-            logger.info(f"Retryable error type: {error_type}")
+        decision = _classify_error_type(error_type)
+        if decision is None:
+            # Default: retry for unknown errors
+            logger.info(f"Unknown error type: {error_type}, will retry")
             return True
         
-        # Default: retry for unknown errors
-        logger.info(f"Unknown error type: {error_type}, will retry")
-        return True
+        logger.info(f"{'Retryable' if decision else 'Non-retryable'} error type: {error_type}")
+        return decision
     
     def _format_finish_reason(self, finish_reason: Any) -> str:
         """
@@ -226,156 +461,10 @@ class GeminiClient:
         return reason_map.get(finish_reason, str(finish_reason))
 
 
-class PromptBuilder:
-    """
-    Constructs optimized prompts for Gemini API
-    """
-    
-    @staticmethod
-    def build_system_prompt(mcp_context: Dict[str, Any]) -> str:
-        """
-        Build system prompt with MCP context
-        
-        Args:
-            mcp_context: Complete MCP metadata
-            
-        Returns:
-            System prompt string
-        """
-        # Extract database information
-        tables = mcp_context.get("database", {}).get("tables", [])
-        table_descriptions = []
-        
-        for table in tables:
-            table_name = table.get("name", "unknown")
-            columns = table.get("columns", [])
-            column_desc = ", ".join([
-                f"{col['name']} ({col['type']})" 
-                for col in columns
-            ])
-            table_descriptions.append(f"- {table_name}: {column_desc}")
-        
-        tables_text = "\n".join(table_descriptions) if table_descriptions else "No tables available"
-        
-        # Extract filesystem information
-        files = mcp_context.get("filesystem", {}).get("files", [])
-        file_descriptions = []
-        csv_previews = {}  # Store CSV previews separately for detailed context
-        json_previews = {}  # Store JSON previews separately
-        
-        for file in files:
-            file_path = file.get("path", "unknown")
-            file_type = file.get("type", "unknown")
-            
-            if file_type == "csv" and "headers" in file:
-                headers = ", ".join(file.get("headers", []))
-                row_count = file.get("row_count_estimate", 0)
-                file_descriptions.append(f"- {file_path} (CSV with {row_count} rows, columns: {headers})")
-                
-                # Store preview data if available
-                if "preview" in file:
-                    csv_previews[file_path] = file.get("preview", [])
-                    
-            elif file_type == "json":
-                structure = file.get("structure", {})
-                root_type = structure.get("root_type", "unknown")
-                
-                if root_type == "list":
-                    array_length = structure.get("array_length", 0)
-                    element_keys = structure.get("element_keys", [])
-                    fields = ", ".join(element_keys)
-                    file_descriptions.append(f"- {file_path} (JSON array with {array_length} items, fields: {fields})")
-                    
-                    # Store preview if available
-                    if "preview" in file:
-                        json_previews[file_path] = {
-                            "type": "array",
-                            "data": file.get("preview", []),
-                            "total_items": file.get("total_items", 0),
-                            "preview_count": file.get("preview_count", 0)
-                        }
-                elif root_type == "dict":
-                    keys = structure.get("keys", [])
-                    file_descriptions.append(f"- {file_path} (JSON object with keys: {', '.join(keys)})")
-                    
-                    if "preview" in file:
-                        json_previews[file_path] = {
-                            "type": "dict",
-                            "data": file.get("preview", {})
-                        }
-                else:
-                    file_descriptions.append(f"- {file_path} (JSON)")
-            else:
-                file_descriptions.append(f"- {file_path} ({file_type})")
-        
-        files_text = "\n".join(file_descriptions) if file_descriptions else "No files available"
-        
-        # Build CSV preview section if we have any
-        csv_preview_text = ""
-        if csv_previews:
-            preview_sections = []
-            for csv_path, preview_rows in csv_previews.items():
-                preview_count = len(preview_rows)
-                preview_sections.append(f"\n**CSV FILE DATA - {csv_path}:**")
-                preview_sections.append(f"Total rows to import: {preview_count}")
-                preview_sections.append(f"\n**YOU MUST GENERATE INSERT STATEMENTS FOR ALL {preview_count} ROWS BELOW:**\n")
-                
-                # Show ALL rows, not just first few
-                for i, row in enumerate(preview_rows, 1):
-                    # Show row as dict format
-                    row_str = ", ".join([f"{k}={v}" for k, v in row.items()])
-                    preview_sections.append(f"  Row {i}: {row_str}")
-                
-                preview_sections.append(f"\n**IMPORTANT: All {preview_count} rows above MUST be included in your INSERT statements!**")
-            
-            csv_preview_text = "\n".join(preview_sections)
-        
-        # Build JSON preview section if we have any
-        json_preview_text = ""
-        if json_previews:
-            preview_sections = []
-            for json_path, json_info in json_previews.items():
-                json_type = json_info.get("type")
-                
-                if json_type == "array":
-                    data = json_info.get("data", [])
-                    total_items = json_info.get("total_items", len(data))
-                    preview_count = json_info.get("preview_count", len(data))
-                    
-                    preview_sections.append(f"\n**JSON FILE DATA - {json_path}:**")
-                    preview_sections.append(f"Total items: {total_items}")
-                    preview_sections.append(f"\n**YOU MUST USE THE EXACT DATA FROM ALL {preview_count} ITEMS BELOW:**\n")
-                    
-                    # Show ALL items
-                    import json as json_lib
-                    for i, item in enumerate(data, 1):
-                        # Format each field safely to avoid string interpolation issues
-                        fields = []
-                        for key, value in item.items():
-                            # Properly escape and format values
-                            if isinstance(value, str):
-                                fields.append(f"{key}: '{value}'")
-                            else:
-                                fields.append(f"{key}: {value}")
-                        item_str = "{" + ", ".join(fields) + "}"
-                        preview_sections.append(f"  Item {i}: {item_str}")
-                    
-                    preview_sections.append(f"\n**IMPORTANT: All {preview_count} items above MUST be used with their EXACT field values!**")
-                    preview_sections.append(f"**DO NOT invent product names, categories, or prices - use ONLY the data shown above!**")
-                    
-                elif json_type == "dict":
-                    data = json_info.get("data", {})
-                    preview_sections.append(f"\n**JSON FILE DATA - {json_path}:**")
-                    import json as json_lib
-                    preview_sections.append(json_lib.dumps(data, indent=2, ensure_ascii=False))
-            
-            json_preview_text = "\n".join(preview_sections)
-        
-        # Get allowed Bash commands
-        allowed_commands = settings.ALLOWED_BASH_COMMANDS
-        commands_text = ", ".join(allowed_commands)
-        
-        system_prompt = f"""You are an expert data pipeline generator. Your task is to create executable Bash and SQL pipeline steps from natural language requests.
+# Invariant instructions, sent as the literal start of every generation
+# prompt so Gemini's implicit prompt caching can reuse them; the
+# context-dependent AVAILABLE RESOURCES section is appended after them
+_STATIC_PROMPT_TEMPLATE = """You are an expert data pipeline generator. Your task is to create executable Bash and SQL pipeline steps from natural language requests.
 
 **IMPORTANT DATABASE INFORMATION:**
 - Database Type: SQLite (NOT MySQL, NOT PostgreSQL)
@@ -403,18 +492,8 @@ class PromptBuilder:
 - If JSON fields don't match table columns, you must handle the mismatch (e.g., only insert matching fields)
 - Use BEGIN TRANSACTION; and COMMIT; for better performance
 
-AVAILABLE RESOURCES:
-
-Database Tables:
-{tables_text}
-
-Available Files:
-{files_text}
-{csv_preview_text}
-{json_preview_text}
-
 CONSTRAINTS:
-1. ONLY reference tables and files listed above
+1. ONLY reference tables and files listed under AVAILABLE RESOURCES below
 2. For bash steps, ONLY use these commands: {commands_text}
 3. **NEVER use sqlite3 command** - SQL steps are executed directly via Python
 4. Generate steps in proper execution order
@@ -423,7 +502,7 @@ CONSTRAINTS:
    - Valid: "INSERT INTO Sales VALUES (1, 'John', 100);"
    - Invalid: "/tmp/file.sql" or "sqlite3 db < file.sql"
 7. For CSV data loading:
-   - **CRITICAL**: Use EXACT data from CSV preview above - generate INSERT for EVERY row shown
+   - **CRITICAL**: Use EXACT data from CSV preview below - generate INSERT for EVERY row shown
    - DO NOT invent or generate random sample data
    - Match column values exactly as shown in the preview
    - Generate multiple INSERT statements in one SQL step
@@ -469,9 +548,232 @@ RULES:
 - **CRITICAL**: Your entire response MUST be ONLY the JSON object above, nothing else
 - Do NOT add any text before or after the JSON
 - Return ONLY valid JSON, no markdown formatting"""
+
+
+@lru_cache(maxsize=8)
+def _static_prompt_prefix(commands_text: str) -> str:
+    """
+    Render the static prompt prefix for an allowed-command list
+    
+    Args:
+        commands_text: Comma-separated allowed Bash commands
         
+    Returns:
+        Static prompt prefix
+    """
+    return _STATIC_PROMPT_TEMPLATE.format(commands_text=commands_text)
+
+
+def _allowed_commands_text() -> str:
+    """
+    Format the configured Bash command whitelist
+    
+    Returns:
+        Sorted, comma-separated command names
+    """
+    return ", ".join(sorted(settings.ALLOWED_BASH_COMMANDS))
+
+
+# Rendered system prompts by (context fingerprint, allowed commands)
+_system_prompt_cache = TTLCache(maxsize=64, ttl_seconds=settings.LLM_CACHE_TTL_SECONDS)
+_system_prompt_lock = threading.Lock()
+
+
+class PromptBuilder:
+    """
+    Constructs optimized prompts for Gemini API
+    """
+    
+    @staticmethod
+    def build_system_prompt(mcp_context: Dict[str, Any]) -> str:
+        """
+        Build system prompt with MCP context
+        
+        Prompts are cached by context fingerprint, so repeated requests
+        against an unchanged schema and file set skip the rendering.
+        
+        Args:
+            mcp_context: Complete MCP metadata
+            
+        Returns:
+            System prompt string
+        """
+        cache_key = (context_fingerprint(mcp_context), _allowed_commands_text())
+        with _system_prompt_lock:
+            system_prompt = _system_prompt_cache.get(cache_key)
+        if system_prompt is None:
+            system_prompt = PromptBuilder._render_system_prompt(mcp_context)
+            with _system_prompt_lock:
+                _system_prompt_cache.set(cache_key, system_prompt)
         return system_prompt
     
+    @staticmethod
+    def _render_system_prompt(mcp_context: Dict[str, Any]) -> str:
+        """
+        Render the system prompt for an MCP context
+        
+        Args:
+            mcp_context: Complete MCP metadata
+            
+        Returns:
+            System prompt string
+        """
+        buffer = io.StringIO()
+        buffer.write(_static_prompt_prefix(_allowed_commands_text()))
+        buffer.write("\n\nAVAILABLE RESOURCES:\n\nDatabase Tables:\n")
+        
+        # Database information
+        tables = mcp_context.get("database", {}).get("tables", [])
+        if tables:
+            buffer.write("\n".join(
+                f"- {table.get('name', 'unknown')}: "
+                + ", ".join(f"{col['name']} ({col['type']})" for col in table.get("columns", []))
+                for table in tables
+            ))
+        else:
+            buffer.write("No tables available")
+        
+        # Filesystem information; previews are collected for the sections below
+        files = mcp_context.get("filesystem", {}).get("files", [])
+        csv_previews = {}
+        json_previews = {}
+        
+        buffer.write("\n\nAvailable Files:\n")
+        if files:
+            buffer.write("\n".join(
+                PromptBuilder._describe_file(file, csv_previews, json_previews)
+                for file in files
+            ))
+        else:
+            buffer.write("No files available")
+        
+        buffer.write("\n")
+        if csv_previews:
+            buffer.write("\n".join(PromptBuilder._csv_preview_lines(csv_previews)))
+        buffer.write("\n")
+        if json_previews:
+            buffer.write("\n".join(PromptBuilder._json_preview_lines(json_previews)))
+        
+        return buffer.getvalue()
+    
+    @staticmethod
+    def _describe_file(
+        file: Dict[str, Any],
+        csv_previews: Dict[str, List[Dict[str, Any]]],
+        json_previews: Dict[str, Dict[str, Any]]
+    ) -> str:
+        """
+        Describe one scanned file and record its preview data
+        
+        Args:
+            file: File entry from the MCP filesystem context
+            csv_previews: CSV previews by path, updated in place
+            json_previews: JSON previews by path, updated in place
+            
+        Returns:
+            File description line
+        """
+        file_path = file.get("path", "unknown")
+        file_type = file.get("type", "unknown")
+        
+        if file_type == "csv" and "headers" in file:
+            headers = ", ".join(file.get("headers", []))
+            row_count = file.get("row_count_estimate", 0)
+            if "preview" in file:
+                csv_previews[file_path] = file.get("preview", [])
+            return f"- {file_path} (CSV with {row_count} rows, columns: {headers})"
+        
+        if file_type != "json":
+            return f"- {file_path} ({file_type})"
+        
+        structure = file.get("structure", {})
+        root_type = structure.get("root_type", "unknown")
+        
+        if root_type == "list":
+            array_length = structure.get("array_length", 0)
+            fields = ", ".join(structure.get("element_keys", []))
+            if "preview" in file:
+                json_previews[file_path] = {
+                    "type": "array",
+                    "data": file.get("preview", []),
+                    "total_items": file.get("total_items", 0),
+                    "preview_count": file.get("preview_count", 0)
+                }
+            return f"- {file_path} (JSON array with {array_length} items, fields: {fields})"
+        
+        if root_type == "dict":
+            keys = structure.get("keys", [])
+            if "preview" in file:
+                json_previews[file_path] = {
+                    "type": "dict",
+                    "data": file.get("preview", {})
+                }
+            return f"- {file_path} (JSON object with keys: {', '.join(keys)})"
+        
+        return f"- {file_path} (JSON)"
+    
+    @staticmethod
+    def _csv_preview_lines(csv_previews: Dict[str, List[Dict[str, Any]]]) -> Iterator[str]:
+        """
+        Yield the CSV preview section line by line
+        
+        Args:
+            csv_previews: CSV preview rows by path
+            
+        Yields:
+            Prompt lines
+        """
+        for csv_path, preview_rows in csv_previews.items():
+            preview_count = len(preview_rows)
+            yield f"\n**CSV FILE DATA - {csv_path}:**"
+            yield f"Total rows to import: {preview_count}"
+            yield f"\n**YOU MUST GENERATE INSERT STATEMENTS FOR ALL {preview_count} ROWS BELOW:**\n"
+            
+            # Show ALL rows, not just first few
+            for i, row in enumerate(preview_rows, 1):
+                row_str = ", ".join(f"{k}={v}" for k, v in row.items())
+                yield f"  Row {i}: {row_str}"
+            
+            yield f"\n**IMPORTANT: All {preview_count} rows above MUST be included in your INSERT statements!**"
+    
+    @staticmethod
+    def _json_preview_lines(json_previews: Dict[str, Dict[str, Any]]) -> Iterator[str]:
+        """
+        Yield the JSON preview section line by line
+        
+        Args:
+            json_previews: JSON preview info by path
+            
+        Yields:
+            Prompt lines
+        """
+        for json_path, json_info in json_previews.items():
+            json_type = json_info.get("type")
+            
+            if json_type == "array":
+                data = json_info.get("data", [])
+                total_items = json_info.get("total_items", len(data))
+                preview_count = json_info.get("preview_count", len(data))
+                
+                yield f"\n**JSON FILE DATA - {json_path}:**"
+                yield f"Total items: {total_items}"
+                yield f"\n**YOU MUST USE THE EXACT DATA FROM ALL {preview_count} ITEMS BELOW:**\n"
+                
+                # Show ALL items; string values are quoted
+                for i, item in enumerate(data, 1):
+                    item_str = ", ".join(
+                        f"{key}: '{value}'" if isinstance(value, str) else f"{key}: {value}"
+                        for key, value in item.items()
+                    )
+                    yield f"  Item {i}: {{{item_str}}}"
+                
+                yield f"\n**IMPORTANT: All {preview_count} items above MUST be used with their EXACT field values!**"
+                yield "**DO NOT invent product names, categories, or prices - use ONLY the data shown above!**"
+                
+            elif json_type == "dict":
+                yield f"\n**JSON FILE DATA - {json_path}:**"
+                yield json.dumps(json_info.get("data", {}), indent=2, ensure_ascii=False)
+    
     @staticmethod
     def build_user_prompt(user_request: str) -> str:
         """
@@ -578,8 +880,7 @@ class ResponseParser:
             Parsed JSON dictionary or None
         """
         # Remove markdown code blocks if present
-        text = re.sub(r'```json\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
+        text = _CODE_FENCE_PATTERN.sub('', text)
         
         # Try direct JSON parse first
         try:
@@ -587,61 +888,25 @@ class ResponseParser:
         except json.JSONDecodeError:
             pass
         
-        # Try to find JSON object using bracket matching
-        # Look for outermost { ... } pair
+        # Decode the first JSON object in the text, ignoring anything after it
         start_idx = text.find('{')
         if start_idx == -1:
             logger.warning("No opening brace found in response")
             return None
         
-        # Match brackets to find the complete JSON
-        bracket_count = 0
-        in_string = False
-        escape_next = False
-        end_idx = -1
-        
-        for i in range(start_idx, len(text)):
-            char = text[i]
-            
-            if escape_next:
-                escape_next = False
-                continue
-            
-            if char == '\\':
-                escape_next = True
-                continue
-            
-            if char == '"':
-                in_string = not in_string
-                continue
-            
-            if not in_string:
-                if char == '{':
-                    bracket_count += 1
-                elif char == '}':
-                    bracket_count -= 1
-                    if bracket_count == 0:
-                        end_idx = i + 1
-                        break
-        
-        if end_idx == -1:
-            logger.warning("Could not find matching closing brace")
-            return None
-        
-        json_str = text[start_idx:end_idx]
-        
         try:
-            data = json.loads(json_str)
-            if "pipeline" in data:
-                logger.info("Successfully extracted JSON with 'pipeline' key")
-                return data
-            else:
-                logger.warning("Extracted JSON but no 'pipeline' key found")
-                return None
+            data, _ = _JSON_DECODER.raw_decode(text, start_idx)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse extracted JSON: {e}")
-            logger.debug(f"Attempted to parse: {json_str[:200]}...")
+            logger.debug(f"Attempted to parse: {text[start_idx:start_idx + 200]}...")
             return None
+        
+        if "pipeline" in data:
+            logger.info("Successfully extracted JSON with 'pipeline' key")
+            return data
+        
+        logger.warning("Extracted JSON but no 'pipeline' key found")
+        return None
     
     @staticmethod
     def _validate_structure(json_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -771,7 +1036,6 @@ class PipelineValidator:
                 preview = file.get("preview", "")
                 if preview:
                     try:
-                        import json
                         data = json.loads(preview)
                         if isinstance(data, list) and len(data) > 0:
                             # Get fields from first object
@@ -783,7 +1047,7 @@ class PipelineValidator:
                     except:
                         pass
         
-        self.allowed_commands = set(settings.ALLOWED_BASH_COMMANDS)
+        self.allowed_commands = settings.ALLOWED_BASH_COMMANDS
         
         logger.info(f"Validator initialized with {len(self.table_names)} tables, "
                    f"{len(self.file_paths)} files, {len(self.allowed_commands)} allowed commands")
@@ -1241,12 +1505,15 @@ class LLMPipelineService:
     Main service orchestrating LLM pipeline generation workflow
     """
     
-    def __init__(self):
+    def __init__(self, mcp_manager: Optional[MCPContextManager] = None):
         """
         Initialize LLM pipeline service
+        
+        Args:
+            mcp_manager: Context manager to share (creates one if None)
         """
         self.gemini_client = GeminiClient()
-        self.mcp_manager = MCPContextManager()
+        self.mcp_manager = mcp_manager or MCPContextManager()
         
         logger.info("LLM Pipeline Service initialized")
     
@@ -1293,7 +1560,9 @@ class LLMPipelineService:
             
             # Step 3: Call Gemini API
             logger.info("Calling Gemini API")
-            api_response = self.gemini_client.generate_content(complete_prompt)
+            api_response = await asyncio.to_thread(
+                self.gemini_client.generate_content, complete_prompt
+            )
             
             if not api_response["success"]:
                 return {
@@ -1335,6 +1604,10 @@ class LLMPipelineService:
                     "warnings": validation_result.get("warnings", [])
                 }
             
+            # Only responses that produced a valid pipeline are reused
+            if not api_response.get("cached"):
+                self.gemini_client.cache_response(complete_prompt, api_response["response"])
+            
             # Step 6: Save to database
             logger.info("Saving pipeline to database")
             pipeline_id = await self._save_pipeline_to_database(
@@ -1363,6 +1636,27 @@ class LLMPipelineService:
                 "error_type": "internal_error"
             }
     
+    async def save_pipeline(
+        self,
+        user_id: int,
+        prompt_text: str,
+        pipeline: List[Dict[str, Any]],
+        mcp_context: Dict[str, Any]
+    ) -> int:
+        """
+        Persist an already generated pipeline (e.g. served from cache)
+        
+        Args:
+            user_id: User identifier
+            prompt_text: Original user prompt
+            pipeline: Pipeline steps
+            mcp_context: MCP context the pipeline was generated against
+            
+        Returns:
+            Pipeline ID
+        """
+        return await self._save_pipeline_to_database(user_id, prompt_text, pipeline, mcp_context)
+    
     async def _save_pipeline_to_database(
         self,
         user_id: int,
@@ -1382,8 +1676,6 @@ class LLMPipelineService:
         Returns:
             Pipeline ID
         """
-        from app.core.database import get_db
-        
         async with get_db() as db:
             # Insert pipeline record
             cursor = await db.execute(
@@ -1426,8 +1718,8 @@ class LLMPipelineService:
                 """,
                 (
                     pipeline_id,
-                    json.dumps(mcp_context.get("database", {})),
-                    json.dumps(mcp_context.get("filesystem", {})),
+                    encode_snapshot(mcp_context.get("database", {})),
+                    encode_snapshot(mcp_context.get("filesystem", {})),
                     datetime.now().isoformat()
                 )
             )
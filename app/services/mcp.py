@@ -12,7 +12,7 @@ from datetime import datetime
 import logging
 
 from app.core.config import settings
-from app.core.database import get_db_path
+from app.core.database import get_db_path, pool
 
 logger = logging.getLogger(__name__)
 
@@ -131,6 +131,71 @@ def get_database_schema(db_path: Optional[str] = None) -> Dict[str, Any]:
         }
 
 
+async def _read_tables_async(db: aiosqlite.Connection) -> List[Dict[str, Any]]:
+    """
+    Read table, column and foreign key metadata over an open connection
+    
+    Args:
+        db: Open aiosqlite connection
+        
+    Returns:
+        List of table metadata dictionaries
+    """
+    # Get all user tables
+    async with db.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' 
+        AND name NOT LIKE 'sqlite_%'
+        ORDER BY name
+    """) as cursor:
+        rows = await cursor.fetchall()
+        table_names = [row[0] for row in rows]
+    
+    tables = []
+    for table_name in table_names:
+        table_info = {
+            "name": table_name,
+            "columns": [],
+            "primary_keys": [],
+            "foreign_keys": []
+        }
+        
+        # Get column information
+        async with db.execute(f"PRAGMA table_info({table_name})") as cursor:
+            columns_info = await cursor.fetchall()
+        
+        for col in columns_info:
+            column = {
+                "name": col[1],
+                "type": col[2],
+                "nullable": not bool(col[3]),
+                "primary_key": bool(col[5]),
+                "default_value": col[4]
+            }
+            table_info["columns"].append(column)
+            
+            if col[5]:
+                table_info["primary_keys"].append(col[1])
+        
+        # Get foreign key information
+        async with db.execute(f"PRAGMA foreign_key_list({table_name})") as cursor:
+            fk_info = await cursor.fetchall()
+        
+        for fk in fk_info:
+            foreign_key = {
+                "column": fk[3],
+                "referenced_table": fk[2],
+                "referenced_column": fk[4],
+                "on_update": fk[5] or "NO ACTION",
+                "on_delete": fk[6] or "NO ACTION"
+            }
+            table_info["foreign_keys"].append(foreign_key)
+        
+        tables.append(table_info)
+    
+    return tables
+
+
 async def get_database_schema_async(db_path: Optional[str] = None) -> Dict[str, Any]:
     """
     Extract complete database schema metadata asynchronously
@@ -145,63 +210,18 @@ async def get_database_schema_async(db_path: Optional[str] = None) -> Dict[str,
         db_path = get_db_path()
     
     try:
-        async with aiosqlite.connect(db_path) as db:
-            # Get all user tables
-            async with db.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' 
-                AND name NOT LIKE 'sqlite_%'
-                ORDER BY name
-            """) as cursor:
-                rows = await cursor.fetchall()
-                table_names = [row[0] for row in rows]
-            
-            tables = []
-            for table_name in table_names:
-                table_info = {
-                    "name": table_name,
-                    "columns": [],
-                    "primary_keys": [],
-                    "foreign_keys": []
-                }
-                
-                # Get column information
-                async with db.execute(f"PRAGMA table_info({table_name})") as cursor:
-                    columns_info = await cursor.fetchall()
-                
-                for col in columns_info:
-                    column = {
-                        "name": col[1],
-                        "type": col[2],
-                        "nullable": not bool(col[3]),
-                        "primary_key": bool(col[5]),
-                        "default_value": col[4]
-                    }
-                    table_info["columns"].append(column)
-                    
-                    if col[5]:
-                        table_info["primary_keys"].append(col[1])
-                
-                # Get foreign key information
-                async with db.execute(f"PRAGMA foreign_key_list({table_name})") as cursor:
-                    fk_info = await cursor.fetchall()
-                
-                for fk in fk_info:
-                    foreign_key = {
-                        "column": fk[3],
-                        "referenced_table": fk[2],
-                        "referenced_column": fk[4],
-                        "on_update": fk[5] or "NO ACTION",
-                        "on_delete": fk[6] or "NO ACTION"
-                    }
-                    table_info["foreign_keys"].append(foreign_key)
-                
-                tables.append(table_info)
-            
-            result = {"tables": tables}
-            logger.info(f"Extracted schema for {len(tables)} tables (async)")
-            return result
-            
+        # The app's pool already holds warm connections to the main database
+        if pool.serves(db_path):
+            async with pool.connection() as db:
+                tables = await _read_tables_async(db)
+        else:
+            async with aiosqlite.connect(db_path) as db:
+                tables = await _read_tables_async(db)
+        
+        result = {"tables": tables}
+        logger.info(f"Extracted schema for {len(tables)} tables (async)")
+        return result
+        
     except Exception as e:
         logger.error(f"Error extracting database schema (async): {e}")
         return {
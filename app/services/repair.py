@@ -3,6 +3,7 @@ Error Detection & Repair Loop Module
 Automatically detects, analyzes, and repairs pipeline execution failures
 """
 import re
+import json
 import time
 import sqlite3
 import hashlib
@@ -14,11 +15,15 @@ from enum import Enum
 import google.genai as genai
 
 from app.core.config import settings
-from app.core.database import get_db_path
+from app.core.database import get_db_path, decode_snapshot
 from app.services.llm import GeminiClient
 
 logger = logging.getLogger(__name__)
 
+# Shell words accepted at the start of a line in a bash fix on top of the
+# command whitelist
+FIX_SHELL_KEYWORDS = frozenset({'echo', 'set', 'if', 'then', 'fi', 'for', 'while', 'done'})
+
 
 class ErrorCategory(Enum):
     """Error classification categories"""
@@ -284,9 +289,8 @@ class ErrorAnalyzer:
         row = cursor.fetchone()
         
         if row:
-            import json
-            database_schema = json.loads(row["db_structure"])
-            file_list = json.loads(row["file_list"])
+            database_schema = decode_snapshot(row["db_structure"])
+            file_list = decode_snapshot(row["file_list"])
         else:
             database_schema = {}
             file_list = []
@@ -337,8 +341,9 @@ class RepairModule:
         # Build repair prompt
         prompt = self._build_repair_prompt(error_report, context)
         
-        # Call Gemini API
-        api_response = self.gemini_client.generate_content(prompt)
+        # Call Gemini API; an unchanged error and context rebuild the same
+        # prompt, so a cached answer would just repeat the rejected fix
+        api_response = self.gemini_client.generate_content(prompt, use_cache=False)
         
         if not api_response["success"]:
             return {
@@ -429,7 +434,7 @@ Database Tables:
 Data Files:
 {files_text}
 
-Allowed Shell Commands: {', '.join(settings.ALLOWED_BASH_COMMANDS)}
+Allowed Shell Commands: {', '.join(sorted(settings.ALLOWED_BASH_COMMANDS))}
 
 User Request: {context.pipeline_prompt}
 
@@ -472,8 +477,6 @@ IMPORTANT:
             Dictionary with parsing result
         """
         try:
-            import json
-            
             # Remove markdown code blocks
             text = re.sub(r'```json\s*', '', response_text)
             text = re.sub(r'```\s*', '', text)
@@ -564,6 +567,7 @@ IMPORTANT:
         # Type-specific validation
         if step_type == "bash":
             # Check for prohibited commands
+            allowed_commands = settings.ALLOWED_BASH_COMMANDS | FIX_SHELL_KEYWORDS
             lines = patched_code.split('\n')
             for line in lines:
                 line = line.strip()
@@ -573,7 +577,7 @@ IMPORTANT:
                 tokens = line.split()
                 if tokens:
                     command = tokens[0]
-                    if command not in settings.ALLOWED_BASH_COMMANDS and command not in ['echo', 'set', 'if', 'then', 'fi', 'for', 'while', 'done']:
+                    if command not in allowed_commands:
                         return False, f"Prohibited command in fix: {command}"
         
         elif step_type == "sql":
@@ -635,7 +639,8 @@ class RepairLoop:
     def repair_and_retry(
         self,
         pipeline_id: int,
-        execution_log_id: int
+        execution_log_id: int,
+        max_attempts: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Execute repair loop for failed pipeline
@@ -643,6 +648,7 @@ class RepairLoop:
         Args:
             pipeline_id: Pipeline identifier
             execution_log_id: Failed execution log ID
+            max_attempts: Attempt limit for this call (uses self.max_attempts if None)
             
         Returns:
             Dictionary with repair result
@@ -659,15 +665,16 @@ class RepairLoop:
         
         # Check current attempt count
         current_attempts = self._get_repair_attempt_count(pipeline_id)
+        max_attempts = max_attempts or self.max_attempts
         
-        if current_attempts >= self.max_attempts:
-            logger.error(f"Maximum repair attempts ({self.max_attempts}) already reached")
+        if current_attempts >= max_attempts:
+            logger.error(f"Maximum repair attempts ({max_attempts}) already reached")
             self._mark_pipeline_failed(pipeline_id)
             return {
                 "success": False,
                 "attempts": current_attempts,
                 "final_status": "failed",
-                "error": f"Maximum repair attempts ({self.max_attempts}) exceeded"
+                "error": f"Maximum repair attempts ({max_attempts}) exceeded"
             }
         
         # Analyze error
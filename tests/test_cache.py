@@ -0,0 +1,251 @@
+"""
+Unit tests for the in-process caches
+"""
+import pytest
+
+from app.services.cache import (
+    TTLCache,
+    LLMCache,
+    SemanticCache,
+    context_fingerprint,
+    context_identifiers,
+    prompt_literals,
+    embed_text,
+    cosine_similarity
+)
+
+
+@pytest.fixture
+def cache():
+    """Create a semantic cache with explicit settings"""
+    return SemanticCache(threshold=0.92, ttl_seconds=60, max_entries=2)
+
+
+class TestTTLCache:
+    """Tests for TTLCache"""
+
+    def test_get_set(self):
+        """Test stored values are returned"""
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set(("a", 1), "page")
+
+        assert cache.get(("a", 1)) == "page"
+        assert cache.get(("b", 1)) is None
+
+    def test_expiry(self):
+        """Test expired values are dropped"""
+        cache = TTLCache(maxsize=2, ttl_seconds=0)
+        cache.set("key", "value")
+
+        assert cache.get("key") is None
+
+    def test_lru_eviction(self):
+        """Test least recently used entry is evicted when full"""
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_clear(self):
+        """Test clear empties the cache"""
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.clear()
+
+        assert cache.get("a") is None
+
+
+class TestLLMCache:
+    """Tests for LLMCache"""
+
+    def test_get_set(self):
+        """Test a stored response is returned for the same key"""
+        cache = LLMCache(max_entries=2, ttl_seconds=60)
+        key = LLMCache.cache_key("model", 1024, "prompt")
+        cache.set(key, "response")
+
+        assert cache.get(key) == "response"
+
+    def test_key_covers_request_parameters(self):
+        """Test model, token limit and prompt all change the key"""
+        key = LLMCache.cache_key("model", 1024, "prompt")
+
+        assert key == LLMCache.cache_key("model", 1024, "prompt")
+        assert key != LLMCache.cache_key("other", 1024, "prompt")
+        assert key != LLMCache.cache_key("model", 2048, "prompt")
+        assert key != LLMCache.cache_key("model", 1024, "prompt!")
+
+    def test_disabled(self):
+        """Test max_entries=0 stores nothing"""
+        cache = LLMCache(max_entries=0, ttl_seconds=60)
+        cache.set("key", "response")
+
+        assert cache.get("key") is None
+
+
+class TestContextFingerprint:
+    """Tests for MCP context hashing"""
+
+    def test_ignores_metadata(self):
+        """Test that volatile metadata does not change the hash"""
+        context1 = {"database": {"tables": []}, "metadata": {"context_generated_at": "a"}}
+        context2 = {"database": {"tables": []}, "metadata": {"context_generated_at": "b"}}
+
+        assert context_fingerprint(context1) == context_fingerprint(context2)
+
+    def test_ignores_scan_timestamp(self):
+        """Test that filesystem scan time does not change the hash"""
+        context1 = {"filesystem": {"files": [], "scan_timestamp": "a"}}
+        context2 = {"filesystem": {"files": [], "scan_timestamp": "b"}}
+
+        assert context_fingerprint(context1) == context_fingerprint(context2)
+
+    def test_schema_change_changes_hash(self):
+        """Test that a different schema produces a different hash"""
+        context1 = {"database": {"tables": [{"name": "users"}]}}
+        context2 = {"database": {"tables": [{"name": "orders"}]}}
+
+        assert context_fingerprint(context1) != context_fingerprint(context2)
+
+
+class TestEmbedding:
+    """Tests for prompt embedding"""
+
+    def test_identical_prompts(self):
+        """Test identical prompts have similarity 1"""
+        vector = embed_text("Import inventory.json into products table")
+        assert cosine_similarity(vector, vector) == pytest.approx(1.0)
+
+    def test_empty_prompt(self):
+        """Test empty prompt produces empty vector"""
+        assert embed_text("") == {}
+
+
+class TestPromptLiterals:
+    """Tests for prompt_literals and context_identifiers"""
+
+    def test_extracts_literals_in_order(self):
+        """Test numbers, quoted strings, file names, operators and known names are kept"""
+        literals = prompt_literals(
+            "Load data/sales.csv into Sales where region = 'EU' and amount > 2.5",
+            {"sales", "amount"}
+        )
+
+        assert literals == ("data/sales.csv", "sales", "=", "EU", "amount", ">", "2.5")
+
+    def test_operators_and_negations(self):
+        """Test comparison operators and negations are kept and normalized"""
+        assert prompt_literals("a == b and c <> d or e >= f") == ("=", "!=", ">=")
+        assert prompt_literals("Never copy rows without an id, except drafts") == ("never", "without", "except")
+        assert prompt_literals("Don't import rows that aren't valid") == ("not", "not")
+
+    def test_context_identifiers(self):
+        """Test table, column and file names are collected lowercased"""
+        context = {
+            "database": {"tables": [{"name": "Orders", "columns": [{"name": "Amount"}]}]},
+            "filesystem": {"files": [{"path": "data/Sales.csv"}]}
+        }
+
+        assert context_identifiers(context) == {"orders", "amount", "data/sales.csv", "sales.csv"}
+
+
+class TestSemanticCache:
+    """Tests for SemanticCache"""
+
+    def test_hit_on_near_duplicate(self, cache):
+        """Test a reworded prompt is served from cache"""
+        cache.store("Import inventory.json into products table", "ctx", "payload")
+
+        assert cache.lookup("import inventory.json into the products table", "ctx") == "payload"
+
+    def test_miss_on_different_table(self, cache):
+        """Test prompts targeting different tables do not collide"""
+        cache.store("Delete all rows from users table", "ctx", "payload")
+
+        assert cache.lookup("Delete all rows from orders table", "ctx") is None
+
+    def test_miss_on_different_literal(self, cache):
+        """Test prompts differing only in a literal never share a pipeline"""
+        pairs = [
+            ("Select rows from users where age > 30", "Select rows from users where age > 40"),
+            ("Import data/sales.csv into Sales", "Import data/sales.csv into Sales2"),
+            ("Delete users named 'Alice'", "Delete users named 'Alicia'"),
+            ("Import data/a.csv into products", "Import data/b.csv into products"),
+        ]
+        for stored, query in pairs:
+            cache.clear()
+            cache.store(stored, "ctx", "payload")
+
+            assert cache.lookup(query, "ctx") is None
+
+    def test_miss_on_different_operator_or_negation(self, cache):
+        """Test prompts differing only in an operator or a negation never share a pipeline"""
+        pairs = [
+            ("Delete sales rows where region = EU", "Delete sales rows where region != EU"),
+            ("Select orders where amount > price", "Select orders where amount < price"),
+            ("Select users whose status is active", "Select users whose status is not active"),
+            (
+                "Create the products table and import data",
+                "Create the products table and do not import data"
+            ),
+        ]
+        for stored, query in pairs:
+            cache.clear()
+            cache.store(stored, "ctx", "payload")
+
+            assert cache.lookup(query, "ctx") is None
+            assert cache.lookup(stored, "ctx") == "payload"
+
+    def test_miss_on_different_schema_name(self, cache):
+        """Test known table names must match exactly"""
+        identifiers = frozenset({"sales", "orders"})
+        cache.store("Copy every row from sales", "ctx", "payload", identifiers)
+
+        assert cache.lookup("Copy every row from orders", "ctx", identifiers) is None
+        assert cache.lookup("copy every row from Sales", "ctx", identifiers) == "payload"
+
+    def test_scoped_by_context(self, cache):
+        """Test entries are not shared across contexts"""
+        cache.store("Import inventory.json into products table", "ctx1", "payload")
+
+        assert cache.lookup("Import inventory.json into products table", "ctx2") is None
+
+    def test_ttl_expiry(self):
+        """Test expired entries are not returned"""
+        cache = SemanticCache(threshold=0.92, ttl_seconds=0, max_entries=2)
+        cache.store("Import inventory.json into products table", "ctx", "payload")
+
+        assert cache.lookup("Import inventory.json into products table", "ctx") is None
+
+    def test_expired_bucket_removed(self):
+        """Test a context bucket is dropped once all its entries expire"""
+        cache = SemanticCache(threshold=0.92, ttl_seconds=0, max_entries=2)
+        cache.store("Import inventory.json into products table", "ctx", "payload")
+        cache.lookup("Import inventory.json into products table", "ctx")
+
+        assert cache._buckets == {}
+
+    def test_max_contexts(self):
+        """Test the least recently stored context is evicted beyond max_contexts"""
+        cache = SemanticCache(threshold=0.92, ttl_seconds=60, max_entries=2, max_contexts=2)
+        cache.store("Import a.csv into alpha table", "ctx1", 1)
+        cache.store("Import b.csv into beta table", "ctx2", 2)
+        cache.store("Import c.csv into gamma table", "ctx1", 3)
+        cache.store("Import d.csv into delta table", "ctx3", 4)
+
+        assert set(cache._buckets) == {"ctx1", "ctx3"}
+        assert cache.lookup("Import a.csv into alpha table", "ctx1") == 1
+
+    def test_max_entries(self, cache):
+        """Test oldest entries are evicted beyond max_entries"""
+        cache.store("Import a.csv into alpha table", "ctx", 1)
+        cache.store("Import b.csv into beta table", "ctx", 2)
+        cache.store("Import c.csv into gamma table", "ctx", 3)
+
+        assert cache.lookup("Import a.csv into alpha table", "ctx") is None
+        assert cache.lookup("Import c.csv into gamma table", "ctx") == 3
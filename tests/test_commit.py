@@ -5,16 +5,21 @@ Tests ValidationEngine, SnapshotManager, CommitService
 import pytest
 import sqlite3
 import os
+import hashlib
+import subprocess
 import tempfile
+import time
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
 from app.services.commit import (
     ValidationEngine, SnapshotManager, CommitService,
     DatabaseCommitter, FilesystemCommitter,
-    ValidationReport, CommitResult, CommitStatus
+    ValidationReport, CommitResult, CommitStatus,
+    split_sql_statements, run_bash_bounded
 )
-from app.core.database import get_db_path, init_database
+from app.core.database import get_db_path, init_database, connect_sync
+from app.services import commit as commit_module
 
 
 @pytest.fixture
@@ -147,6 +152,25 @@ class TestValidationEngine:
         assert len(report.warnings) > 0
         assert any("DROP TABLE" in warning for warning in report.warnings)
 
+    def test_risk_assessment_lowercase_keywords(self, setup_database):
+        """Test destructive keywords are detected regardless of case"""
+        pipeline_id = setup_database
+
+        conn = sqlite3.connect(get_db_path())
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO Pipeline_Steps (pipeline_id, step_number, code_type, script_content)
+            VALUES (?, 2, 'sql', 'truncate logs; delete from staging')
+        """, (pipeline_id,))
+        conn.commit()
+        conn.close()
+
+        engine = ValidationEngine()
+        report = engine.validate_for_commit(pipeline_id)
+
+        assert "Pipeline contains TRUNCATE operation" in report.warnings
+        assert "Pipeline contains DELETE without WHERE clause" in report.warnings
+
 
 class TestSnapshotManager:
     """Test snapshot creation and retrieval"""
@@ -193,6 +217,92 @@ class TestSnapshotManager:
         assert 'db_structure' in snapshot
         assert 'file_list' in snapshot
 
+    def test_create_snapshot_with_context(self, setup_database):
+        """Test a supplied context is stored without querying MCP"""
+        pipeline_id = setup_database
+        manager = SnapshotManager()
+        manager.mcp = Mock()
+        context = {"database": {"tables": []}, "filesystem": {"files": []}}
+        
+        snapshot_id = manager.create_snapshot(pipeline_id, context=context)
+        snapshot = manager.get_snapshot(snapshot_id)
+        
+        manager.mcp.get_full_context.assert_not_called()
+        assert snapshot["db_structure"] == {"tables": []}
+        assert snapshot["file_list"] == {"files": []}
+    
+    def test_snapshot_db_file(self, setup_database, tmp_path):
+        """Test the database is copied to a standalone snapshot file"""
+        pipeline_id = setup_database
+        manager = SnapshotManager()
+        manager.snapshot_directory = tmp_path
+        
+        snapshot_path = manager.snapshot_db_file(pipeline_id)
+        
+        conn = sqlite3.connect(snapshot_path)
+        row = conn.execute("SELECT prompt_text FROM Pipelines WHERE id = ?", (pipeline_id,)).fetchone()
+        conn.close()
+        
+        assert snapshot_path.startswith(str(tmp_path))
+        assert row == ("Test pipeline",)
+
+
+class TestSplitSqlStatements:
+    """Test SQL script splitting"""
+    
+    def test_semicolon_in_string(self):
+        """Test semicolons inside literals do not split statements"""
+        statements = split_sql_statements("INSERT INTO t VALUES ('a;b'); SELECT 1")
+        
+        assert statements == ["INSERT INTO t VALUES ('a;b');", "SELECT 1"]
+    
+    def test_trigger_body(self):
+        """Test trigger bodies stay in one statement"""
+        script = "CREATE TRIGGER tr AFTER INSERT ON t BEGIN UPDATE t SET a = 1; END;"
+        
+        assert split_sql_statements(script) == [script]
+    
+    def test_empty_statements_skipped(self):
+        """Test stray semicolons produce no statements"""
+        assert split_sql_statements("SELECT 1;; ;") == ["SELECT 1;"]
+
+
+class TestRunBashBounded:
+    """Test bounded bash execution"""
+    
+    def test_captures_output(self, tmp_path):
+        """Test output and exit code are returned"""
+        result = run_bash_bounded("echo out; echo err >&2; exit 3", cwd=str(tmp_path), timeout=5)
+        
+        assert result.returncode == 3
+        assert result.stdout == b"out\n"
+        assert result.stderr == b"err\n"
+    
+    def test_timeout_kills_children(self, tmp_path):
+        """Test commands started by a timed out script are killed too"""
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_bash_bounded("sleep 1; touch late.txt", cwd=str(tmp_path), timeout=0.2)
+        time.sleep(1.2)
+        
+        assert not (tmp_path / "late.txt").exists()
+    
+    def test_timeout_without_process_groups(self, tmp_path, monkeypatch):
+        """Test the timeout still kills bash where killpg is unavailable"""
+        monkeypatch.delattr(commit_module.os, "killpg")
+        
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_bash_bounded("exec sleep 5", cwd=str(tmp_path), timeout=0.2)
+    
+    def test_timeout_group_already_gone(self, tmp_path, monkeypatch):
+        """Test a vanished process group falls back to killing the process"""
+        def missing_group(pid, sig):
+            raise ProcessLookupError(pid)
+        
+        monkeypatch.setattr(commit_module.os, "killpg", missing_group)
+        
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_bash_bounded("exec sleep 5", cwd=str(tmp_path), timeout=0.2)
+
 
 class TestDatabaseCommitter:
     """Test database commit operations"""
@@ -233,6 +343,52 @@ class TestDatabaseCommitter:
         
         assert success == True
         assert error is None
+    
+    def test_transaction_control_lines_removed(self, setup_database):
+        """Test scripts wrapped in their own transaction still commit"""
+        pipeline_id = setup_database
+        
+        conn = sqlite3.connect(get_db_path())
+        step_id = conn.execute(
+            "SELECT id FROM Pipeline_Steps WHERE pipeline_id = ?", (pipeline_id,)
+        ).fetchone()[0]
+        conn.close()
+        
+        committer = DatabaseCommitter()
+        success, error = committer.commit_sql_operations(pipeline_id, [{
+            "id": step_id,
+            "script_content": "-- Transaction wrapper\nBEGIN TRANSACTION;\nCREATE TEMP TABLE tx_check (a INTEGER);\ncommit;"
+        }])
+        
+        assert success == True
+        assert error is None
+    
+    def test_failed_sql_step_is_logged(self, setup_database):
+        """Test the failure log survives the transaction rollback"""
+        pipeline_id = setup_database
+        
+        conn = sqlite3.connect(get_db_path())
+        step_id = conn.execute(
+            "SELECT id FROM Pipeline_Steps WHERE pipeline_id = ?", (pipeline_id,)
+        ).fetchone()[0]
+        conn.close()
+        
+        committer = DatabaseCommitter()
+        success, error = committer.commit_sql_operations(pipeline_id, [
+            {"id": step_id, "script_content": "INSERT INTO missing_table VALUES (1)"}
+        ])
+        
+        conn = sqlite3.connect(get_db_path())
+        rows = conn.execute(
+            "SELECT stderr FROM Execution_Logs WHERE pipeline_id = ? AND is_successful = 0",
+            (pipeline_id,)
+        ).fetchall()
+        conn.close()
+        
+        assert success == False
+        assert "missing_table" in error
+        assert len(rows) == 1
+        assert "missing_table" in rows[0][0]
 
 
 class TestFilesystemCommitter:
@@ -260,11 +416,93 @@ class TestFilesystemCommitter:
         finally:
             os.unlink(temp_path)
     
+    def test_calculate_file_hash_without_file_digest(self, tmp_path, monkeypatch):
+        """Test the chunked fallback used before Python 3.11"""
+        file_path = tmp_path / "data.bin"
+        content = os.urandom(commit_module.HASH_CHUNK_SIZE * 2 + 17)
+        file_path.write_bytes(content)
+        monkeypatch.delattr(commit_module.hashlib, "file_digest", raising=False)
+        
+        hash_value = FilesystemCommitter()._calculate_file_hash(str(file_path))
+        
+        assert hash_value == hashlib.sha256(content).hexdigest()
+    
     def test_calculate_hash_nonexistent_file(self):
         """Test hash calculation for non-existent file"""
         committer = FilesystemCommitter()
         hash_value = committer._calculate_file_hash("/nonexistent/file.txt")
         assert hash_value is None
+    
+    def test_create_backup(self, tmp_path):
+        """Test backups hold the file content whether or not reflinks work"""
+        committer = FilesystemCommitter()
+        committer.backup_directory = tmp_path / "backups"
+        committer.backup_directory.mkdir()
+        source = tmp_path / "data.csv"
+        source.write_text("id,name\n1,a\n")
+        
+        backup_path = committer._create_backup(str(source))
+        source.write_text("changed")
+        
+        assert backup_path is not None
+        assert Path(backup_path).read_text() == "id,name\n1,a\n"
+        assert len(list(committer.backup_directory.iterdir())) == 1
+    
+    def test_create_backup_unique_names(self, tmp_path):
+        """Test back-to-back backups of one file get distinct names"""
+        committer = FilesystemCommitter()
+        committer.backup_directory = tmp_path / "backups"
+        committer.backup_directory.mkdir()
+        source = tmp_path / "data.csv"
+        source.write_text("v1")
+        
+        first = committer._create_backup(str(source))
+        source.write_text("v2")
+        second = committer._create_backup(str(source))
+        
+        assert first != second
+        assert Path(first).read_text() == "v1"
+        assert Path(second).read_text() == "v2"
+    
+    def test_commit_file_operations(self, setup_database, tmp_path):
+        """Test bash steps run in the data directory without script files"""
+        pipeline_id = setup_database
+        committer = FilesystemCommitter()
+        committer.data_directory = tmp_path
+        
+        success, error = committer.commit_file_operations(pipeline_id, [
+            {"id": 1, "script_content": "cat > /dev/null\necho done > out.txt"}
+        ])
+        
+        assert success == True
+        assert error is None
+        assert [p.name for p in tmp_path.iterdir()] == ["out.txt"]
+    
+    def test_commit_file_operations_failure(self, setup_database, tmp_path):
+        """Test set -e stops the script at the first failing command"""
+        pipeline_id = setup_database
+        committer = FilesystemCommitter()
+        committer.data_directory = tmp_path
+        
+        success, error = committer.commit_file_operations(pipeline_id, [
+            {"id": 1, "script_content": "false\necho done > out.txt"}
+        ])
+        
+        assert success == False
+        assert not (tmp_path / "out.txt").exists()
+    
+    def test_commit_file_operations_binary_output(self, setup_database, tmp_path):
+        """Test non-UTF-8 output does not fail the step"""
+        pipeline_id = setup_database
+        committer = FilesystemCommitter()
+        committer.data_directory = tmp_path
+        
+        success, error = committer.commit_file_operations(pipeline_id, [
+            {"id": 1, "script_content": "printf '\\377\\376'"}
+        ])
+        
+        assert success == True
+        assert error is None
 
 
 class TestCommitService:
@@ -318,6 +556,76 @@ class TestCommitService:
         assert result.pipeline_id == pipeline_id
         assert result.snapshot_id is not None
     
+    def test_commit_pipeline_single_connection(self, setup_database, monkeypatch):
+        """Test the commit workflow opens one connection for every stage"""
+        pipeline_id = setup_database
+        service = CommitService()
+        opened = []
+        
+        def counting_connect(db_path=None):
+            conn = connect_sync(db_path)
+            opened.append(conn)
+            return conn
+        
+        monkeypatch.setattr(commit_module, "connect_sync", counting_connect)
+        result = service.commit_pipeline(pipeline_id, force_commit=True)
+        
+        assert result.snapshot_id is not None
+        assert len(opened) == 1
+    
+    def test_commit_pipeline_without_steps(self, setup_database):
+        """Test a pipeline with no steps commits without a snapshot"""
+        pipeline_id = setup_database
+        
+        conn = sqlite3.connect(get_db_path())
+        conn.execute("DELETE FROM Pipeline_Steps WHERE pipeline_id = ?", (pipeline_id,))
+        conn.commit()
+        conn.close()
+        
+        service = CommitService()
+        result = service.commit_pipeline(pipeline_id, force_commit=True)
+        
+        conn = sqlite3.connect(get_db_path())
+        snapshots = conn.execute(
+            "SELECT COUNT(*) FROM Schema_Snapshots WHERE pipeline_id = ?", (pipeline_id,)
+        ).fetchone()[0]
+        conn.close()
+        
+        assert result.success == True
+        assert result.commit_status == CommitStatus.COMMITTED.value
+        assert result.snapshot_id is None
+        assert result.operations_performed["total_steps"] == 0
+        assert snapshots == 0
+    
+    def test_commit_pipeline_skips_bash_after_sql_failure(self, setup_database, tmp_path):
+        """Test bash steps do not run when the SQL phase rolls back"""
+        pipeline_id = setup_database
+        
+        conn = sqlite3.connect(get_db_path())
+        conn.execute("UPDATE Pipeline_Steps SET script_content = 'INSERT INTO missing_table VALUES (1)' WHERE pipeline_id = ?", (pipeline_id,))
+        conn.execute("""
+            INSERT INTO Pipeline_Steps (pipeline_id, step_number, code_type, script_content)
+            VALUES (?, 2, 'bash', 'echo done > out.txt')
+        """, (pipeline_id,))
+        conn.commit()
+        conn.close()
+        
+        service = CommitService()
+        service.fs_committer.data_directory = tmp_path
+        result = service.commit_pipeline(pipeline_id, force_commit=True)
+        
+        assert result.success == False
+        assert not (tmp_path / "out.txt").exists()
+    
+    def test_commit_pipeline_clears_context_cache(self, setup_database):
+        """Test the next commit snapshots fresh context"""
+        pipeline_id = setup_database
+        service = CommitService()
+        
+        service.commit_pipeline(pipeline_id, force_commit=True)
+        
+        assert service.snapshot_manager.mcp.get_cache_age_seconds() is None
+    
     def test_commit_result_to_dict(self):
         """Test CommitResult serialization"""
         result = CommitResult(
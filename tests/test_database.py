@@ -0,0 +1,278 @@
+"""
+Unit tests for database connection management
+"""
+import asyncio
+import pytest
+import os
+import sqlite3
+import tempfile
+
+from app.core import database
+from app.core.database import (
+    ConnectionPool,
+    connect_sync,
+    decode_snapshot,
+    encode_snapshot,
+    get_db,
+    init_database,
+    init_database_async,
+    verify_schema_async,
+    SCHEMA_VERSION
+)
+
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary test database"""
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+
+    yield db_path
+
+    for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+@pytest.mark.asyncio
+class TestConnectionPool:
+    """Tests for the async connection pool"""
+
+    async def test_connection_reused(self, temp_db):
+        """Test that a released connection is handed out again"""
+        pool = ConnectionPool(db_path=temp_db, size=2)
+
+        async with pool.connection() as conn1:
+            pass
+        async with pool.connection() as conn2:
+            pass
+
+        assert conn1 is conn2
+        await pool.close()
+
+    async def test_pool_size_bounded(self, temp_db):
+        """Test that no more than size connections are opened"""
+        pool = ConnectionPool(db_path=temp_db, size=2)
+
+        async with pool.connection():
+            async with pool.connection():
+                pass
+        async with pool.connection():
+            pass
+
+        assert len(pool._connections) == 2
+        await pool.close()
+
+    async def test_pool_size_bounded_concurrently(self, temp_db):
+        """Test concurrent acquires on an empty pool respect size"""
+        pool = ConnectionPool(db_path=temp_db, size=2)
+
+        async def borrow():
+            async with pool.connection():
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(borrow() for _ in range(6)))
+
+        assert len(pool._connections) == 2
+        await pool.close()
+
+    async def test_release_after_close(self, temp_db):
+        """Test a connection returned to a closed pool is closed"""
+        pool = ConnectionPool(db_path=temp_db, size=1)
+
+        conn = await pool.acquire()
+        await pool.close()
+        await pool.release(conn)
+
+        assert pool._connections == []
+        with pytest.raises(ValueError):
+            await conn.execute("SELECT 1")
+
+    async def test_commit_and_row_factory(self, temp_db):
+        """Test writes are committed and rows support key access"""
+        pool = ConnectionPool(db_path=temp_db, size=1)
+
+        async with pool.connection() as conn:
+            await conn.execute("INSERT INTO items (name) VALUES (?)", ("a",))
+
+        async with pool.connection() as conn:
+            cursor = await conn.execute("SELECT name FROM items")
+            row = await cursor.fetchone()
+
+        assert row['name'] == "a"
+        await pool.close()
+
+    async def test_serves(self, temp_db):
+        """Test serves() only matches the pool's database while open"""
+        pool = ConnectionPool(db_path=temp_db, size=1)
+
+        assert not pool.serves(temp_db)
+        await pool.open()
+        assert pool.serves(temp_db)
+        assert not pool.serves(temp_db + ".other")
+        await pool.close()
+        assert not pool.serves(temp_db)
+
+    async def test_acquire_release(self, temp_db):
+        """Test that released connections are handed out again"""
+        pool = ConnectionPool(db_path=temp_db, size=1)
+
+        conn1 = await pool.acquire()
+        await pool.release(conn1)
+        conn2 = await pool.acquire()
+        await pool.release(conn2)
+
+        assert conn1 is conn2
+        await pool.close()
+
+    async def test_rollback_on_error(self, temp_db):
+        """Test that a failing block is rolled back"""
+        pool = ConnectionPool(db_path=temp_db, size=1)
+
+        with pytest.raises(RuntimeError):
+            async with pool.connection() as conn:
+                await conn.execute("INSERT INTO items (name) VALUES (?)", ("b",))
+                raise RuntimeError("boom")
+
+        async with pool.connection() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM items")
+            row = await cursor.fetchone()
+
+        assert row[0] == 0
+        await pool.close()
+
+
+@pytest.mark.asyncio
+class TestGetDb:
+    """Tests for the get_db context manager"""
+
+    async def test_uses_shared_pool(self, temp_db, monkeypatch):
+        """Test that get_db borrows pooled connections"""
+        shared = ConnectionPool(db_path=temp_db, size=1)
+        monkeypatch.setattr(database, "pool", shared)
+
+        async with get_db() as db1:
+            await db1.execute("INSERT INTO items (name) VALUES (?)", ("c",))
+        async with get_db() as db2:
+            cursor = await db2.execute("SELECT name FROM items")
+            row = await cursor.fetchone()
+
+        assert db1 is db2
+        assert row['name'] == "c"
+        await shared.close()
+
+
+class TestConnectSync:
+    """Tests for tuned synchronous connections"""
+
+    def test_wal_and_sync(self, temp_db):
+        """Test connections use WAL with NORMAL sync"""
+        conn = connect_sync(temp_db)
+        try:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        finally:
+            conn.close()
+
+    def test_foreign_keys_untouched(self, temp_db):
+        """Test foreign key enforcement keeps the sqlite3 default"""
+        conn = connect_sync(temp_db)
+        try:
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 0
+        finally:
+            conn.close()
+
+
+class TestSnapshotCodec:
+    """Tests for Schema_Snapshots payload encoding"""
+
+    def test_round_trip(self):
+        """Test encoded payloads are compressed bytes that decode back"""
+        context = {"tables": [{"name": "users", "columns": ["id", "name"]}] * 50}
+        payload = encode_snapshot(context)
+
+        assert isinstance(payload, bytes)
+        assert len(payload) < len(str(context))
+        assert decode_snapshot(payload) == context
+
+    def test_legacy_text(self):
+        """Test plain JSON text from older rows is still decoded"""
+        assert decode_snapshot('{"tables": []}') == {"tables": []}
+
+
+class TestInitDatabase:
+    """Tests for schema initialization"""
+
+    def test_sets_user_version(self, temp_db, monkeypatch):
+        """Test that the schema version is recorded after init"""
+        monkeypatch.setattr(database.settings, "DATABASE_URL", f"sqlite:///{temp_db}")
+
+        init_database()
+
+        conn = sqlite3.connect(temp_db)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+
+        assert version == SCHEMA_VERSION
+
+    def test_skips_current_schema(self, temp_db, monkeypatch):
+        """Test that DDL is not re-run when the version matches"""
+        monkeypatch.setattr(database.settings, "DATABASE_URL", f"sqlite:///{temp_db}")
+        init_database()
+
+        conn = sqlite3.connect(temp_db)
+        conn.execute("DROP TABLE Filesystem_Changes")
+        conn.commit()
+        conn.close()
+
+        init_database()
+
+        conn = sqlite3.connect(temp_db)
+        row = conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'Filesystem_Changes'"
+        ).fetchone()
+        conn.close()
+
+        assert row is None
+
+
+@pytest.mark.asyncio
+class TestVerifySchemaAsync:
+    """Tests for async schema verification"""
+
+    async def test_valid_schema(self, temp_db, monkeypatch):
+        """Test that an initialized database passes"""
+        monkeypatch.setattr(database.settings, "DATABASE_URL", f"sqlite:///{temp_db}")
+        await init_database_async()
+        pool = ConnectionPool(db_path=temp_db, size=1)
+
+        async with pool.connection() as db:
+            assert await verify_schema_async(db) is True
+        await pool.close()
+
+    async def test_missing_tables(self, temp_db):
+        """Test that missing tables raise ValueError"""
+        pool = ConnectionPool(db_path=temp_db, size=1)
+
+        with pytest.raises(ValueError):
+            async with pool.connection() as db:
+                await verify_schema_async(db)
+        await pool.close()
+
+    async def test_missing_indexes(self, temp_db, monkeypatch):
+        """Test that a dropped index raises ValueError"""
+        monkeypatch.setattr(database.settings, "DATABASE_URL", f"sqlite:///{temp_db}")
+        await init_database_async()
+        pool = ConnectionPool(db_path=temp_db, size=1)
+
+        with pytest.raises(ValueError, match="indexes"):
+            async with pool.connection() as db:
+                await db.execute("DROP INDEX idx_pipelines_created")
+                await verify_schema_async(db)
+        await pool.close()
@@ -0,0 +1,28 @@
+"""
+Unit tests for the shared service providers
+"""
+import inspect
+
+import pytest
+
+from app.api.dependencies import (
+    get_mcp_manager,
+    get_commit_service,
+    provide_mcp_manager,
+    provide_commit_service
+)
+
+
+@pytest.mark.asyncio
+class TestProviders:
+    """Tests for the Depends() providers"""
+
+    async def test_providers_are_async(self):
+        """Test providers are coroutine functions so FastAPI skips the thread pool"""
+        assert inspect.iscoroutinefunction(provide_mcp_manager)
+        assert inspect.iscoroutinefunction(provide_commit_service)
+
+    async def test_providers_return_shared_instances(self):
+        """Test providers hand out the cached singletons"""
+        assert await provide_mcp_manager() is get_mcp_manager()
+        assert await provide_commit_service() is get_commit_service()
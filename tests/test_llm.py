@@ -1,6 +1,7 @@
 """
 Unit tests for LLM Pipeline Generator (Phase 2)
 """
+import asyncio
 import pytest
 import json
 from unittest.mock import Mock, patch, MagicMock
@@ -8,8 +9,10 @@ from app.services.llm import (
     GeminiClient,
     PromptBuilder,
     ResponseParser,
-    PipelineValidator
+    PipelineValidator,
+    LLMPipelineService
 )
+from app.services.cache import LLMCache
 
 
 class TestPromptBuilder:
@@ -79,7 +82,50 @@ class TestPromptBuilder:
         
         assert "Test task" in prompt
         assert "expert data pipeline generator" in prompt
+    
+    def test_static_prefix_shared_across_contexts(self):
+        """Test context-dependent text comes after the static instructions"""
+        empty_context = {
+            "database": {"tables": []},
+            "filesystem": {"files": []}
+        }
+        orders_context = {
+            "database": {
+                "tables": [
+                    {"name": "orders", "columns": [{"name": "id", "type": "INTEGER"}]}
+                ]
+            },
+            "filesystem": {"files": []}
+        }
+        
+        first = PromptBuilder.build_system_prompt(empty_context)
+        second = PromptBuilder.build_system_prompt(orders_context)
+        prefix = first[:first.index("AVAILABLE RESOURCES:")]
+        
+        assert second.startswith(prefix)
+        assert "RULES:" in prefix
+        assert "orders" not in prefix
 
+    
+    def test_build_system_prompt_cached(self):
+        """Test an unchanged context reuses the rendered prompt"""
+        mcp_context = {
+            "database": {"tables": [{"name": "cached_orders", "columns": []}]},
+            "filesystem": {"files": [], "scan_timestamp": "t1"}
+        }
+        
+        with patch.object(
+            PromptBuilder, '_render_system_prompt', wraps=PromptBuilder._render_system_prompt
+        ) as render:
+            first = PromptBuilder.build_system_prompt(mcp_context)
+            rescanned = {**mcp_context, "filesystem": {"files": [], "scan_timestamp": "t2"}}
+            second = PromptBuilder.build_system_prompt(rescanned)
+            changed = {**mcp_context, "database": {"tables": [{"name": "new_orders", "columns": []}]}}
+            third = PromptBuilder.build_system_prompt(changed)
+        
+        assert second == first
+        assert "cached_orders" not in third
+        assert render.call_count == 2
 
 class TestResponseParser:
     """Test response parsing"""
@@ -122,6 +168,16 @@ class TestResponseParser:
         assert result["success"] is True
         assert len(result["pipeline"]) == 1
     
+    def test_parse_json_with_surrounding_text(self):
+        """Test the JSON object is found between explanatory text"""
+        step = {"step_number": 1, "type": "bash", "content": "echo '{not} \"json\"'"}
+        response_text = "Here is the pipeline:\n" + json.dumps({"pipeline": [step]}) + "\nLet me know {if} needed."
+        
+        result = ResponseParser.parse_response(response_text)
+        
+        assert result["success"] is True
+        assert result["pipeline"][0]["content"] == step["content"]
+    
     def test_parse_missing_pipeline_key(self):
         """Test parsing JSON without pipeline key"""
         response_text = json.dumps({"data": []})
@@ -320,6 +376,142 @@ class TestGeminiClient:
             assert result["success"] is True
             assert "response" in result
     
+    @patch('app.services.llm.genai.Client')
+    def test_generate_content_cached(self, mock_client_class):
+        """Test only responses stored via cache_response are replayed"""
+        mock_response = Mock()
+        mock_response.text = '{"pipeline": []}'
+        mock_client = mock_client_class.return_value
+        mock_client.models.generate_content.return_value = mock_response
+        
+        with patch('app.services.llm.settings.GEMINI_API_KEY', 'test_key'):
+            client = GeminiClient()
+            client.response_cache = LLMCache(max_entries=4, ttl_seconds=60)
+            first = client.generate_content("cached prompt")
+            unvalidated = client.generate_content("cached prompt")
+            client.cache_response("cached prompt", first["response"])
+            cached = client.generate_content("cached prompt")
+            bypassed = client.generate_content("cached prompt", use_cache=False)
+        
+        assert first["success"] is True
+        assert "cached" not in unvalidated
+        assert cached["response"] == first["response"]
+        assert cached["cached"] is True
+        assert "cached" not in bypassed
+        assert mock_client.models.generate_content.call_count == 3
+    
+    @pytest.mark.asyncio
+    @patch('app.services.llm.genai.Client')
+    async def test_invalid_pipeline_response_not_cached(self, mock_client_class):
+        """Test a response that fails parsing is not replayed"""
+        mock_client = mock_client_class.return_value
+        mock_client.models.generate_content.return_value = Mock(text="no pipeline here")
+        mcp_context = {"database": {"tables": []}, "filesystem": {"files": []}}
+        
+        with patch('app.services.llm.settings.GEMINI_API_KEY', 'test_key'):
+            service = LLMPipelineService(mcp_manager=Mock())
+            service.gemini_client.response_cache = LLMCache(max_entries=4, ttl_seconds=60)
+            first = await service.generate_pipeline("Do something", 1, mcp_context)
+            second = await service.generate_pipeline("Do something", 1, mcp_context)
+        
+        assert first["success"] is False
+        assert second["success"] is False
+        assert mock_client.models.generate_content.call_count == 2
+    
+    @patch('app.services.llm.time.sleep')
+    @patch('app.services.llm.genai.Client')
+    def test_generate_content_retries_with_backoff(self, mock_client_class, mock_sleep):
+        """Test transient failures are retried in a loop with growing delays"""
+        mock_response = Mock()
+        mock_response.text = '{"pipeline": []}'
+        mock_client = mock_client_class.return_value
+        mock_client.models.generate_content.side_effect = [
+            ConnectionError("reset"),
+            ConnectionError("reset"),
+            mock_response
+        ]
+        
+        with patch('app.services.llm.settings.GEMINI_API_KEY', 'test_key'), \
+                patch('app.services.llm.random.uniform', return_value=1.0):
+            client = GeminiClient(max_retries=2, retry_delay_seconds=1.0)
+            client.response_cache = LLMCache(max_entries=0)
+            result = client.generate_content("retry prompt")
+        
+        assert result["success"] is True
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1.0, 2.0]
+    
+    @patch('app.services.llm.time.sleep')
+    @patch('app.services.llm.genai.Client')
+    def test_generate_content_gives_up(self, mock_client_class, mock_sleep):
+        """Test the last error is returned once retries are exhausted"""
+        mock_client = mock_client_class.return_value
+        mock_client.models.generate_content.side_effect = ConnectionError("down")
+        
+        with patch('app.services.llm.settings.GEMINI_API_KEY', 'test_key'):
+            client = GeminiClient(max_retries=2)
+            client.response_cache = LLMCache(max_entries=0)
+            result = client.generate_content("failing prompt")
+        
+        assert result["success"] is False
+        assert result["error_type"] == "ConnectionError"
+        assert mock_client.models.generate_content.call_count == 3
+        assert mock_sleep.call_count == 2
+    
+    @patch('app.services.llm.genai.Client')
+    def test_retry_delay_honors_retry_after(self, mock_client_class):
+        """Test a Retry-After header overrides the computed backoff"""
+        error = Exception("429 Too Many Requests")
+        error.response = Mock(headers={"retry-after": "3"})
+        
+        with patch('app.services.llm.settings.GEMINI_API_KEY', 'test_key'):
+            client = GeminiClient(timeout_seconds=30)
+        
+        assert client._retry_delay(0, error) == 3.0
+        assert 0 < client._retry_delay(0, Exception("no header")) <= client.retry_delay_seconds * 1.5
+    
+    @pytest.mark.asyncio
+    @patch('app.services.llm.genai.Client')
+    async def test_agenerate_batch_runs_concurrently(self, mock_client_class):
+        """Test batch prompts are sent concurrently within the limit"""
+        in_flight = 0
+        peak = 0
+        
+        async def fake_generate(model, contents, config):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return Mock(text=f'{{"prompt": "{contents}"}}')
+        
+        mock_client = mock_client_class.return_value
+        mock_client.aio.models.generate_content = fake_generate
+        
+        with patch('app.services.llm.settings.GEMINI_API_KEY', 'test_key'):
+            client = GeminiClient()
+            client.response_cache = LLMCache(max_entries=0)
+            results = await client.agenerate_batch(
+                [f"p{i}" for i in range(6)],
+                max_concurrency=3
+            )
+        
+        assert [r["response"] for r in results] == [f'{{"prompt": "p{i}"}}' for i in range(6)]
+        assert peak == 3
+    
+    @patch('app.services.llm.genai.Client')
+    def test_should_retry_classification(self, mock_client_class):
+        """Test retry decisions by error type and message"""
+        with patch('app.services.llm.settings.GEMINI_API_KEY', 'test_key'):
+            client = GeminiClient(max_retries=2)
+        
+        assert client._should_retry("ConnectionError", 0) is True
+        assert client._should_retry("ReadTimeout", 0) is True
+        assert client._should_retry("PermissionDenied", 0) is False
+        assert client._should_retry("InvalidArgumentError", 0) is False
+        assert client._should_retry("ValueError", 0, "Response blocked: SAFETY") is False
+        assert client._should_retry("ValueError", 0, "unexpected") is True
+        assert client._should_retry("ConnectionError", 2) is False
+    
     def test_client_requires_api_key(self):
         """Test client raises error without API key"""
         with patch('app.services.llm.settings.GEMINI_API_KEY', ''):
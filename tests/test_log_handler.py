@@ -0,0 +1,58 @@
+"""
+Unit tests for the JSON log handler
+"""
+import io
+import logging
+
+import orjson
+import pytest
+
+from app.core.log_handler import JSONLogHandler
+
+
+@pytest.fixture
+def log():
+    """Create a logger writing to an in-memory stream"""
+    stream = io.StringIO()
+    logger = logging.getLogger("queryforge.test_log_handler")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = JSONLogHandler(stream)
+    logger.addHandler(handler)
+    yield logger, stream
+    logger.removeHandler(handler)
+
+
+class TestJSONLogHandler:
+    """Tests for JSONLogHandler"""
+
+    def test_record_fields(self, log):
+        """Test records are written as one JSON line"""
+        logger, stream = log
+        logger.info("pipeline %s created", 42)
+
+        entry = orjson.loads(stream.getvalue())
+        assert entry["msg"] == "pipeline 42 created"
+        assert entry["lvl"] == "INFO"
+        assert entry["name"] == "queryforge.test_log_handler"
+        assert isinstance(entry["ts"], float)
+
+    def test_exception_info(self, log):
+        """Test exception tracebacks are included"""
+        logger, stream = log
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("failed")
+
+        entry = orjson.loads(stream.getvalue())
+        assert "RuntimeError: boom" in entry["exc"]
+
+    def test_one_line_per_record(self, log):
+        """Test each record ends with a newline"""
+        logger, stream = log
+        logger.info("first")
+        logger.warning("second\nline")
+
+        lines = stream.getvalue().splitlines()
+        assert [orjson.loads(line)["msg"] for line in lines] == ["first", "second\nline"]
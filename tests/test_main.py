@@ -0,0 +1,45 @@
+"""
+Unit tests for application startup helpers
+"""
+import asyncio
+
+import pytest
+
+from app.main import _run_concurrently
+
+
+class TestRunConcurrently:
+    """Tests for _run_concurrently"""
+
+    @pytest.mark.asyncio
+    async def test_runs_all(self):
+        """Test every coroutine completes"""
+        done = []
+
+        async def work(name):
+            await asyncio.sleep(0)
+            done.append(name)
+
+        await _run_concurrently(work("a"), work("b"))
+
+        assert sorted(done) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_siblings(self):
+        """Test the first failure cancels the others and is re-raised"""
+        cancelled = asyncio.Event()
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await _run_concurrently(slow(), fail())
+
+        assert cancelled.is_set()
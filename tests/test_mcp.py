@@ -11,8 +11,11 @@ import sqlite3
 from datetime import datetime
 import time
 
+from app.core.database import ConnectionPool
+from app.services import mcp as mcp_module
 from app.services.mcp import (
     get_database_schema,
+    get_database_schema_async,
     get_filesystem_metadata,
     extract_csv_metadata,
     extract_json_metadata,
@@ -476,6 +479,19 @@ class TestMCPAsyncMethods:
         context2 = await mcp.get_full_context_async()
         assert context2["metadata"]["cache_status"] == "fresh"
     
+    async def test_schema_async_uses_open_pool(self, temp_db, monkeypatch):
+        """Test async schema extraction borrows a connection from an open pool"""
+        pool = ConnectionPool(db_path=temp_db, size=1)
+        await pool.open()
+        monkeypatch.setattr(mcp_module, "pool", pool)
+        
+        schema = await get_database_schema_async(temp_db)
+        
+        table_names = [t["name"] for t in schema["tables"]]
+        assert "test_table" in table_names
+        assert len(pool._connections) == 1
+        await pool.close()
+    
     async def test_refresh_cache_async(self, temp_db, temp_data_dir):
         """Test async cache refresh"""
         mcp = MCPContextManager(db_path=temp_db, data_directory=temp_data_dir)
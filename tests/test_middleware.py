@@ -0,0 +1,116 @@
+"""
+Unit tests for the ASGI middleware
+"""
+import re
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.middleware import ErrorASGIMiddleware, DevCORSMiddleware
+
+
+def build_app(debug: bool = False, cors: bool = False) -> FastAPI:
+    """Create a small app with routes that fail in different ways"""
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/value-error")
+    async def value_error():
+        raise ValueError("bad input")
+
+    @app.get("/crash")
+    async def crash():
+        raise RuntimeError("secret detail")
+
+    @app.get("/not-found")
+    async def not_found():
+        raise HTTPException(status_code=404, detail="missing")
+
+    app.add_middleware(ErrorASGIMiddleware, debug=debug)
+    if cors:
+        app.add_middleware(DevCORSMiddleware)
+    return app
+
+
+@pytest.fixture
+def client():
+    """Create a test client without debug details"""
+    return TestClient(build_app())
+
+
+class TestErrorASGIMiddleware:
+    """Tests for ErrorASGIMiddleware"""
+
+    def test_success_passthrough(self, client):
+        """Test successful responses are untouched"""
+        response = client.get("/ok")
+
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+
+    def test_value_error(self, client):
+        """Test ValueError becomes a 400 validation error"""
+        response = client.get("/value-error")
+        body = response.json()
+
+        assert response.status_code == 400
+        assert body["error_code"] == "VALIDATION_ERROR"
+        assert body["details"] == "bad input"
+        assert re.fullmatch(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z", body["timestamp"])
+
+    def test_unhandled_error_hides_details(self, client):
+        """Test other exceptions become a 500 without details"""
+        response = client.get("/crash")
+        body = response.json()
+
+        assert response.status_code == 500
+        assert body["error_code"] == "INTERNAL_ERROR"
+        assert "secret" not in body["details"]
+
+    def test_unhandled_error_debug_details(self):
+        """Test exception text is exposed in debug mode"""
+        response = TestClient(build_app(debug=True)).get("/crash")
+
+        assert response.json()["details"] == "secret detail"
+
+    def test_http_exception_untouched(self, client):
+        """Test HTTPException keeps FastAPI's own handling"""
+        response = client.get("/not-found")
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "missing"}
+
+
+class TestDevCORSMiddleware:
+    """Tests for DevCORSMiddleware"""
+
+    def test_adds_headers(self):
+        """Test CORS headers echo the request origin"""
+        client = TestClient(build_app(cors=True))
+        response = client.get("/ok", headers={"Origin": "http://localhost:3000"})
+
+        assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+        assert response.headers["access-control-allow-credentials"] == "true"
+
+    def test_preflight(self):
+        """Test preflight requests are answered directly"""
+        client = TestClient(build_app(cors=True))
+        response = client.options("/ok", headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type"
+        })
+
+        assert response.status_code == 204
+        assert "POST" in response.headers["access-control-allow-methods"]
+        assert response.headers["access-control-allow-headers"] == "content-type"
+
+    def test_no_origin(self):
+        """Test same-origin requests get no CORS headers"""
+        response = TestClient(build_app(cors=True)).get("/ok")
+
+        assert "access-control-allow-origin" not in response.headers
@@ -619,6 +619,37 @@ class TestRepairLoop:
         
         assert result['success'] is False
         assert 'Maximum repair attempts' in result['error']
+    
+    @patch('app.services.repair.RepairModule')
+    @patch('app.services.repair.ErrorAnalyzer')
+    def test_repair_and_retry_max_attempts_override(
+        self,
+        mock_analyzer_class,
+        mock_repair_class,
+        sample_failed_execution
+    ):
+        """Test per-call max_attempts overrides the configured limit"""
+        db_path = get_db_path()
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            INSERT INTO Repair_Logs (
+                pipeline_id, attempt_number, original_error,
+                ai_fix_reason, patched_code, repair_successful
+            ) VALUES (?, 1, 'Error', 'Fix', 'code', 0)
+        """, (sample_failed_execution['pipeline_id'],))
+        conn.commit()
+        conn.close()
+        
+        loop = RepairLoop()
+        
+        result = loop.repair_and_retry(
+            sample_failed_execution['pipeline_id'],
+            sample_failed_execution['log_id'],
+            max_attempts=1
+        )
+        
+        assert result['success'] is False
+        assert 'Maximum repair attempts (1)' in result['error']
 
 
 class TestRepairIntegration:
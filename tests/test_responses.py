@@ -0,0 +1,105 @@
+"""
+Unit tests for the shared response helpers
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.responses import StaticJSONEndpoint, StaticRedirectEndpoint, etag_matches
+
+
+def build_client(header_middleware: bool = False) -> TestClient:
+    """Create a client for an app using the static endpoints"""
+    app = FastAPI()
+    app.add_route("/status", StaticJSONEndpoint(b'{"ok":true}'), methods=["GET"])
+    app.add_route("/", StaticRedirectEndpoint("/web/"), methods=["GET"])
+    if header_middleware:
+        app.add_middleware(AppendHeaderMiddleware)
+    return TestClient(app)
+
+
+class AppendHeaderMiddleware:
+    """Middleware that appends a header to the response start in place"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"].append((b"x-extra", b"1"))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class TestEtagMatches:
+    """Tests for etag_matches"""
+
+    def test_exact_and_weak(self):
+        """Test strong, weak and listed validators match"""
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('W/"abc"', '"abc"')
+        assert etag_matches('"x", "abc"', '"abc"')
+
+    def test_no_match(self):
+        """Test missing or different validators do not match"""
+        assert not etag_matches(None, '"abc"')
+        assert not etag_matches('"x"', '"abc"')
+
+    def test_wildcard(self):
+        """Test * matches any ETag"""
+        assert etag_matches("*", '"abc"')
+
+
+class TestStaticJSONEndpoint:
+    """Tests for StaticJSONEndpoint"""
+
+    def test_body_and_headers(self):
+        """Test the fixed body is served with its ETag"""
+        response = build_client().get("/status")
+
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["etag"].startswith('"')
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets an empty 304"""
+        client = build_client()
+        etag = client.get("/status").headers["etag"]
+        response = client.get("/status", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_headers_not_shared_across_requests(self):
+        """Test in-place header edits by middleware do not accumulate"""
+        client = build_client(header_middleware=True)
+        client.get("/status")
+        response = client.get("/status")
+
+        assert response.headers.get_list("x-extra") == ["1"]
+
+    def test_method_not_allowed(self):
+        """Test methods outside the route's list are rejected by the router"""
+        assert build_client().post("/status").status_code == 405
+
+
+class TestStaticRedirectEndpoint:
+    """Tests for StaticRedirectEndpoint"""
+
+    def test_redirect(self):
+        """Test the fixed redirect target and status"""
+        response = build_client().get("/", follow_redirects=False)
+
+        assert response.status_code == 307
+        assert response.headers["location"] == "/web/"
+
+    def test_headers_not_shared_across_requests(self):
+        """Test in-place header edits by middleware do not accumulate"""
+        client = build_client(header_middleware=True)
+        client.get("/", follow_redirects=False)
+        response = client.get("/", follow_redirects=False)
+
+        assert response.headers.get_list("x-extra") == ["1"]
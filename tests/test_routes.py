@@ -0,0 +1,172 @@
+"""
+Unit tests for the pipeline API routes
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest.mock import Mock
+
+import orjson
+import pytest
+from fastapi.routing import APIRoute
+
+from app.api.routes import pipeline as pipeline_routes
+from app.core.database import ConnectionPool, SCHEMA_SQL
+
+
+@pytest.fixture
+def run_pool(monkeypatch):
+    """Point the routes at a pool over a database with one running pipeline"""
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE Pipelines (id INTEGER PRIMARY KEY, status TEXT, updated_at TEXT)")
+    conn.execute("INSERT INTO Pipelines (id, status) VALUES (1, 'running')")
+    conn.commit()
+    conn.close()
+
+    test_pool = ConnectionPool(db_path=db_path, size=1)
+    monkeypatch.setattr(pipeline_routes, "pool", test_pool)
+
+    yield db_path
+
+    for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def read_status(db_path: str) -> str:
+    """Read the stored status of pipeline 1"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT status FROM Pipelines WHERE id = 1").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestPipelineRouter:
+    """Tests for the pipeline route table"""
+
+    def test_root_registered_once(self):
+        """Test '/' has a single handler on the pipeline router"""
+        routes = [r for r in pipeline_routes.router.routes if r.path == "/"]
+
+        assert len(routes) == 1
+
+    def test_no_duplicate_routes(self):
+        """Test no path and method pair is registered twice"""
+        keys = [
+            (route.path, method)
+            for route in pipeline_routes.router.routes
+            if isinstance(route, APIRoute)
+            for method in route.methods
+        ]
+
+        assert len(keys) == len(set(keys))
+
+
+@pytest.mark.asyncio
+class TestPipelineRunStatus:
+    """Tests for the final status written by pipeline runs"""
+
+    async def test_run_records_status(self, run_pool, monkeypatch):
+        """Test the route writes the final status itself"""
+        synthesizer = Mock()
+        synthesizer.synthesize_pipeline.return_value = {"success": True, "output_directory": "out"}
+        runner = Mock()
+        runner.execute_pipeline.return_value = Mock(overall_success=False, step_results=[], failed_step=None)
+        monkeypatch.setattr(pipeline_routes, "get_synthesizer", lambda: synthesizer)
+        monkeypatch.setattr(pipeline_routes, "get_sandbox_runner", lambda: runner)
+
+        result = await pipeline_routes._execute_pipeline_run(1, [])
+        await pipeline_routes.pool.close()
+
+        assert result.status == "failed"
+        assert read_status(run_pool) == "failed"
+
+    async def test_sandbox_runs_on_its_own_executor(self, run_pool, monkeypatch):
+        """Test sandbox execution uses the sandbox executor, synthesis the default one"""
+        threads = {}
+
+        def synthesize_pipeline(**kwargs):
+            threads["synthesis"] = threading.current_thread().name
+            return {"success": True, "output_directory": "out"}
+
+        def execute_pipeline(pipeline_id, output_dir):
+            threads["sandbox"] = threading.current_thread().name
+            return Mock(overall_success=True, step_results=[], failed_step=None)
+
+        monkeypatch.setattr(pipeline_routes, "get_synthesizer", lambda: Mock(synthesize_pipeline=synthesize_pipeline))
+        monkeypatch.setattr(pipeline_routes, "get_sandbox_runner", lambda: Mock(execute_pipeline=execute_pipeline))
+
+        await pipeline_routes._execute_pipeline_run(1, [])
+        await pipeline_routes.pool.close()
+
+        assert threads["sandbox"].startswith("queryforge-sandbox")
+        assert not threads["synthesis"].startswith("queryforge-sandbox")
+
+    async def test_background_error_marks_failed(self, run_pool, monkeypatch):
+        """Test an aborted background run does not stay running"""
+        synthesizer = Mock()
+        synthesizer.synthesize_pipeline.side_effect = RuntimeError("synthesis crashed")
+        monkeypatch.setattr(pipeline_routes, "get_synthesizer", lambda: synthesizer)
+
+        await pipeline_routes._run_pipeline_in_background(1, [])
+        await pipeline_routes.pool.close()
+
+        assert read_status(run_pool) == "failed"
+
+
+@pytest.mark.asyncio
+class TestPipelineLogStream:
+    """Tests for the NDJSON log stream"""
+
+    async def test_streams_one_snapshot_off_the_pool(self, monkeypatch, tmp_path):
+        """Test records come in batches from one snapshot without using a pooled connection"""
+        db_path = str(tmp_path / "logs.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA_SQL)
+        conn.execute("INSERT INTO Pipelines (id, user_id, prompt_text) VALUES (1, 1, 'p')")
+        conn.execute("""
+            INSERT INTO Pipeline_Steps (pipeline_id, step_number, code_type, script_content)
+            VALUES (1, 1, 'sql', 'SELECT 1'), (1, 2, 'bash', 'echo hi'), (1, 3, 'sql', 'SELECT 3')
+        """)
+        conn.commit()
+
+        test_pool = ConnectionPool(db_path=db_path, size=1)
+        monkeypatch.setattr(pipeline_routes, "pool", test_pool)
+        monkeypatch.setattr(pipeline_routes, "LOG_STREAM_BATCH_SIZE", 2)
+
+        stream = pipeline_routes._stream_pipeline_logs(1)
+        meta = orjson.loads(await anext(stream))
+
+        # Written after the snapshot was taken, so never streamed
+        conn.execute("UPDATE Pipelines SET status = 'failed' WHERE id = 1")
+        conn.execute("DELETE FROM Pipeline_Steps WHERE step_number = 3")
+        conn.commit()
+        conn.close()
+
+        first_batch = [orjson.loads(line) for line in (await anext(stream)).splitlines()]
+        remaining = [orjson.loads(chunk) async for chunk in stream]
+
+        assert test_pool._open_count == 0
+        assert meta == {"record": "meta", "pipeline_id": 1, "original_prompt": "p", "overall_status": "pending"}
+        assert first_batch == [
+            {"record": "step", "step_number": 1, "type": "sql", "content": "SELECT 1"},
+            {"record": "step", "step_number": 2, "type": "bash", "content": "echo hi"},
+        ]
+        assert [record["step_number"] for record in remaining] == [3]
+
+    async def test_deleted_pipeline_yields_nothing(self, monkeypatch, tmp_path):
+        """Test a pipeline deleted before the stream starts yields no records"""
+        db_path = str(tmp_path / "logs.db")
+        conn = sqlite3.connect(db_path)
+        conn.executescript(SCHEMA_SQL)
+        conn.close()
+
+        monkeypatch.setattr(pipeline_routes, "pool", ConnectionPool(db_path=db_path, size=1))
+
+        assert [chunk async for chunk in pipeline_routes._stream_pipeline_logs(1)] == []
@@ -0,0 +1,26 @@
+"""
+Unit tests for the API schemas
+"""
+from app.models.schemas import ContextSummary, PipelineCreateResponse
+
+
+class TestPipelineCreateResponse:
+    """Tests for PipelineCreateResponse"""
+
+    def test_context_used_accepts_summary(self):
+        """Test a ContextSummary instance validates as context_used"""
+        summary = ContextSummary(tables_referenced=["products"], total_steps=2)
+        response = PipelineCreateResponse(success=True, context_used=summary)
+
+        assert response.context_used.tables_referenced == ["products"]
+        assert response.context_used.total_steps == 2
+
+    def test_context_used_from_dict(self):
+        """Test context_used is parsed from plain data"""
+        response = PipelineCreateResponse.model_validate({
+            "success": True,
+            "context_used": {"files_referenced": ["data/sales.csv"]}
+        })
+
+        assert response.context_used.files_referenced == ["data/sales.csv"]
+        assert response.context_used.total_steps == 0
@@ -0,0 +1,65 @@
+"""
+Unit tests for the web UI routes
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes.web import _accepts_gzip, router
+
+
+def build_client() -> TestClient:
+    """Create a client for an app serving the web routes"""
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+class TestAcceptsGzip:
+    """Tests for _accepts_gzip"""
+
+    def test_explicit_gzip(self):
+        """Test gzip is accepted when listed with a non-zero q"""
+        assert _accepts_gzip("gzip")
+        assert _accepts_gzip("br, gzip;q=0.5")
+        assert _accepts_gzip("X-GZIP")
+
+    def test_refused_with_zero_q(self):
+        """Test q=0 refuses gzip, including over a wildcard"""
+        assert not _accepts_gzip("gzip;q=0")
+        assert not _accepts_gzip("gzip; q=0.0, identity")
+        assert not _accepts_gzip("*, gzip;q=0")
+
+    def test_wildcard(self):
+        """Test a wildcard covers gzip unless it is refused"""
+        assert _accepts_gzip("br, *;q=0.1")
+        assert not _accepts_gzip("*;q=0")
+
+    def test_not_listed(self):
+        """Test gzip is not assumed when absent or malformed"""
+        assert not _accepts_gzip("")
+        assert not _accepts_gzip("br, identity")
+        assert not _accepts_gzip("gzip;q=high")
+
+
+class TestPipelineDetailPage:
+    """Tests for the pipeline detail page"""
+
+    def test_gzip_when_accepted(self):
+        """Test the page is served compressed when gzip is accepted"""
+        response = build_client().get(
+            "/pipeline/7/view", headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert "Pipeline #7" in response.text
+
+    def test_plain_when_gzip_refused(self):
+        """Test gzip;q=0 gets the uncompressed page"""
+        response = build_client().get(
+            "/pipeline/7/view", headers={"Accept-Encoding": "gzip;q=0"}
+        )
+
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert b"Pipeline #7" in response.content